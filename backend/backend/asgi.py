@@ -5,6 +5,14 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Serve it with an ASGI server so the async views under /api/async/ run natively
+on the event loop, e.g.:
+
+    uvicorn backend.asgi:application --workers 4
+
+DJANGO_ASGI tells the settings they are served over ASGI, where persistent
+database connections are off by default (see `CONN_MAX_AGE` in settings.py).
 """
 
 import os
@@ -12,5 +20,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('DJANGO_ASGI', 'True')
 
 application = get_asgi_application()
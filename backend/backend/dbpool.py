@@ -0,0 +1,25 @@
+# backend/dbpool.py
+
+from django.db import connections
+
+# Connection pool statistics (see `DB_POOL` in settings.py).
+# psycopg-pool counts, per pool, how many connection requests were made and how
+# long they waited in total; the average wait shows whether the pool is too small
+# for the process's concurrency. The counters are per process and cumulative.
+
+
+# Returns {alias: stats} for every database alias that uses a pool. Each entry has
+# psycopg-pool's own counters (`pool_size`, `pool_available`, `requests_num`,
+# `requests_waiting`, `requests_wait_ms`, `requests_errors`, ...) plus
+# `requests_avg_wait_ms`. Aliases without a pool are left out.
+def pool_stats():
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+        alias_stats = pool.get_stats()
+        requests = alias_stats.get('requests_num', 0)
+        alias_stats['requests_avg_wait_ms'] = alias_stats.get('requests_wait_ms', 0) / requests if requests else 0.0
+        stats[alias] = alias_stats
+    return stats
@@ -0,0 +1,293 @@
+# backend/backend/metrics.py
+
+# Request-level performance metrics, exposed in the Prometheus text format at
+# `/metrics`.
+#
+# `MetricsMiddleware` (first in `MIDDLEWARE`, so it times the whole stack) records
+# for every request, keyed by the resolved URL name (`task-list-create`,
+# `task-detail`, `token_obtain_pair`, ...) and method:
+# - a latency histogram and a request counter by status code,
+# - a histogram of queries per request and the total time spent in queries,
+#   counted by a database execute wrapper installed on every connection,
+# - the total time spent serializing (`TaskSerializer.data`) and rendering.
+# Requests slower than `METRICS['SLOW_REQUEST_MS']` are logged to the
+# `backend.metrics.slow` logger together with their SQL, for a sampled fraction
+# (`SLOW_REQUEST_SAMPLE_RATE`) of them. Connection pool counters (backend/dbpool.py)
+# are exported too.
+#
+# The numbers live in this process's memory, so with several worker processes each
+# one has to be scraped (or run one process per container). Recording costs a few
+# microseconds per request; `manage.py benchmark_metrics` measures it.
+
+import hmac
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from .dbpool import pool_stats
+
+slow_request_logger = logging.getLogger('backend.metrics.slow')
+
+# Histogram bucket upper bounds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+# RequestMetrics
+# What one request has accumulated so far. Held in a context variable, so the
+# database wrapper and the serialization timers find the current request's
+# record from any thread or task handling it.
+class RequestMetrics:
+    __slots__ = ('queries', 'query_seconds', 'serialization_seconds', 'sql')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.serialization_seconds = 0.0
+        # (sql, seconds) of the first `MAX_SAMPLED_QUERIES` queries, for slow-request samples.
+        self.sql = []
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+# Histogram
+# Cumulative-on-export bucket counts, a sum and a count.
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class EndpointStats:
+    __slots__ = ('latency', 'queries', 'query_seconds', 'serialization_seconds', 'statuses')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.query_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.statuses = {}
+
+
+# MetricsRegistry
+# All endpoint statistics of this process.
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, method, status, seconds, request_metrics):
+        with self._lock:
+            stats = self._endpoints.get((endpoint, method))
+            if stats is None:
+                stats = self._endpoints[(endpoint, method)] = EndpointStats()
+            stats.latency.observe(seconds)
+            stats.queries.observe(request_metrics.queries)
+            stats.query_seconds += request_metrics.query_seconds
+            stats.serialization_seconds += request_metrics.serialization_seconds
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    # The metrics in the Prometheus text exposition format.
+    def render(self):
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = []
+            _histogram(lines, 'http_request_duration_seconds', 'Request latency in seconds.',
+                       [(labels, stats.latency) for labels, stats in endpoints])
+            _header(lines, 'http_requests_total', 'counter', 'Requests by status code.')
+            for (endpoint, method), stats in endpoints:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f'http_requests_total{_labels(endpoint, method, status=status)} {count}')
+            _histogram(lines, 'db_queries_per_request', 'Database queries per request.',
+                       [(labels, stats.queries) for labels, stats in endpoints])
+            _header(lines, 'db_query_duration_seconds_total', 'counter', 'Time spent executing database queries.')
+            for (endpoint, method), stats in endpoints:
+                lines.append(f'db_query_duration_seconds_total{_labels(endpoint, method)} {stats.query_seconds:.6f}')
+            _header(lines, 'serialization_duration_seconds_total', 'counter',
+                    'Time spent serializing and rendering responses.')
+            for (endpoint, method), stats in endpoints:
+                lines.append(
+                    f'serialization_duration_seconds_total{_labels(endpoint, method)} {stats.serialization_seconds:.6f}'
+                )
+        _pool_metrics(lines)
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(endpoint, method, **extra):
+    pairs = [('endpoint', endpoint), ('method', method), *extra.items()]
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+def _header(lines, name, metric_type, help_text):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {metric_type}')
+
+
+def _histogram(lines, name, help_text, series):
+    _header(lines, name, 'histogram', help_text)
+    for (endpoint, method), histogram in series:
+        cumulative = 0
+        for bound, count in zip((*histogram.bounds, '+Inf'), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(endpoint, method, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(endpoint, method)} {histogram.sum:.6f}')
+        lines.append(f'{name}_count{_labels(endpoint, method)} {histogram.count}')
+
+
+def _pool_metrics(lines):
+    stats = pool_stats()
+    if not stats:
+        return
+    for name, key, metric_type, help_text in (
+        ('db_pool_size', 'pool_size', 'gauge', 'Connections currently managed by the pool.'),
+        ('db_pool_available', 'pool_available', 'gauge', 'Idle connections in the pool.'),
+        ('db_pool_requests_total', 'requests_num', 'counter', 'Connection requests made to the pool.'),
+        ('db_pool_wait_seconds_total', 'requests_wait_ms', 'counter', 'Time spent waiting for a pooled connection.'),
+    ):
+        _header(lines, name, metric_type, help_text)
+        for alias, alias_stats in sorted(stats.items()):
+            value = alias_stats.get(key, 0)
+            if key == 'requests_wait_ms':
+                value /= 1000
+            lines.append(f'{name}{{alias="{alias}"}} {value}')
+
+
+registry = MetricsRegistry()
+
+
+# Database execute wrapper: counts and times the queries of the current request.
+def _query_wrapper(execute, sql, params, many, context):
+    request_metrics = _current.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - started
+        request_metrics.queries += 1
+        request_metrics.query_seconds += seconds
+        if len(request_metrics.sql) < settings.METRICS['MAX_SAMPLED_QUERIES']:
+            request_metrics.sql.append((sql, seconds))
+
+
+# Installed once on every database connection when it's opened.
+@receiver(connection_created)
+def install_query_wrapper(sender, connection, **kwargs):
+    if _query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_wrapper)
+
+
+# Adds the time spent in the block to the current request's serialization time.
+@contextmanager
+def serialization_timer():
+    request_metrics = _current.get()
+    if request_metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        request_metrics.serialization_seconds += time.perf_counter() - started
+
+
+# TimedJSONRenderer
+# DRF's JSON renderer, with rendering counted as serialization time.
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with serialization_timer():
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+# MetricsMiddleware
+# Works for both sync (WSGI) and async (ASGI) requests without a thread switch.
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.METRICS['ENABLED']:
+            return self.get_response(request)
+        request_metrics = RequestMetrics()
+        token = _current.set(request_metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, time.perf_counter() - started, request_metrics)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.METRICS['ENABLED']:
+            return await self.get_response(request)
+        request_metrics = RequestMetrics()
+        token = _current.set(request_metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, time.perf_counter() - started, request_metrics)
+        return response
+
+    def _finish(self, request, response, seconds, request_metrics):
+        match = getattr(request, 'resolver_match', None)
+        endpoint = match.view_name if match is not None and match.url_name else 'unmatched'
+        registry.record(endpoint, request.method, response.status_code, seconds, request_metrics)
+
+        config = settings.METRICS
+        if seconds * 1000 >= config['SLOW_REQUEST_MS'] and random.random() < config['SLOW_REQUEST_SAMPLE_RATE']:
+            slow_request_logger.warning(
+                'Slow request: %s %s (%s) took %.1f ms, %d queries in %.1f ms, serialization %.1f ms\n%s',
+                request.method, request.path, endpoint, seconds * 1000,
+                request_metrics.queries, request_metrics.query_seconds * 1000,
+                request_metrics.serialization_seconds * 1000,
+                '\n'.join(f'  [{sql_seconds * 1000:.1f} ms] {sql}' for sql, sql_seconds in request_metrics.sql),
+            )
+
+
+# GET /metrics - the metrics above, for Prometheus to scrape, which must send
+# `METRICS['AUTH_TOKEN']` as a bearer token. The endpoint is served on the public
+# app host, so it answers 404 while no token is configured.
+def metrics_view(request):
+    token = settings.METRICS['AUTH_TOKEN']
+    if not token:
+        return HttpResponse(status=404)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,94 @@
+# backend/backend/routers.py
+
+# Read-replica routing.
+#
+# `ReadReplicaMiddleware` decides per request whether reads may go to a replica:
+# only for GET/HEAD requests to views that set `read_replica = True` (the task list
+# and detail views), and not for clients that wrote something in the last
+# `DATABASE_REPLICA_PIN_SECONDS` (so nobody reads their own write back from a
+# replica that is still catching up). `ReadReplicaRouter` then sends those reads to
+# a random alias from `DATABASE_REPLICAS`; every other query uses the primary.
+# The pins live in the shared cache `DATABASE_REPLICA_PIN_CACHE_ALIAS`, since a
+# client's next request may be served by another process. Both are no-ops while
+# `DATABASE_REPLICAS` is empty or there is no shared cache (see settings.py).
+
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+# Whether the current request's reads may use a replica.
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_reads_enabled():
+    return _replica_reads.get()
+
+
+# ReadReplicaRouter
+# Enabled through `DATABASE_ROUTERS` when replicas are configured.
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Reads inside a transaction on the primary must see that transaction's writes.
+        if _replica_reads.get() and settings.DATABASE_REPLICAS and not connections['default'].in_atomic_block:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    # Replicas hold the same data as the primary, so objects may relate across them.
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    # The schema is only migrated on the primary; replication copies it.
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+def _pin_key(request):
+    # Identify the client by its credentials, falling back to its address.
+    identity = (
+        request.META.get('HTTP_AUTHORIZATION')
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        or request.META.get('REMOTE_ADDR', '')
+    )
+    return 'db:replica-pin:' + hashlib.sha1(identity.encode(), usedforsecurity=False).hexdigest()
+
+
+# The cache holding read-your-writes pins, or None when replica reads are off.
+def _pin_cache():
+    alias = settings.DATABASE_REPLICA_PIN_CACHE_ALIAS
+    return caches[alias] if settings.DATABASE_REPLICAS and alias else None
+
+
+# ReadReplicaMiddleware
+class ReadReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._replica_reads_token = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if request._replica_reads_token is not None:
+                _replica_reads.reset(request._replica_reads_token)
+        pin_cache = _pin_cache()
+        if pin_cache is not None and request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_cache.set(_pin_key(request), True, timeout=settings.DATABASE_REPLICA_PIN_SECONDS)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        pin_cache = _pin_cache()
+        if pin_cache is None or request.method not in SAFE_METHODS:
+            return None
+        # DRF class-based views expose their class as `view_func.cls`.
+        if getattr(getattr(view_func, 'cls', view_func), 'read_replica', False) and not pin_cache.get(_pin_key(request)):
+            request._replica_reads_token = _replica_reads.set(True)
+        return None
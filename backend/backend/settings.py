@@ -52,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.metrics.MetricsMiddleware', # First, so request metrics cover the whole stack
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', # For serving static files in production (add later if using WhiteNoise)
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -59,8 +60,10 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.workspaces.WorkspaceIdsMiddleware', # Reads each user's workspace ids once per request
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'backend.routers.ReadReplicaMiddleware', # Lets opted-in GET views read from replicas
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -75,7 +78,7 @@ TEMPLATES = [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
-                'django.template.context_processors.messages',
+                'django.contrib.messages.context_processors.messages',
             ],
         },
     },
@@ -98,9 +101,90 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', 'AnswrM3Questions3'), # Database password
         'HOST': os.environ.get('DB_HOST', 'localhost'), # Database host (e.g., 'localhost' or a remote IP)
         'PORT': os.environ.get('DB_PORT', '5432'), # Database port (default for PostgreSQL is 5432)
+        # Keep connections open between requests (seconds; 0 closes them after each
+        # request) and check them before reuse, so a dropped connection is replaced
+        # instead of failing the request. Under ASGI (backend/asgi.py sets DJANGO_ASGI)
+        # the default is 0, as Django's docs advise: sync code there runs on threads
+        # that don't follow requests, so persistent connections pile up per thread
+        # instead of being reused. Use DB_POOL to reuse connections under ASGI.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '0' if os.environ.get('DJANGO_ASGI') == 'True' else '60')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
     }
 }
 
+# Connection pooling (PostgreSQL with psycopg 3 and psycopg-pool only).
+# DB_POOL=True gives each process a pool of connections shared by its threads,
+# instead of one persistent connection per thread. Pooled connections are checked
+# before being handed out. Django requires CONN_MAX_AGE = 0 with a pool.
+if os.environ.get('DB_POOL', 'False') == 'True' and 'postgresql' in DATABASES['default']['ENGINE']:
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')), # Seconds a request waits for a free connection
+        'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', '300')), # Close connections idle this long
+        'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', '3600')), # Recycle connections after this
+        'check': ConnectionPool.check_connection, # Health check before handing a connection out
+    }
+
+# Read replicas
+# DB_REPLICA_HOSTS=host1,host2 adds one database alias per replica (same name,
+# user and options as the primary). `backend.routers.ReadReplicaRouter` sends the
+# reads of views that opt in (task list and detail GETs) to a replica; everything
+# else, and all writes, stay on the primary. Replica reads also need REDIS_URL
+# (see DATABASE_REPLICA_PIN_CACHE_ALIAS below).
+DATABASE_REPLICAS = []
+for _index, _host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    _alias = f'replica_{_index}'
+    DATABASES[_alias] = {
+        **DATABASES['default'],
+        'HOST': _host.strip(),
+        'OPTIONS': {**DATABASES['default']['OPTIONS']},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(_alias)
+DATABASE_ROUTERS = ['backend.routers.ReadReplicaRouter'] if DATABASE_REPLICAS else []
+# After a client writes, its reads stay on the primary for this many seconds, so
+# it doesn't read its own change back from a replica that hasn't caught up yet.
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', '5'))
+# Cache holding those pins. A client's next request may reach another process, so
+# it must be a cache every process shares: without REDIS_URL it is None and all
+# reads stay on the primary.
+DATABASE_REPLICA_PIN_CACHE_ALIAS = 'default' if os.environ.get('REDIS_URL') else None
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.0/topics/auth/passwords/
+# PASSWORD_HASHER picks the hasher for new passwords: 'argon2' (the default when
+# argon2-cffi is installed), 'bcrypt' (needs the `bcrypt` package) or 'pbkdf2'.
+# The others stay listed so existing hashes still verify; Django rehashes a
+# password with the preferred hasher on the user's next successful login.
+try:
+    import argon2  # noqa: F401
+    _DEFAULT_PASSWORD_HASHER = 'argon2'
+except ImportError:
+    _DEFAULT_PASSWORD_HASHER = 'pbkdf2'
+_PASSWORD_HASHERS = {
+    'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', _DEFAULT_PASSWORD_HASHER)
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+# Cost parameters of the Argon2 hasher (see users/hashers.py). MEMORY_COST is in KiB.
+PASSWORD_ARGON2 = {
+    'TIME_COST': int(os.environ.get('ARGON2_TIME_COST', '2')),
+    'MEMORY_COST': int(os.environ.get('ARGON2_MEMORY_COST', '19456')),
+    'PARALLELISM': int(os.environ.get('ARGON2_PARALLELISM', '1')),
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -159,17 +243,167 @@ AUTH_USER_MODEL = 'users.CustomUser'
 
 # Django REST Framework settings
 # https://www.django-rest-framework.org/api-guide/settings/
+# Cache holding the ids of deactivated and deleted users, whose tokens stateless
+# authentication must reject. Every process has to see a revocation, so this must
+# name a cache every process shares: without REDIS_URL it is None.
+JWT_REVOCATION_CACHE_ALIAS = 'default' if os.environ.get('REDIS_URL') else None
+# JWT_STATELESS_AUTH=True switches API authentication to a stateless variant that
+# builds the user from the token claims instead of loading it from the database on
+# every request (see users/authentication.py). It only takes effect with a shared
+# revocation cache; otherwise users are loaded from the database.
+JWT_STATELESS_AUTH = (
+    os.environ.get('JWT_STATELESS_AUTH', 'False') == 'True' and JWT_REVOCATION_CACHE_ALIAS is not None
+)
+# Seconds each process remembers whether a user's tokens have been revoked.
+JWT_REVOCATION_CACHE_TTL = int(os.environ.get('JWT_REVOCATION_CACHE_TTL', '5'))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication' if JWT_STATELESS_AUTH
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
         'rest_framework.authentication.SessionAuthentication', # Optional: For browsable API
         'rest_framework.authentication.BasicAuthentication', # Optional: For browsable API
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated', # Default to requiring authentication for all views
     ),
+    # JSON rendering is timed for the request metrics (backend/metrics.py).
+    'DEFAULT_RENDERER_CLASSES': (
+        'backend.metrics.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10, # Number of items per page for paginated results
+    # Login attempts allowed on /api/token/ (see users/throttling.py).
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get('LOGIN_THROTTLE_IP_RATE', '30/min'),
+        'login_username': os.environ.get('LOGIN_THROTTLE_USERNAME_RATE', '10/min'),
+    },
+}
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Uses Redis when REDIS_URL is set (requires the `redis` package), otherwise a
+# per-process local-memory cache. CACHE_MAX_ENTRIES bounds the local-memory cache;
+# for Redis, bound the memory with the server's `maxmemory` setting instead.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'task-manager',
+            'OPTIONS': {
+                'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '10000')),
+            },
+        }
+    }
+
+# Task API settings
+# Per-user cache of serialized /api/tasks/ pages (see tasks/cache.py). It needs a
+# cache shared by every process, so it is only on by default with REDIS_URL.
+TASKS_LIST_CACHE = {
+    'ENABLED': os.environ.get('TASKS_LIST_CACHE_ENABLED', str(bool(os.environ.get('REDIS_URL')))) == 'True',
+    'ALIAS': 'default',
+    'TIMEOUT': int(os.environ.get('TASKS_LIST_CACHE_TIMEOUT', '300')), # Seconds
+    'MAX_ENTRY_BYTES': int(os.environ.get('TASKS_LIST_CACHE_MAX_ENTRY_BYTES', '262144')), # Larger pages are not cached
+}
+
+# Maximum number of operations accepted by one request to /api/tasks/bulk/.
+TASKS_BULK_MAX_OPERATIONS = int(os.environ.get('TASKS_BULK_MAX_OPERATIONS', '500'))
+# How long deleted-task tombstones are kept for delta sync (/api/tasks/?since=...).
+# Clients that last synced before this horizon must refetch the full list.
+TASKS_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('TASKS_TOMBSTONE_RETENTION_DAYS', '30'))
+# Delta sync looks this many seconds further back than requested, to cover
+# writes that were still committing when the client's previous sync ran.
+TASKS_SYNC_SKEW_SECONDS = int(os.environ.get('TASKS_SYNC_SKEW_SECONDS', '5'))
+# Tasks per delta sync response; the rest follow on pages reached with `next`.
+TASKS_SYNC_MAX_TASKS = int(os.environ.get('TASKS_SYNC_MAX_TASKS', '500'))
+
+# Real-time task events streamed at /api/async/tasks/events/ (see tasks/events.py).
+# The in-process backend only reaches clients connected to the same process; with
+# several processes or nodes use 'tasks.events.RedisEventBackend' (needs REDIS_URL).
+TASK_EVENTS = {
+    'ENABLED': os.environ.get('TASK_EVENTS_ENABLED', 'True') == 'True',
+    'BACKEND': os.environ.get('TASK_EVENTS_BACKEND', 'tasks.events.InProcessEventBackend'),
+    'OPTIONS': {
+        'backlog': int(os.environ.get('TASK_EVENTS_BACKLOG', '1000')), # Events kept per user for resuming clients
+        'url': os.environ.get('REDIS_URL'),
+    },
+    'TICKET_SECONDS': int(os.environ.get('TASK_EVENTS_TICKET_SECONDS', '30')), # Stream tickets (see tasks/async_views.py)
+}
+
+# Overdue / due-soon digests served at /api/tasks/digest/ (see tasks/digests.py),
+# rebuilt by `manage.py build_task_digests` (run it daily, e.g. from cron).
+TASK_DIGESTS = {
+    'DUE_SOON_DAYS': int(os.environ.get('TASK_DIGESTS_DUE_SOON_DAYS', '7')), # "Due soon" = due within this many days
+    'MAX_ITEMS': int(os.environ.get('TASK_DIGESTS_MAX_ITEMS', '20')), # Tasks listed per section; counts cover all
+    'CHUNK_SIZE': int(os.environ.get('TASK_DIGESTS_CHUNK_SIZE', '5000')), # User ids per chunk
+    'WORKERS': int(os.environ.get('TASK_DIGESTS_WORKERS', '1')), # Processes; >1 needs PostgreSQL
+    'TIME_BUDGET_SECONDS': float(os.environ.get('TASK_DIGESTS_TIME_BUDGET_SECONDS', '600')), # A slower run fails
+}
+
+# Archival of old completed / cancelled tasks (see tasks/archive.py and the
+# `archive_tasks` command). Archived tasks leave `/api/tasks/` and are listed again
+# with `?include_archived=true`.
+TASK_ARCHIVE = {
+    'AFTER_DAYS': int(os.environ.get('TASK_ARCHIVE_AFTER_DAYS', '180')), # Closed and unchanged for this long
+    'BATCH_SIZE': int(os.environ.get('TASK_ARCHIVE_BATCH_SIZE', '1000')), # Tasks moved per transaction
+}
+
+# Workspace access (see users/workspaces.py): the ids of each user's workspaces are
+# cached until one of their memberships changes, at most CACHE_TIMEOUT seconds. The
+# ids decide access, so CACHE_ALIAS must name a cache every process shares: without
+# REDIS_URL it is None and the ids are looked up once per request instead.
+WORKSPACES = {
+    'CACHE_ALIAS': 'default' if os.environ.get('REDIS_URL') else None,
+    'CACHE_TIMEOUT': int(os.environ.get('WORKSPACES_CACHE_TIMEOUT', '300')),
+}
+
+# Subtasks (see `Task.parent`). MAX_DEPTH bounds how deep tasks nest (a top-level
+# task is depth 0); MAX_NEST bounds `?nest=` on the task list.
+TASK_HIERARCHY = {
+    'MAX_DEPTH': int(os.environ.get('TASK_HIERARCHY_MAX_DEPTH', '10')),
+    'MAX_NEST': int(os.environ.get('TASK_HIERARCHY_MAX_NEST', '3')),
+}
+
+# Recurring tasks (see `TaskRecurrence`). MAX_COUNT bounds COUNT= in a rule;
+# digests list the missed occurrences of the last DIGEST_OVERDUE_DAYS days as overdue
+# (older ones are left out rather than piling up).
+TASK_RECURRENCE = {
+    'MAX_COUNT': int(os.environ.get('TASK_RECURRENCE_MAX_COUNT', '1000')),
+    'DIGEST_OVERDUE_DAYS': int(os.environ.get('TASK_RECURRENCE_DIGEST_OVERDUE_DAYS', '7')),
+}
+
+# Background jobs (see tasks/jobs.py), run by `python manage.py run_workers`.
+# More than one worker process needs PostgreSQL: SQLite can't lock rows.
+JOBS = {
+    'PROCESSES': int(os.environ.get('JOBS_PROCESSES', '1')), # Worker processes
+    'THREADS': int(os.environ.get('JOBS_THREADS', '4')), # Threads running jobs in each process
+    'BATCH_SIZE': int(os.environ.get('JOBS_BATCH_SIZE', '20')), # Jobs claimed per query
+    'POLL_INTERVAL_SECONDS': float(os.environ.get('JOBS_POLL_INTERVAL_SECONDS', '1')), # Idle wait between claims
+    'LEASE_SECONDS': int(os.environ.get('JOBS_LEASE_SECONDS', '300')), # A claimed job runs again after this
+    'MAX_ATTEMPTS': int(os.environ.get('JOBS_MAX_ATTEMPTS', '5')), # Then the job is marked failed
+    'BACKOFF_SECONDS': float(os.environ.get('JOBS_BACKOFF_SECONDS', '10')), # Doubles after every failure
+    'BACKOFF_MAX_SECONDS': float(os.environ.get('JOBS_BACKOFF_MAX_SECONDS', '3600')),
+    # Dotted paths of jobs queued on every task create, update and delete.
+    'TASK_WRITE_JOBS': [],
+}
+
+# Per-endpoint request metrics, served in the Prometheus format at /metrics
+# (see backend/metrics.py). The scraper must send `Authorization: Bearer <token>`
+# with METRICS_AUTH_TOKEN; without a token /metrics answers 404.
+METRICS = {
+    'ENABLED': os.environ.get('METRICS_ENABLED', 'True') == 'True',
+    'AUTH_TOKEN': os.environ.get('METRICS_AUTH_TOKEN', ''),
+    'SLOW_REQUEST_MS': float(os.environ.get('METRICS_SLOW_REQUEST_MS', '500')), # Slower requests are logged with their SQL
+    'SLOW_REQUEST_SAMPLE_RATE': float(os.environ.get('METRICS_SLOW_REQUEST_SAMPLE_RATE', '1.0')), # Fraction of them logged
+    'MAX_SAMPLED_QUERIES': int(os.environ.get('METRICS_MAX_SAMPLED_QUERIES', '50')), # SQL statements kept per request
 }
 
 # Simple JWT settings
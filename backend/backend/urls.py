@@ -3,6 +3,8 @@
 from django.contrib import admin
 from django.urls import path, include # Import include for including other url configs
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls), # Django Admin interface
 
@@ -11,4 +13,6 @@ urlpatterns = [
     # and all URLs defined in tasks/urls.py will start with 'api/tasks/'.
         path('api/', include('users.urls')), # Include user authentication URLs
         path('api/', include('tasks.urls')), # Include task management URLs
+        path('api/async/', include('tasks.async_urls')), # Native async task endpoints (best served over ASGI)
+        path('metrics', metrics_view, name='metrics'), # Prometheus scrape endpoint (see backend/metrics.py)
     ]
\ No newline at end of file
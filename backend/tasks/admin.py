@@ -1,3 +1,57 @@
+# backend/tasks/admin.py
+
 from django.contrib import admin
+from .models import ArchivedTask, Job, Task, TaskRecurrence
+
+# TaskAdmin
+# Admin changelist for tasks.
+# `Task.__str__` and the `user` column both read `user.username`, so the owner is
+# joined in the changelist query instead of being fetched once per row.
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['title', 'user', 'status', 'due_date', 'created_at']
+    list_filter = ['status']
+    search_fields = ['title']
+    list_select_related = ['user']
+    # Use plain ID inputs for the owner, workspace and parent task instead of
+    # rendering every user, workspace or task in a <select>.
+    raw_id_fields = ['user', 'workspace', 'parent']
+
+
+# TaskRecurrenceAdmin
+# Recurring tasks. The rule is checked and normalized as in the API, and `ends_on`
+# recomputed from it on save.
+@admin.register(TaskRecurrence)
+class TaskRecurrenceAdmin(admin.ModelAdmin):
+    list_display = ['title', 'user', 'rule', 'starts_on', 'ends_on', 'created_at']
+    search_fields = ['title']
+    list_select_related = ['user']
+    raw_id_fields = ['user', 'workspace']
+    readonly_fields = ['ends_on']
+
+
+# ArchivedTaskAdmin
+# Read-only view of the archive: rows are only written by `archive_tasks`.
+@admin.register(ArchivedTask)
+class ArchivedTaskAdmin(admin.ModelAdmin):
+    list_display = ['title', 'user', 'status', 'due_date', 'created_at', 'archived_at']
+    list_filter = ['status']
+    search_fields = ['title']
+    list_select_related = ['user']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# JobAdmin
+# Queued and failed background jobs (see tasks/jobs.py). A failed job can be
+# retried by setting it back to queued with `run_at` in the past.
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'max_attempts', 'run_at', 'created_at']
+    list_filter = ['status', 'name']
+    readonly_fields = ['created_at', 'last_error']
 
-# Register your models here.
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        # Register the Task signal handlers (cache invalidation and friends).
+        from . import signals  # noqa: F401
+        # Install the request metrics' query wrapper (backend/metrics.py) on every
+        # database connection, including ones opened before the first request.
+        import backend.metrics  # noqa: F401
@@ -0,0 +1,55 @@
+# backend/tasks/archive.py
+
+# Archival of old completed / cancelled tasks.
+#
+# Closed tasks (`CLOSED_STATUSES`) that haven't changed for `TASK_ARCHIVE['AFTER_DAYS']`
+# are moved from `tasks_task` to `tasks_archivedtask`, so the live table (and the
+# `(user, created_at)` scans behind the task list, the stats and the sync queries)
+# only holds tasks people still work with. Tasks are moved in batches of ids in
+# ascending order, one transaction per batch: an interrupted run loses nothing and
+# the next run (or `archive_tasks --after-id`) carries on where it stopped.
+#
+# Each batch copies the rows with a single `INSERT ... SELECT` and then deletes them
+# through `Task.objects`, so the usual delete bookkeeping runs: tombstones for delta
+# sync, `TaskStats` counters, list cache invalidation and `task.deleted` events.
+
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import ArchivedTask, Task
+
+# Columns copied as they are from the live table to the archive.
+ARCHIVED_COLUMNS = [
+    'id', 'user_id', 'title', 'description', 'due_date', 'status', 'created_at', 'updated_at', 'search_vector',
+    'version', 'parent_id', 'path', 'workspace_id', 'recurrence_id', 'occurrence_date',
+]
+
+
+# Moves up to `batch_size` closed tasks last updated before `cutoff` with an id
+# greater than `after_id` to the archive. Returns the ids moved, in ascending order.
+def archive_batch(cutoff, batch_size, after_id=0):
+    with transaction.atomic():
+        # Rows locked by a concurrent edit are left for the next run.
+        ids = list(
+            Task.objects.filter(status__in=Task.CLOSED_STATUSES, updated_at__lt=cutoff, id__gt=after_id)
+            # Deleting a task deletes its subtasks: only leaves move, parents follow
+            # once their subtasks have been archived.
+            .exclude(Exists(Task.objects.filter(parent=OuterRef('pk'))))
+            .order_by('id')
+            .select_for_update(skip_locked=True)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        columns = ', '.join(connection.ops.quote_name(column) for column in ARCHIVED_COLUMNS)
+        placeholders = ', '.join(['%s'] * len(ids))
+        archived_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {ArchivedTask._meta.db_table} ({columns}, archived_at) '
+                f'SELECT {columns}, %s FROM {Task._meta.db_table} WHERE id IN ({placeholders})',
+                [archived_at, *ids],
+            )
+        Task.objects.filter(pk__in=ids).delete()
+    return ids
@@ -0,0 +1,20 @@
+# backend/tasks/async_urls.py
+
+from django.urls import path
+from .async_views import task_list_create, task_detail, task_events, task_events_ticket
+
+# Async task endpoints, included under 'api/async/' in backend/urls.py.
+# They mirror the sync endpoints in tasks/urls.py; see tasks/async_views.py.
+urlpatterns = [
+    # GET lists the user's tasks (cursor paginated), POST creates a task.
+    path('tasks/', task_list_create, name='async-task-list-create'),
+
+    # GET streams the user's task changes as Server-Sent Events.
+    path('tasks/events/', task_events, name='async-task-events'),
+
+    # POST returns a short-lived ticket for opening the event stream.
+    path('tasks/events/ticket/', task_events_ticket, name='async-task-events-ticket'),
+
+    # GET/PUT/PATCH/DELETE a single task by its ID.
+    path('tasks/<int:pk>/', task_detail, name='async-task-detail'),
+]
@@ -0,0 +1,295 @@
+# backend/tasks/async_views.py
+
+# Native async versions of the task list, create and detail endpoints.
+#
+# DRF's generic views are synchronous, so under ASGI every request to them is
+# handed to a worker thread via `sync_to_async`. These views are plain Django
+# `async def` views that use the async ORM (`aget`, `acreate`, `asave`, `adelete`
+# and `async for`), so a single ASGI worker can keep many slow clients in flight
+# without tying up a thread per request. They are mounted under `/api/async/`
+# (see backend/urls.py) and accept the same JWT bearer tokens and the same task
+# fields as `/api/tasks/`; responses are rendered with DRF's JSON renderer using
+# `TaskSerializer`, so the payloads match the sync endpoints.
+#
+# Differences from the sync endpoints:
+# - the list always uses keyset (cursor) pagination and returns `next`/`results`;
+# - no conditional GETs or page cache; updates do honour `If-Match`.
+#
+# `task_events` streams the user's task changes as Server-Sent Events. It holds
+# its connection open indefinitely, so it must be served by an ASGI server (e.g.
+# uvicorn); under WSGI every open stream would occupy a worker. Browsers open it
+# with a stream ticket rather than their access token (see `task_events_ticket`).
+
+import asyncio
+import base64
+import json
+from functools import wraps
+from types import SimpleNamespace
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from users.authentication import aauthenticate
+from users.workspaces import workspace_ids
+from .events import get_event_backend, user_channel, workspace_channel
+from .filters import TaskFilterBackend
+from .models import Task
+from .pagination import TaskCursorPagination
+from .serializers import TaskSerializer
+from .views import update_task
+
+
+def _json_response(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+# A DRF `Response` built by code shared with the sync views, as a plain response.
+def _api_response(response):
+    rendered = _json_response(response.data, status=response.status_code)
+    for header in ('ETag', 'Last-Modified'):
+        if header in response:
+            rendered[header] = response[header]
+    return rendered
+
+
+# async_api_view
+# Decorator giving an async view the bits of DRF behaviour it needs: allowed
+# methods, JWT authentication (the view sees `request.user`), no CSRF check (the
+# API uses bearer tokens, not cookies), and 400/401 JSON error responses.
+# With `allow_ticket`, a stream ticket (see `task_events_ticket`) may be sent as
+# `?ticket=...` instead, for clients such as the browser's `EventSource` that can't
+# set request headers. Access tokens are never accepted in the query string: URLs
+# end up in access logs, browser history and Referer headers.
+def async_api_view(methods, allow_ticket=False):
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return _json_response({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+            try:
+                if allow_ticket and 'HTTP_AUTHORIZATION' not in request.META and request.GET.get('ticket'):
+                    user = await _ticket_user(request.GET['ticket'])
+                else:
+                    user = await aauthenticate(request)
+            except AuthenticationFailed as exc:
+                return _json_response(exc.detail, status=exc.status_code)
+            if user is None:
+                return _json_response({'detail': 'Authentication credentials were not provided.'}, status=401)
+            request.user = user
+            try:
+                return await view(request, *args, **kwargs)
+            except ValidationError as exc:
+                return _json_response(exc.detail, status=400)
+        return wrapper
+    return decorator
+
+
+# Stream tickets
+# A ticket is the user's id signed with a salt of its own, so it opens the event
+# stream and nothing else (it is no access token), and only for
+# `TASK_EVENTS['TICKET_SECONDS']` after it was issued.
+STREAM_TICKET_SALT = 'tasks.events.ticket'
+
+
+def issue_stream_ticket(user):
+    return signing.TimestampSigner(salt=STREAM_TICKET_SALT).sign(str(user.pk))
+
+
+async def _ticket_user(ticket):
+    try:
+        user_id = signing.TimestampSigner(salt=STREAM_TICKET_SALT).unsign(
+            ticket, max_age=settings.TASK_EVENTS['TICKET_SECONDS'],
+        )
+        return await get_user_model().objects.aget(pk=int(user_id), is_active=True)
+    except (signing.BadSignature, ValueError, get_user_model().DoesNotExist):
+        raise AuthenticationFailed({'detail': 'Invalid or expired stream ticket.'})
+
+
+def _parse_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ValidationError({'detail': 'JSON parse error.'})
+    if not isinstance(data, dict):
+        raise ValidationError({'detail': 'Expected a JSON object.'})
+    return data
+
+
+# The tasks the user can see (see `TaskQuerySet.visible_to`). The workspace ids
+# may need a database read, which has to happen in a thread.
+async def _user_tasks(request):
+    ids = await sync_to_async(workspace_ids)(request.user)
+    return TaskSerializer.setup_queryset(Task.objects.visible_to(request.user, workspace_ids=ids))
+
+
+# Keyset cursors for the async list: an opaque token holding the (created_at, id)
+# of the last task on the previous page.
+def _encode_cursor(task):
+    return base64.urlsafe_b64encode(f'{task.created_at.isoformat()}|{task.pk}'.encode()).decode()
+
+
+def _decode_cursor(value):
+    try:
+        created_at, task_id = base64.urlsafe_b64decode(value.encode()).decode().split('|')
+        created_at, task_id = parse_datetime(created_at), int(task_id)
+    except (ValueError, UnicodeDecodeError):
+        created_at = None
+    if created_at is None:
+        raise ValidationError({'cursor': 'Invalid cursor'})
+    return created_at, task_id
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('page_size', api_settings.PAGE_SIZE))
+    except ValueError:
+        size = api_settings.PAGE_SIZE
+    return max(1, min(size, TaskCursorPagination.max_page_size))
+
+
+# GET /api/async/tasks/  - list the user's tasks, newest first (cursor paginated).
+#   Accepts the same filters as /api/tasks/ (status, due_after, due_before,
+#   overdue, search), plus `cursor` and `page_size`.
+# POST /api/async/tasks/ - create a task for the user.
+@async_api_view(['GET', 'POST'])
+async def task_list_create(request):
+    if request.method == 'POST':
+        serializer = TaskSerializer(data=_parse_body(request), context={'request': request})
+        # Validation reads the database (the parent, the workspace), so it runs in a thread.
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        task = await Task.objects.acreate(user=request.user, **serializer.validated_data)
+        return _json_response(TaskSerializer(task).data, status=201)
+
+    # The filter backend only reads `query_params`, so the plain Django request
+    # is adapted rather than wrapped in a full DRF Request.
+    queryset = TaskFilterBackend().filter_queryset(
+        SimpleNamespace(query_params=request.GET), await _user_tasks(request), None
+    )
+    if request.GET.get('cursor'):
+        created_at, task_id = _decode_cursor(request.GET['cursor'])
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=task_id))
+    page_size = _page_size(request)
+    tasks = [task async for task in queryset.order_by('-created_at', '-id')[:page_size + 1]]
+
+    next_url = None
+    if len(tasks) > page_size:
+        tasks = tasks[:page_size]
+        params = request.GET.copy()
+        params['cursor'] = _encode_cursor(tasks[-1])
+        next_url = request.build_absolute_uri(f'{request.path}?{urlencode(params, doseq=True)}')
+    return _json_response({'next': next_url, 'results': TaskSerializer(tasks, many=True).data})
+
+
+# GET/PUT/PATCH/DELETE /api/async/tasks/<pk>/ - one of the user's tasks.
+# Tasks the user can't see are reported as not found, as in `TaskDetailView`.
+# Updates go through `update_task`, as in `TaskDetailView`: only changed fields are
+# written, checked against the version read, and `If-Match` gives 412 on a stale
+# version. That path reads and writes in one transaction, so it runs in a thread.
+@async_api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
+async def task_detail(request, pk):
+    tasks = await _user_tasks(request)
+    try:
+        if request.method in ('PUT', 'PATCH'):
+            response = await sync_to_async(update_task)(
+                request, lambda: tasks.get(pk=pk), _parse_body(request), request.method == 'PATCH',
+                {'request': request},
+            )
+            return _api_response(response)
+        task = await tasks.aget(pk=pk)
+    except Task.DoesNotExist:
+        return _json_response({'detail': 'No Task matches the given query.'}, status=404)
+
+    if request.method == 'DELETE':
+        await task.adelete()
+        return HttpResponse(status=204)
+    return _json_response(TaskSerializer(task).data)
+
+
+# Seconds between keep-alive comments on an idle event stream, so proxies and load
+# balancers don't drop the connection.
+EVENT_STREAM_HEARTBEAT = 15
+
+
+def _last_event_id(request):
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({'last_event_id': 'Invalid event id'})
+
+
+def _format_event(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['task'])}\n\n"
+
+
+# Turns the backend's subscription into SSE text, with a comment line whenever the
+# stream has been idle for `heartbeat` seconds. The pending read is kept across
+# heartbeats rather than cancelled, since cancelling it would close the subscription.
+async def _event_stream(subscription, heartbeat):
+    pending = None
+    try:
+        # Ask browsers to reconnect after 3s if the connection drops.
+        yield 'retry: 3000\n\n'
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(subscription))
+            done, _ = await asyncio.wait({pending}, timeout=heartbeat)
+            if not done:
+                yield ': keep-alive\n\n'
+                continue
+            event, pending = pending.result(), None
+            yield _format_event(event)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, StopAsyncIteration):
+                pass
+        await subscription.aclose()
+
+
+# GET /api/async/tasks/events/ - stream the changes to the tasks the user can see
+#   (their own, and those shared in their workspaces) as Server-Sent Events.
+#   Each event has the event id, the type (`task.created`, `task.updated`,
+#   `task.deleted` or `reset`) and the task as JSON (only `{"id": ...}` for deletes).
+#   Reconnecting clients send the last id they saw as the `Last-Event-ID` header
+#   (browsers do this automatically) or `?last_event_id=`, and get the events they
+#   missed; a `reset` event means too many were missed and the list should be
+#   refetched. Browsers authenticate with `?ticket=` (see `task_events_ticket`).
+@async_api_view(['GET'], allow_ticket=True)
+async def task_events(request):
+    ids = await sync_to_async(workspace_ids)(request.user)
+    channels = [user_channel(request.user.pk), *(workspace_channel(workspace_id) for workspace_id in ids)]
+    subscription = get_event_backend().subscribe(channels, _last_event_id(request))
+    response = StreamingHttpResponse(
+        _event_stream(subscription, EVENT_STREAM_HEARTBEAT), content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# POST /api/async/tasks/events/ticket/ - a ticket for opening the event stream
+#   without an Authorization header: `{"ticket": "...", "expires_in": <seconds>}`.
+#   Pass it as `?ticket=` right away; a client that reconnects later asks for a new
+#   one (and sends `?last_event_id=` to resume).
+@async_api_view(['POST'])
+async def task_events_ticket(request):
+    return _json_response({
+        'ticket': issue_stream_ticket(request.user), 'expires_in': settings.TASK_EVENTS['TICKET_SECONDS'],
+    })
@@ -0,0 +1,128 @@
+# backend/tasks/benchmarking.py
+
+# Small helpers shared by the benchmark management commands.
+# They seed large numbers of tasks quickly and time repeated calls, so the
+# commands themselves only need to describe what is being measured.
+
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.utils import timezone
+
+from users.workspaces import cache_no_workspace_ids
+from .models import Task
+
+User = get_user_model()
+
+
+# Temporarily turn off `auto_now_add` / `auto_now` on the Task timestamps.
+# Seeded tasks need distinct, spread-out `created_at` values to look like a real
+# backlog; otherwise `bulk_create` stamps every row of a batch with "now".
+@contextmanager
+def explicit_timestamps():
+    fields = [Task._meta.get_field('created_at'), Task._meta.get_field('updated_at')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+# Create (or reuse) a benchmark user by username.
+def get_bench_user(username):
+    user, _ = User.objects.get_or_create(username=username, defaults={'email': f'{username}@example.com'})
+    return user
+
+
+# Create (or reuse) `count` benchmark users named `<prefix>_0`, `<prefix>_1`, ...,
+# all with `password`, and top each one up to `tasks_per_user` tasks.
+# The password is hashed once and the users are inserted with one `bulk_create`,
+# so seeding many users doesn't pay the (deliberately slow) hasher per user.
+def seed_users(prefix, count, tasks_per_user, password):
+    usernames = [f'{prefix}_{i}' for i in range(count)]
+    existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+    encoded = make_password(password)
+    User.objects.bulk_create([
+        User(username=username, email=f'{username}@example.com', password=encoded)
+        for username in usernames if username not in existing
+    ])
+    users = list(User.objects.filter(username__in=usernames).order_by('id'))
+    # As registration does (`bulk_create` sends no `post_save`).
+    for user in users:
+        if user.username not in existing:
+            cache_no_workspace_ids(user.pk)
+    for user in users:
+        missing = tasks_per_user - Task.objects.filter(user=user).count()
+        if missing > 0:
+            seed_tasks(user, missing)
+    return users
+
+
+# Seed `count` tasks for `user` using `bulk_create` in batches.
+# Tasks are spaced one second apart going back in time, cycling through every status.
+def seed_tasks(user, count, batch_size=5000):
+    statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+    now = timezone.now()
+    today = now.date()
+    with explicit_timestamps():
+        for start in range(0, count, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, count)):
+                created = now - timedelta(seconds=i)
+                batch.append(Task(
+                    user=user,
+                    title=f'Benchmark task {i}',
+                    description=f'Seeded task number {i} for benchmarking.',
+                    due_date=today + timedelta(days=(i % 60) - 30),
+                    status=statuses[i % len(statuses)],
+                    created_at=created,
+                    updated_at=created,
+                ))
+            Task.objects.bulk_create(batch, batch_size=batch_size)
+
+
+# Call `func` `repeat` times and return timing statistics in milliseconds.
+def time_call(func, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        'min_ms': min(samples),
+        'median_ms': statistics.median(samples),
+        'max_ms': max(samples),
+    }
+
+
+# The value at `percent` (0-100) of an already sorted list (nearest rank).
+def percentile(sorted_values, percent):
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+# Counts the queries run on the default connection while the block is active.
+@contextmanager
+def count_queries():
+    counter = {'queries': 0}
+
+    def wrapper(execute, sql, params, many, context):
+        counter['queries'] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield counter
+
+
+# Background job used by `benchmark_jobs`: optionally sleeps to stand in for I/O.
+def sleep_job(ms=0):
+    if ms:
+        time.sleep(ms / 1000)
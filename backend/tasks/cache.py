@@ -0,0 +1,167 @@
+# backend/tasks/cache.py
+
+# Per-user cache of serialized task list pages.
+#
+# List reads far outnumber writes, so a page of `/api/tasks/` is cached under a key
+# made of the user's id, the user's current "list version" and the request's path
+# and query string. Any write to one of the user's tasks bumps that version, which
+# makes every cached page of the user unreachable at once (they then expire on
+# their own). Nothing ever has to find and delete individual entries.
+# The version is bumped in the cache of the process that handled the write, so the
+# cache must be shared by every process (Redis): with the per-process local-memory
+# backend, other web workers would keep serving the old page, and answering its
+# ETag with 304, for up to TIMEOUT seconds. The cache is therefore only enabled by
+# default when REDIS_URL is set.
+# Lists also show the tasks of the user's workspaces (see users/workspaces.py), so
+# each workspace has a list version too, bumped by writes to its tasks, and the key
+# covers the versions of all of the user's workspaces (read with one `get_many`).
+#
+# Settings (see `TASKS_LIST_CACHE` in settings.py):
+#   ENABLED          turn the cache on (default: only with REDIS_URL)
+#   ALIAS            which entry of `CACHES` to use
+#   TIMEOUT          seconds a page stays cached
+#   MAX_ENTRY_BYTES  pages larger than this are not cached
+# The total size bound is the cache backend's own (`MAX_ENTRIES` for the
+# local-memory backend, `maxmemory` for Redis).
+
+import hashlib
+import pickle
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from users import workspaces
+
+# Hit/miss counters for this process, see `cache_stats()`.
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'oversized': 0}
+
+
+def _config():
+    return settings.TASKS_LIST_CACHE
+
+
+def _cache():
+    return caches[_config()['ALIAS']]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+# Returns a snapshot of this process's counters (hits, misses, stores, oversized).
+def cache_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def _version_key(user_id):
+    return f'tasks:list-version:{user_id}'
+
+
+def _workspace_version_key(workspace_id):
+    return f'tasks:list-version:workspace:{workspace_id}'
+
+
+# The current versions stored under `keys`, in one cache round trip.
+# A missing version (never set, or evicted) starts from the current time in
+# milliseconds, so it never repeats a version that older cached pages may still use.
+def _get_versions(keys):
+    cache = _cache()
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump_version(key):
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The version was evicted; starting a new one invalidates just the same.
+        cache.set(key, int(time.time() * 1000), timeout=None)
+
+
+# The current list version for a user.
+def get_list_version(user_id):
+    return _get_versions([_version_key(user_id)])[0]
+
+
+def bump_list_version(user_id):
+    _bump_version(_version_key(user_id))
+
+
+def bump_workspace_list_version(workspace_id):
+    _bump_version(_workspace_version_key(workspace_id))
+
+
+# Invalidate a user's cached pages, and those of every member of the given
+# workspaces (None entries, for private tasks, are skipped), once the current
+# transaction commits. Bumping before commit would let a concurrent reader cache
+# the old rows under the new version.
+def invalidate_task_lists(user_id, workspace_ids=()):
+    if _config()['ENABLED']:
+        workspace_ids = {workspace_id for workspace_id in workspace_ids if workspace_id is not None}
+
+        def bump():
+            bump_list_version(user_id)
+            for workspace_id in workspace_ids:
+                bump_workspace_list_version(workspace_id)
+
+        transaction.on_commit(bump)
+
+
+# TaskListCache
+# The cache entry for one list request. The version is read once, when the object
+# is created and before the database is queried, so a page computed from rows that
+# are being changed concurrently is stored under a version that is about to be
+# replaced, never under the new one.
+class TaskListCache:
+    def __init__(self, request):
+        self.enabled = _config()['ENABLED']
+        if self.enabled:
+            user_id = request.user.pk
+            keys = [_version_key(user_id)] + [
+                _workspace_version_key(workspace_id) for workspace_id in workspaces.workspace_ids(request.user)
+            ]
+            # The workspace ids are part of the key too: joining or leaving one
+            # changes which tasks the list shows.
+            versions = '|'.join(f'{key}={version}' for key, version in zip(keys, _get_versions(keys)))
+            key_hash = hashlib.md5(
+                f'{versions}|{request.get_full_path()}'.encode(), usedforsecurity=False
+            ).hexdigest()
+            self.key = f'tasks:list:{user_id}:{key_hash}'
+
+    # Returns `(data, etag, last_modified)` for a cached page, or None.
+    def get(self):
+        if not self.enabled:
+            return None
+        payload = _cache().get(self.key)
+        if payload is None:
+            _count('misses')
+            return None
+        _count('hits')
+        return pickle.loads(payload)
+
+    def set(self, data, etag, last_modified):
+        if not self.enabled:
+            return
+        payload = pickle.dumps((data, etag, last_modified), protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > _config()['MAX_ENTRY_BYTES']:
+            _count('oversized')
+            return
+        _cache().set(self.key, payload, timeout=_config()['TIMEOUT'])
+        _count('stores')
@@ -0,0 +1,93 @@
+# backend/tasks/conditional.py
+
+# Conditional GET support (ETag / Last-Modified) for the task endpoints.
+# A client that already has the current version of a list or task sends back the
+# validators it was given (`If-None-Match` / `If-Modified-Since`) and gets an empty
+# 304 Not Modified instead of the full payload.
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_etags
+
+from .models import TaskTombstone, visible_tasks_q
+
+
+# Validators for a user's task list.
+# The list changes whenever a task is created, updated or deleted, which always
+# moves at least one of: the latest `updated_at`, the latest tombstone, or the
+# row count. The request path and query string are part of the ETag because
+# different filters and pages of the same list are different representations.
+# A list showing the occurrences of recurring tasks passes their `series` too: any
+# write to a series changes their count or latest `updated_at` the same way.
+def task_list_validators(request, queryset, series=None):
+    stats = queryset.order_by().aggregate(latest=Max('updated_at'), count=Count('id'))
+    latest_deletion = (
+        TaskTombstone.objects.filter(visible_tasks_q(request.user)).aggregate(latest=Max('deleted_at'))['latest']
+    )
+    series_stats = {'latest': None, 'count': None}
+    if series is not None:
+        series_stats = series.order_by().aggregate(latest=Max('updated_at'), count=Count('id'))
+    last_modified = max(
+        (value for value in (stats['latest'], latest_deletion, series_stats['latest']) if value), default=None,
+    )
+    etag = _make_etag(
+        request.user.pk,
+        stats['count'],
+        stats['latest'] and stats['latest'].isoformat(),
+        latest_deletion and latest_deletion.isoformat(),
+        series_stats['count'],
+        series_stats['latest'] and series_stats['latest'].isoformat(),
+        request.get_full_path(),
+    )
+    return etag, last_modified
+
+
+# Validators for a single task. The ETag is the task's version, which every write
+# increments, so a client can also send it back in `If-Match` to make an update or
+# delete conditional on the task being unchanged (see `if_match_versions`).
+def task_detail_validators(task):
+    return f'"{task.version}"', task.updated_at
+
+
+# The task versions a write is conditional on, from the `If-Match` header: None
+# when there is no header or it is `*` (any version), else the set of versions it
+# lists. Weak (`W/`) and unknown tags never match, as `If-Match` requires.
+def if_match_versions(request):
+    header = request.headers.get('If-Match')
+    if header is None:
+        return None
+    etags = parse_etags(header)
+    if etags == ['*']:
+        return None
+    return {int(etag[1:-1]) for etag in etags if etag[1:-1].isdigit() and etag.startswith('"')}
+
+
+def _make_etag(*parts):
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+
+# Returns a 304 response if the client's cached copy is still current, else None.
+def not_modified_response(request, etag, last_modified):
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        _set_validator_headers(response, etag, last_modified)
+    return response
+
+
+# Adds the validators to a full (200) response.
+# `no-cache` makes browsers revalidate with us on every use rather than serve a
+# possibly stale copy; `private` keeps shared caches from storing per-user lists.
+def add_validator_headers(response, etag, last_modified):
+    _set_validator_headers(response, etag, last_modified)
+    return response
+
+
+def _set_validator_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
@@ -0,0 +1,99 @@
+# backend/tasks/digests.py
+
+# Overdue / due-soon task digests, stored in `TaskDigest` and served by
+# `/api/tasks/digest/`.
+#
+# Digests are built for a range of user ids at a time (a "chunk"), never per user:
+# one query reads every open task of the chunk's users that is overdue or due within
+# `DUE_SOON_DAYS`, already cut down to the first `MAX_ITEMS` per user and section and
+# carrying each section's total (window functions, served by the partial index
+# `task_open_due_idx`). The digests are then upserted and those of users in the range
+# who no longer have anything due are deleted: three statements per chunk whatever
+# the number of users in it. Chunks are independent, so `build_task_digests` can
+# spread them over a process pool.
+# The unsaved occurrences of the users' recurring tasks are expanded for the same
+# dates (see tasks/occurrences.py), two more queries per chunk, and merged in; the
+# overdue ones only go back `TASK_RECURRENCE['DIGEST_OVERDUE_DAYS']` days.
+
+import heapq
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import BooleanField, Case, Count, F, Max, Min, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .models import Task, TaskDigest
+from .occurrences import digest_occurrences
+
+User = get_user_model()
+
+
+# The digest for `today`'s date of every user with an id in [start_id, end_id).
+# Returns (number of digests written, number of tasks listed in them).
+def build_digest_chunk(start_id, end_id, today):
+    config = settings.TASK_DIGESTS
+    horizon = today + timedelta(days=config['DUE_SOON_DAYS'])
+    section = (F('user_id'), F('is_overdue'))
+    rows = (
+        Task.objects.filter(user_id__gte=start_id, user_id__lt=end_id, due_date__lte=horizon)
+        .exclude(status__in=Task.CLOSED_STATUSES)
+        .annotate(
+            is_overdue=Case(When(due_date__lt=today, then=Value(True)), default=Value(False), output_field=BooleanField()),
+        )
+        .annotate(
+            position=Window(RowNumber(), partition_by=section, order_by=(F('due_date').asc(), F('id').asc())),
+            section_count=Window(Count('id'), partition_by=section),
+        )
+        .filter(position__lte=config['MAX_ITEMS'])
+        .order_by('user_id', 'is_overdue', 'position')
+        .values_list('user_id', 'is_overdue', 'section_count', 'id', 'title', 'due_date', 'status')
+    )
+
+    now = timezone.now()
+    digests = {}
+    for user_id, is_overdue, section_count, task_id, title, due_date, status in rows:
+        digest = digests.get(user_id)
+        if digest is None:
+            digest = digests[user_id] = TaskDigest(user_id=user_id, digest_date=today, generated_at=now)
+        item = {'id': task_id, 'title': title, 'due_date': due_date.isoformat(), 'status': status}
+        if is_overdue:
+            digest.overdue_count = section_count
+            digest.overdue.append(item)
+        else:
+            digest.due_soon_count = section_count
+            digest.due_soon.append(item)
+
+    overdue_since = today - timedelta(days=settings.TASK_RECURRENCE['DIGEST_OVERDUE_DAYS'])
+    occurrences = digest_occurrences(start_id, end_id, today, overdue_since, horizon, config['MAX_ITEMS'])
+    for user_id, sections in occurrences.items():
+        digest = digests.get(user_id)
+        if digest is None:
+            digest = digests[user_id] = TaskDigest(user_id=user_id, digest_date=today, generated_at=now)
+        for is_overdue, (count, items) in sections.items():
+            name = 'overdue' if is_overdue else 'due_soon'
+            setattr(digest, f'{name}_count', getattr(digest, f'{name}_count') + count)
+            # Tasks before occurrences due the same day.
+            merged = heapq.merge(getattr(digest, name), items, key=lambda item: (item['due_date'], item['id'] is None))
+            setattr(digest, name, list(islice(merged, config['MAX_ITEMS'])))
+
+    with transaction.atomic():
+        TaskDigest.objects.bulk_create(
+            digests.values(), update_conflicts=True, unique_fields=['user'],
+            update_fields=['digest_date', 'generated_at', 'overdue_count', 'due_soon_count', 'overdue', 'due_soon'],
+        )
+        # Users in the range whose digest wasn't just written have nothing due any more.
+        TaskDigest.objects.filter(user_id__gte=start_id, user_id__lt=end_id).exclude(generated_at=now).delete()
+    return len(digests), sum(len(d.overdue) + len(d.due_soon) for d in digests.values())
+
+
+# The [start, end) user id ranges covering every user, `chunk_size` ids each.
+def user_id_chunks(chunk_size):
+    bounds = User.objects.aggregate(first=Min('id'), last=Max('id'))
+    if bounds['first'] is None:
+        return []
+    return [(start, start + chunk_size) for start in range(bounds['first'], bounds['last'] + 1, chunk_size)]
+
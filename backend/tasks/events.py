@@ -0,0 +1,256 @@
+# backend/tasks/events.py
+
+# Real-time task change events.
+#
+# Every create, update and delete of a task is published as an event for the task's
+# owner and, for a task shared in a workspace, for the workspace's members. Clients
+# follow them over Server-Sent Events (`/api/async/tasks/events/`, see
+# `async_views.task_events`) instead of refetching the list to notice changes.
+#
+# Events are dicts:
+#   {"id": 1729..., "type": "task.created" | "task.updated" | "task.deleted", "task": {...}}
+# For deletes, "task" only holds the id. Event ids increase monotonically, so a
+# reconnecting client sends the last id it saw (`Last-Event-ID`) and receives what it
+# missed from a bounded backlog per channel. If the gap is larger than the backlog,
+# the client gets a single "reset" event and should resync (e.g. `/api/tasks/?since=...`).
+#
+# Events are published on channels: `user:<id>` for a task's owner, and
+# `workspace:<id>` for the workspace it is shared in. An event published on both
+# has one id, and a stream subscribed to both delivers it once. A stream subscribes
+# to the channels of its user's workspaces when it opens; after joining a workspace,
+# a client reconnects to follow it.
+#
+# Fan-out goes through a pluggable backend, chosen with `TASK_EVENTS['BACKEND']`:
+# - `InProcessEventBackend`: in-memory, for a single server process.
+# - `RedisEventBackend`: Redis pub/sub plus a capped list per channel as the backlog,
+#   for several processes or nodes. Requires the `redis` package.
+
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+RESET_EVENT_TYPE = 'reset'
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def workspace_channel(workspace_id):
+    return f'workspace:{workspace_id}'
+
+
+# The channels of a task's events: its owner's, and its workspace's if it is shared.
+def task_channels(user_id, workspace_id=None):
+    channels = [user_channel(user_id)]
+    if workspace_id is not None:
+        channels.append(workspace_channel(workspace_id))
+    return channels
+
+
+def _initial_event_id():
+    # Ids start from the current time in microseconds, so they keep increasing
+    # across restarts and clients never see an id go backwards.
+    return time.time_ns() // 1000
+
+
+# BaseEventBackend
+# Interface for event fan-out backends.
+class BaseEventBackend:
+    def __init__(self, backlog=1000, **options):
+        self.backlog = backlog
+
+    # Publish one event on each of `channels`. Called from synchronous code (signal
+    # handlers), usually after the database transaction has committed.
+    def publish(self, channels, event_type, task):
+        raise NotImplementedError
+
+    # Async iterator of the events of `channels`, each event once. Events after
+    # `last_event_id` still in the backlogs are replayed first (or a reset event is
+    # sent when some were lost).
+    async def subscribe(self, channels, last_event_id=None):
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+    # Helper for subclasses: the events to replay from the channels' `backlogs`
+    # (oldest first). Event ids are global, so a channel's ids have gaps and can't
+    # show by themselves whether something was missed. Instead: while a backlog isn't
+    # full nothing has been dropped from it; once it is full, a client whose last
+    # event is older than the oldest one held may have missed events, and is asked
+    # to resync.
+    def _replay(self, backlogs, last_event_id):
+        if last_event_id is None:
+            return []
+        events = {}
+        for backlog in backlogs:
+            if len(backlog) >= self.backlog and backlog[0]['id'] > last_event_id:
+                newest = max(held[-1]['id'] for held in backlogs if held)
+                return [{'id': newest, 'type': RESET_EVENT_TYPE, 'task': None}]
+            events.update((event['id'], event) for event in backlog if event['id'] > last_event_id)
+        return [events[event_id] for event_id in sorted(events)]
+
+
+# InProcessEventBackend
+# Keeps the backlog and the subscriber queues in this process's memory.
+# `publish` may be called from any thread; events are handed to each subscriber's
+# event loop with `call_soon_threadsafe`.
+class InProcessEventBackend(BaseEventBackend):
+    def __init__(self, backlog=1000, **options):
+        super().__init__(backlog=backlog, **options)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(_initial_event_id())
+        self._backlogs = defaultdict(lambda: deque(maxlen=self.backlog))
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channels, event_type, task):
+        subscribers = set()
+        with self._lock:
+            event = {'id': next(self._ids), 'type': event_type, 'task': task}
+            for channel in channels:
+                self._backlogs[channel].append(event)
+                subscribers.update(self._subscribers[channel])
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # The subscriber's event loop has already shut down.
+                pass
+        return event
+
+    async def subscribe(self, channels, last_event_id=None):
+        queue = asyncio.Queue()
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(subscriber)
+            replay = self._replay([list(self._backlogs[channel]) for channel in channels], last_event_id)
+        try:
+            newest = last_event_id or 0
+            for event in replay:
+                newest = max(newest, event['id'])
+                yield event
+            while True:
+                event = await queue.get()
+                # Skip anything already sent during the replay.
+                if event['id'] > newest:
+                    newest = event['id']
+                    yield event
+        finally:
+            with self._lock:
+                for channel in channels:
+                    self._subscribers[channel].discard(subscriber)
+
+
+# RedisEventBackend
+# Uses Redis so that every process and node sees every event:
+# - `INCR tasks:events:seq` hands out event ids,
+# - `tasks:events:backlog:<channel>` is a capped list holding the channel's latest events,
+# - `tasks:events:<channel>` (e.g. `tasks:events:user:12`) is the pub/sub channel live
+#   events are sent on. An event on several channels is sent on each, and
+#   subscribers skip the copies by id.
+class RedisEventBackend(BaseEventBackend):
+    def __init__(self, backlog=1000, url=None, **options):
+        super().__init__(backlog=backlog, **options)
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError as exc:
+            raise ImproperlyConfigured('RedisEventBackend requires the "redis" package.') from exc
+        self.url = url
+        if not self.url:
+            raise ImproperlyConfigured('RedisEventBackend requires a Redis URL (TASK_EVENTS OPTIONS "url", set from REDIS_URL).')
+        self._redis = redis.Redis.from_url(self.url)
+        self._async_redis_module = redis.asyncio
+
+    def publish(self, channels, event_type, task):
+        event_id = self._redis.incr('tasks:events:seq')
+        if event_id == 1:
+            # Fresh Redis: continue from a time-based id rather than restarting at 1.
+            event_id = self._redis.incrby('tasks:events:seq', _initial_event_id())
+        event = {'id': event_id, 'type': event_type, 'task': task}
+        message = json.dumps(event)
+        pipe = self._redis.pipeline()
+        for channel in channels:
+            pipe.rpush(f'tasks:events:backlog:{channel}', message)
+            pipe.ltrim(f'tasks:events:backlog:{channel}', -self.backlog, -1)
+            pipe.publish(f'tasks:events:{channel}', message)
+        pipe.execute()
+        return event
+
+    async def subscribe(self, channels, last_event_id=None):
+        client = self._async_redis_module.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        try:
+            # Subscribe before reading the backlogs, so nothing published in between is lost.
+            await pubsub.subscribe(*(f'tasks:events:{channel}' for channel in channels))
+            backlogs = [
+                [json.loads(raw) for raw in await client.lrange(f'tasks:events:backlog:{channel}', 0, -1)]
+                for channel in channels
+            ]
+            newest = last_event_id or 0
+            for event in self._replay(backlogs, last_event_id):
+                newest = max(newest, event['id'])
+                yield event
+            async for message in pubsub.listen():
+                if message['type'] != 'message':
+                    continue
+                event = json.loads(message['data'])
+                if event['id'] > newest:
+                    newest = event['id']
+                    yield event
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+# Returns the configured event backend (created once per process).
+def get_event_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = settings.TASK_EVENTS
+                backend_class = import_string(config['BACKEND'])
+                _backend = backend_class(**config.get('OPTIONS', {}))
+    return _backend
+
+
+# Forget the current backend, e.g. after settings change in tests.
+def reset_event_backend():
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+# Publish an event for the owner `user_id` of a task and, if it is shared, the
+# members of `workspace_id`.
+def publish_task_event(user_id, event_type, task, workspace_id=None):
+    if settings.TASK_EVENTS.get('ENABLED', True):
+        return get_event_backend().publish(task_channels(user_id, workspace_id), event_type, task)
+
+
+# Publish an event about `task` once the current transaction commits, so that
+# subscribers never see a change that is later rolled back. The payload is built
+# right away, while the instance still reflects the write.
+# Publishing failures (e.g. Redis being unreachable) are logged by `on_commit`
+# rather than failing a request whose write has already been committed.
+def queue_task_event(event_type, task):
+    if not settings.TASK_EVENTS.get('ENABLED', True):
+        return
+    from .serializers import TaskSerializer
+
+    payload = {'id': task.pk} if event_type == 'task.deleted' else dict(TaskSerializer(task).data)
+    user_id, workspace_id = task.user_id, task.workspace_id
+    transaction.on_commit(lambda: publish_task_event(user_id, event_type, payload, workspace_id), robust=True)
@@ -0,0 +1,53 @@
+# backend/tasks/export.py
+
+# Encoders for the task export (`TaskExportView`).
+# Each takes an iterator of tasks and yields encoded chunks of `chunk_size` rows, so
+# only one chunk is ever held in memory. Rows are produced by `TaskSerializer`, so
+# the exported values are exactly what `/api/tasks/` returns for the same task.
+
+import csv
+import io
+from itertools import islice
+
+from rest_framework.utils.encoders import JSONEncoder
+
+# format name: (content type, file extension)
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+}
+
+
+def _batches(tasks, chunk_size):
+    while True:
+        batch = list(islice(tasks, chunk_size))
+        if not batch:
+            return
+        yield batch
+
+
+def ndjson_chunks(tasks, serializer, chunk_size):
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for batch in _batches(tasks, chunk_size):
+        yield ''.join(encoder.encode(serializer.to_representation(task)) + '\n' for task in batch).encode()
+
+
+# CSV columns are the serializer's fields, in order; empty values are written as ''.
+def csv_chunks(tasks, serializer, chunk_size):
+    fields = list(serializer.fields)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    for batch in _batches(tasks, chunk_size):
+        writer.writerows(serializer.to_representation(task) for task in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # No tasks at all: still send the header row.
+        yield buffer.getvalue().encode()
+
+
+def export_chunks(export_format, tasks, serializer, chunk_size):
+    encode = ndjson_chunks if export_format == 'ndjson' else csv_chunks
+    return encode(tasks, serializer, chunk_size)
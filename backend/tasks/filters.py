@@ -0,0 +1,151 @@
+# backend/tasks/filters.py
+
+from datetime import timedelta
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+from .models import Task
+
+# Statuses that count as "done": a done task is never overdue.
+CLOSED_STATUSES = Task.CLOSED_STATUSES
+
+# Text search configuration used for the `search_vector` column.
+# Must match the configuration used by the trigger in migration 0004.
+SEARCH_CONFIG = 'english'
+
+
+# TaskFilterBackend
+# Server-side filtering for `/api/tasks/`, so clients no longer have to download
+# every task and filter them locally. Supported query parameters:
+#   status=pending,in_progress   only tasks in one of the given statuses
+#   due_after=YYYY-MM-DD         due on or after this date
+#   due_before=YYYY-MM-DD        due on or before this date
+#   overdue=true                 past their due date and not completed/cancelled
+#   search=some words            full-text search over title and description
+#   parent=12 / parent=none      only the direct subtasks of task 12 / top-level tasks
+#   workspace=3 / workspace=none only the tasks shared in workspace 3 / private tasks
+# Invalid values are reported as a 400 response rather than being ignored.
+# With both `due_after` and `due_before`, page-number lists also show the
+# occurrences of recurring tasks due in that window (see `filter_recurrences`).
+class TaskFilterBackend(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        if params.get('status'):
+            statuses = [value for value in params['status'].split(',') if value]
+            valid = {choice for choice, _ in Task.STATUS_CHOICES}
+            invalid = [value for value in statuses if value not in valid]
+            if invalid:
+                raise serializers.ValidationError({'status': [f'"{value}" is not a valid status.' for value in invalid]})
+            queryset = queryset.filter(status__in=statuses)
+
+        due_after = self._parse_date(params, 'due_after')
+        if due_after:
+            queryset = queryset.filter(due_date__gte=due_after)
+        due_before = self._parse_date(params, 'due_before')
+        if due_before:
+            queryset = queryset.filter(due_date__lte=due_before)
+
+        if params.get('overdue') in ('true', '1'):
+            queryset = queryset.filter(due_date__lt=timezone.localdate()).exclude(status__in=CLOSED_STATUSES)
+
+        parent = params.get('parent')
+        if parent:
+            if parent == 'none':
+                queryset = queryset.filter(parent__isnull=True)
+            elif parent.isdigit():
+                queryset = queryset.filter(parent=int(parent))
+            else:
+                raise serializers.ValidationError({'parent': ['Enter a task id, or "none" for top-level tasks.']})
+
+        workspace = params.get('workspace')
+        if workspace:
+            if workspace == 'none':
+                queryset = queryset.filter(workspace__isnull=True)
+            elif workspace.isdigit():
+                queryset = queryset.filter(workspace=int(workspace))
+            else:
+                raise serializers.ValidationError({'workspace': ['Enter a workspace id, or "none" for private tasks.']})
+
+        search = params.get('search', '').strip()
+        if search:
+            queryset = self._search(queryset, search)
+
+        return queryset
+
+    # The recurring tasks (see `TaskRecurrence`) whose unsaved occurrences belong in
+    # the filtered list, narrowed down from `queryset`, and the dates to expand them
+    # over: `(series, first, last)`, or None if the list shows no occurrences.
+    # Occurrences are only expanded for a bounded window, so the list must have
+    # both `due_after` and `due_before`. They are pending top-level tasks, and the
+    # other filters apply to them as such.
+    def filter_recurrences(self, request, queryset):
+        params = request.query_params
+        first, last = self._parse_date(params, 'due_after'), self._parse_date(params, 'due_before')
+        if first is None or last is None:
+            return None
+        if params.get('status') and 'pending' not in params['status'].split(','):
+            return None
+        if params.get('overdue') in ('true', '1'):
+            last = min(last, timezone.localdate() - timedelta(days=1))
+        if params.get('parent') not in (None, '', 'none') or first > last:
+            return None
+
+        workspace = params.get('workspace')
+        if workspace == 'none':
+            queryset = queryset.filter(workspace__isnull=True)
+        elif workspace and workspace.isdigit():
+            queryset = queryset.filter(workspace=int(workspace))
+
+        search = params.get('search', '').strip()
+        if search:
+            if connection.vendor == 'postgresql':
+                # Series are few next to tasks and have no stored search vector.
+                queryset = queryset.annotate(
+                    search=SearchVector('title', 'description', config=SEARCH_CONFIG),
+                ).filter(search=SearchQuery(search, config=SEARCH_CONFIG, search_type='websearch'))
+            else:
+                queryset = queryset.filter(Q(title__icontains=search) | Q(description__icontains=search))
+        return queryset, first, last
+
+    def _parse_date(self, params, name):
+        value = params.get(name)
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise serializers.ValidationError({name: ['Enter a date in YYYY-MM-DD format.']})
+        return parsed
+
+    # Full-text search.
+    # On PostgreSQL this matches against the trigger-maintained `search_vector`
+    # column, which is covered by a GIN index, using web-search syntax
+    # ("quoted phrases", -excluded words, or). Other backends (SQLite in local
+    # development and tests) have no tsvector support and fall back to substring matching.
+    def _search(self, queryset, search):
+        if connection.vendor == 'postgresql':
+            return queryset.filter(search_vector=SearchQuery(search, config=SEARCH_CONFIG, search_type='websearch'))
+        return queryset.filter(Q(title__icontains=search) | Q(description__icontains=search))
+
+
+# TaskOrderingFilter
+# `?ordering=` support restricted to the fields that make sense to sort by.
+# The primary key is always appended as a tie-breaker so pages are stable when
+# several tasks share the same value (e.g. the same due date or status).
+class TaskOrderingFilter(OrderingFilter):
+    ordering_fields = ['created_at', 'updated_at', 'due_date', 'status', 'title']
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and not any(field.lstrip('-') == 'id' for field in ordering):
+            ordering = list(ordering) + ['-id']
+        return ordering
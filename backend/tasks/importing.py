@@ -0,0 +1,222 @@
+# backend/tasks/importing.py
+
+# Bulk task import, used by `TaskImportView` (`POST /api/tasks/import/`) and the
+# `import_tasks` management command.
+#
+# The input (CSV with a header row, or NDJSON) is parsed as a stream and handled in
+# batches of `batch_size` rows: each row is checked with the `TaskSerializer` fields,
+# valid rows are written in one statement per batch, and invalid rows are reported
+# with their line number without stopping the import. Accepted columns are `title`,
+# `description`, `due_date` and `status`; anything else (e.g. the `id`, `user` and
+# timestamp columns of an export) is ignored, so exported files can be imported.
+#
+# On PostgreSQL each batch is loaded with `COPY ... FROM STDIN`; elsewhere with
+# `bulk_create`. Either way the batch is one transaction, the owner's stats counters
+# are updated with it, the jobs of `JOBS['TASK_WRITE_JOBS']` are queued for its tasks,
+# and their cached list pages are invalidated. Connected event streams get a single
+# "reset" event afterwards rather than one event per task.
+
+import csv
+import io
+import json
+import time
+from collections import Counter
+
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.fields import SkipField, empty
+
+from .cache import invalidate_task_lists
+from .events import RESET_EVENT_TYPE, publish_task_event
+from .jobs import enqueue_task_write_jobs
+from .models import Task, TaskStats, count_task
+from .serializers import TaskSerializer
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+# Only this many row errors are listed in a report; `failed` still counts them all.
+MAX_REPORTED_ERRORS = 1000
+
+# The columns read from each row; the rest are ignored.
+IMPORT_FIELDS = ('title', 'description', 'due_date', 'status')
+
+DEFAULT_STATUS = Task._meta.get_field('status').default
+
+
+# ImportReport
+# Outcome of one import: row counts, the first `MAX_REPORTED_ERRORS` row errors as
+# {"line": <line number>, "errors": {field: [messages]}}, and the throughput.
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return (self.imported + self.failed) / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+
+# Parsing
+# Both readers yield (line number, row dict or None); None marks a line that
+# couldn't be parsed into an object.
+
+def _csv_rows(text):
+    reader = csv.DictReader(text)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _ndjson_rows(text):
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+# Checks one row against `fields` (the fields of a `TaskSerializer`, see
+# `import_fields`) and returns (Task field values, None) or (None, errors), with the
+# serializer's own rules and messages: titles are trimmed, non-string values and NUL
+# characters are rejected. An empty `due_date` or `status` (all a CSV cell can say)
+# counts as missing.
+def validate_row(row, fields):
+    if row is None:
+        return None, {'non_field_errors': ['Expected a JSON object.']}
+    values = {}
+    errors = {}
+    for name in IMPORT_FIELDS:
+        value = row.get(name, empty)
+        if name in ('due_date', 'status') and value in ('', None):
+            value = empty
+        try:
+            values[name] = fields[name].run_validation(value)
+        except serializers.ValidationError as exc:
+            errors[name] = list(exc.detail)
+        except SkipField:
+            values[name] = None
+    if errors:
+        return None, errors
+    if values['status'] is None:
+        values['status'] = DEFAULT_STATUS
+    return values, None
+
+
+# The serializer fields `validate_row` checks rows with.
+def import_fields():
+    return TaskSerializer().fields
+
+
+# Loading
+# A value for COPY's CSV format: NULL is an unquoted \N, everything else is quoted,
+# so a literal "\N" title stays text.
+def _copy_value(value):
+    if value is None:
+        return r'\N'
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+# Loads `rows` for `user` with COPY and returns the new tasks' ids. COPY can't
+# return them, so they are taken from the id sequence first and loaded explicitly.
+def _copy_tasks(user, rows, now):
+    table = Task._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)", [table, len(rows)],
+        )
+        ids = [task_id for task_id, in cursor.fetchall()]
+    columns = ('id', 'user_id', 'title', 'description', 'due_date', 'status', 'created_at', 'updated_at')
+    data = io.StringIO()
+    for task_id, row in zip(ids, rows):
+        values = (task_id, user.pk, row['title'], row['description'], row['due_date'], row['status'], now, now)
+        data.write(','.join(_copy_value(value) for value in values))
+        data.write('\n')
+    data.seek(0)
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):
+            # psycopg2
+            raw.copy_expert(sql, data)
+        else:
+            # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(data.getvalue())
+    return ids
+
+
+# Writes one batch of valid rows in a single transaction.
+def _load_batch(user, rows):
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # COPY bypasses `TaskQuerySet.bulk_create`, so the counters are updated here.
+            ids = _copy_tasks(user, rows, timezone.now())
+            deltas = Counter()
+            for row in rows:
+                count_task(deltas, user.pk, row['status'], row['due_date'], 1)
+            TaskStats.apply(deltas)
+        else:
+            ids = [task.pk for task in Task.objects.bulk_create([Task(user=user, **row) for row in rows])]
+        # Neither sends `post_save`, which queues them for single writes.
+        enqueue_task_write_jobs('task.created', [(task_id, user.pk) for task_id in ids])
+        invalidate_task_lists(user.pk)
+
+
+# Imports tasks for `user` from `stream` (binary or text file object) in the given
+# format and returns an `ImportReport`. Batches written before an unreadable part of
+# the input (not UTF-8, broken CSV) stay imported; the report says where it stopped.
+def import_tasks(user, stream, import_format, batch_size=5000):
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f'Unknown import format "{import_format}".')
+    text = stream if isinstance(stream, io.TextIOBase) else io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    rows = _csv_rows(text) if import_format == 'csv' else _ndjson_rows(text)
+
+    fields = import_fields()
+    report = ImportReport()
+    batch = []
+    line = 0
+    try:
+        for line, row in rows:
+            values, errors = validate_row(row, fields)
+            if errors:
+                report.add_error(line, errors)
+                continue
+            batch.append(values)
+            if len(batch) >= batch_size:
+                _load_batch(user, batch)
+                report.imported += len(batch)
+                batch = []
+    except (UnicodeDecodeError, csv.Error) as exc:
+        report.add_error(line + 1, {'non_field_errors': [f'Unreadable input, import stopped: {exc}']})
+    if batch:
+        _load_batch(user, batch)
+        report.imported += len(batch)
+    report.finish()
+
+    if report.imported:
+        # Too many changes for one event each: tell connected clients to refetch.
+        transaction.on_commit(lambda: publish_task_event(user.pk, RESET_EVENT_TYPE, None), robust=True)
+    return report
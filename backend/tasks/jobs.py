@@ -0,0 +1,166 @@
+# backend/tasks/jobs.py
+
+# Background jobs: side effects of task writes that don't need to finish before the
+# response is sent (notifications, webhooks, indexing, ...).
+#
+# A job is a plain function, referenced by its dotted path, and JSON-serializable
+# keyword arguments. `enqueue` writes it to the `Job` table in the caller's
+# transaction, so the job exists exactly when the write that caused it committed
+# and no worker can see it before then. Workers (`python manage.py run_workers`)
+# poll the table, claim due jobs in batches with `SELECT ... FOR UPDATE SKIP LOCKED`
+# (so any number of them can share the queue without blocking each other), and run
+# them on a thread pool:
+#
+#   from tasks.jobs import enqueue
+#
+#   def notify_assignee(task_id):
+#       ...
+#
+#   enqueue(notify_assignee, task_id=task.pk)                  as soon as possible
+#   enqueue(notify_assignee, delay=timedelta(hours=1), task_id=task.pk)
+#
+# Jobs run at least once: a job that raises is retried after an exponential backoff
+# (`JOBS['BACKOFF_SECONDS']`, doubled per attempt) up to its `max_attempts`, and the
+# job of a worker that died is claimed again once its lease has expired. Write jobs
+# so that running them twice is harmless.
+
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+# Queue `func(**kwargs)` to run in a worker, after `delay` (a timedelta) if given.
+# Must be called with the data the job needs already saved: inside the transaction
+# of the write, the job is inserted, committed or rolled back together with it.
+def enqueue(func, *, delay=None, max_attempts=None, **kwargs):
+    name = func if isinstance(func, str) else f'{func.__module__}.{func.__qualname__}'
+    return Job.objects.create(
+        name=name,
+        payload=kwargs,
+        max_attempts=max_attempts or settings.JOBS['MAX_ATTEMPTS'],
+        run_at=timezone.now() + (delay or timedelta()),
+    )
+
+
+# Queue the jobs listed in `JOBS['TASK_WRITE_JOBS']` for written tasks: each one is
+# called as `job(event=..., task_id=..., user_id=...)` for every `(task_id, user_id)`
+# pair in `tasks`, with `event` 'task.created', 'task.updated' or 'task.deleted'.
+# The jobs of any number of tasks are inserted together, so bulk writes and imports
+# queue them as cheaply as single writes. Called by the Task signal handlers, and by
+# the writes that send no signals (see `TaskBulkView` and tasks/importing.py).
+def enqueue_task_write_jobs(event, tasks):
+    names = settings.JOBS['TASK_WRITE_JOBS']
+    if not names:
+        return
+    run_at = timezone.now()
+    Job.objects.bulk_create([
+        Job(
+            name=name, payload={'event': event, 'task_id': task_id, 'user_id': user_id},
+            max_attempts=settings.JOBS['MAX_ATTEMPTS'], run_at=run_at,
+        )
+        for task_id, user_id in tasks
+        for name in names
+    ])
+
+
+# Claims up to `limit` due jobs for this worker and returns them. The jobs' `run_at`
+# is pushed to the end of the lease, so no other worker picks them up while they
+# run, and their attempt counter is incremented.
+def claim_jobs(limit):
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+            .order_by('run_at', 'id')
+            .select_for_update(skip_locked=True)[:limit]
+        )
+        if jobs:
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                run_at=now + timedelta(seconds=settings.JOBS['LEASE_SECONDS']), attempts=F('attempts') + 1,
+            )
+    for job in jobs:
+        job.attempts += 1
+    return jobs
+
+
+# Seconds to wait before retrying a job that failed its `attempts`-th time.
+def retry_delay(attempts):
+    config = settings.JOBS
+    return min(config['BACKOFF_MAX_SECONDS'], config['BACKOFF_SECONDS'] * 2 ** (attempts - 1))
+
+
+# Runs one claimed job and records a failure: the job is rescheduled, or marked
+# failed after its last attempt. Returns 'done', 'retried' or 'failed'; the rows
+# of done jobs are deleted by the caller, one query per batch.
+def run_job(job):
+    _refresh_connections()
+    try:
+        import_string(job.name)(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error('Job %s (%s) failed for good after %d attempts:\n%s', job.pk, job.name, job.attempts, error)
+            Job.objects.filter(pk=job.pk).update(status=Job.FAILED, last_error=error)
+            return 'failed'
+        logger.warning('Job %s (%s) failed, attempt %d of %d:\n%s',
+                       job.pk, job.name, job.attempts, job.max_attempts, error)
+        Job.objects.filter(pk=job.pk).update(
+            run_at=timezone.now() + timedelta(seconds=retry_delay(job.attempts)), last_error=error,
+        )
+        return 'retried'
+    else:
+        return 'done'
+    finally:
+        _refresh_connections()
+
+
+# As around a request: don't reuse a connection that is broken or past CONN_MAX_AGE.
+# Skipped inside a transaction (a test case's), whose connection can't be swapped.
+def _refresh_connections():
+    if not connection.in_atomic_block:
+        close_old_connections()
+
+
+# Worker
+# One worker process: claims batches of due jobs and runs them on `threads`
+# threads until `stop` (a threading or multiprocessing Event) is set. With
+# `once=True` it returns as soon as the queue has no due jobs left instead of
+# polling. Returns the number of jobs per outcome.
+class Worker:
+    def __init__(self, threads=None, batch_size=None, poll_interval=None):
+        config = settings.JOBS
+        self.threads = threads or config['THREADS']
+        self.batch_size = batch_size or config['BATCH_SIZE']
+        self.poll_interval = config['POLL_INTERVAL_SECONDS'] if poll_interval is None else poll_interval
+
+    def run(self, stop=None, once=False):
+        stop = stop or threading.Event()
+        counts = {'done': 0, 'retried': 0, 'failed': 0}
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='job') as pool:
+            while not stop.is_set():
+                jobs = claim_jobs(self.batch_size)
+                if not jobs:
+                    if once:
+                        break
+                    stop.wait(self.poll_interval)
+                    continue
+                runner = map if self.threads == 1 else pool.map
+                done = []
+                for job, outcome in zip(jobs, runner(run_job, jobs)):
+                    counts[outcome] += 1
+                    if outcome == 'done':
+                        done.append(job.pk)
+                Job.objects.filter(pk__in=done).delete()
+        return counts
@@ -0,0 +1,43 @@
+# backend/tasks/management/commands/archive_tasks.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.archive import archive_batch
+
+# archive_tasks
+# Moves completed / cancelled tasks that haven't changed for `--older-than-days` to
+# the archive table (see tasks/archive.py), `--batch-size` tasks per transaction.
+# Run it daily, or stop it at any point: every batch is committed on its own and the
+# command prints the last task id it moved, which `--after-id` resumes from:
+#
+#   python manage.py archive_tasks                         settings.TASK_ARCHIVE defaults
+#   python manage.py archive_tasks --max-batches 50        at most 50 batches this run
+#   python manage.py archive_tasks --after-id 123456       resume after task 123456
+class Command(BaseCommand):
+    help = 'Move old completed / cancelled tasks to the archive table.'
+
+    def add_arguments(self, parser):
+        config = settings.TASK_ARCHIVE
+        parser.add_argument('--older-than-days', type=int, default=config['AFTER_DAYS'],
+                            help='Archive closed tasks not updated for this many days.')
+        parser.add_argument('--batch-size', type=int, default=config['BATCH_SIZE'], help='Tasks per transaction.')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches.')
+        parser.add_argument('--after-id', type=int, default=0, help='Only archive tasks with a greater id.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        last_id = options['after_id']
+        archived = batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            ids = archive_batch(cutoff, options['batch_size'], after_id=last_id)
+            if not ids:
+                break
+            archived += len(ids)
+            batches += 1
+            last_id = ids[-1]
+            self.stdout.write(f'Batch {batches}: archived {len(ids)} tasks up to id {last_id}.')
+        self.stdout.write(f'Archived {archived} tasks in {batches} batches (last id {last_id}).')
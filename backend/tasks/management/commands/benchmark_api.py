@@ -0,0 +1,233 @@
+# backend/tasks/management/commands/benchmark_api.py
+
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tasks.benchmarking import count_queries, percentile, seed_users
+from tasks.models import Task
+from users.serializers import MyTokenObtainPairSerializer
+
+SCENARIOS = ('register', 'login', 'list', 'detail', 'create', 'update', 'delete')
+PASSWORD = 'bench-password-123'
+
+User = get_user_model()
+
+# benchmark_api
+# Reproducible benchmark of the task API. Seeds `--users` users with `--tasks` tasks
+# each, then runs every scenario (register, login, list, detail, create, update,
+# delete) `--requests` times through the full request stack: the URLconf in
+# backend/urls.py, all middleware, JWT authentication and the views. Requests are
+# spread round-robin over the seeded users. For each scenario it reports throughput,
+# p50/p95/p99 latency and queries per request.
+#
+# It runs against whichever database is configured (DB_ENGINE / DB_* variables), so
+# run it once on SQLite and once on a local PostgreSQL. Results can be saved as a JSON
+# baseline per database vendor and later runs compared against it:
+#
+#   python manage.py benchmark_api --save-baseline      write benchmarks/api-<vendor>.json
+#   python manage.py benchmark_api --compare            exit 1 if a scenario regressed
+#
+# A scenario regresses when its p50 latency exceeds the baseline by more than
+# `--tolerance` (a fraction, default 0.25) or when it runs more queries per request
+# than the baseline. p95/p99 are reported but not compared; they are too noisy over
+# a few hundred requests on a shared machine. Compare only runs made with the same
+# options on the same machine.
+#
+# Login throttling is switched off for the run, and the seeded users are deleted
+# afterwards unless `--keep` is given.
+class Command(BaseCommand):
+    help = 'Benchmark the task API end to end, with JSON baselines and regression checks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Users to seed.')
+        parser.add_argument('--tasks', type=int, default=100, help='Tasks to seed per user.')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed requests per scenario beforehand.')
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS, dest='scenarios',
+                            help='Scenario to run (repeatable; default: all).')
+        parser.add_argument('--baseline', help='Baseline file (default: benchmarks/api-<database vendor>.json).')
+        parser.add_argument('--save-baseline', action='store_true', help='Write the results as the baseline.')
+        parser.add_argument('--compare', action='store_true', help='Fail if a scenario regressed against the baseline.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed p50 slowdown as a fraction of the baseline.')
+        parser.add_argument('--prefix', default='bench_api', help='Username prefix of the seeded users.')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded users and tasks afterwards.')
+
+    def handle(self, *args, **options):
+        baseline_path = Path(options['baseline'] or Path(settings.BASE_DIR) / 'benchmarks' / f'api-{connection.vendor}.json')
+        baseline = None
+        if options['compare']:
+            if not baseline_path.exists():
+                raise CommandError(f'No baseline at {baseline_path}; run with --save-baseline first.')
+            baseline = json.loads(baseline_path.read_text())
+
+        started = time.perf_counter()
+        users = seed_users(options['prefix'], options['users'], options['tasks'], PASSWORD)
+        self.stdout.write(
+            f"Seeded {options['users']} users x {options['tasks']} tasks in {time.perf_counter() - started:.1f}s "
+            f'({connection.vendor})'
+        )
+
+        clients = []
+        for user in users:
+            client = APIClient(SERVER_NAME='localhost')
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {MyTokenObtainPairSerializer.get_token(user).access_token}')
+            clients.append(client)
+        run = Run(options['prefix'], users, clients, options['tasks'])
+
+        results = {}
+        # Login attempts would otherwise be throttled after a few requests per user.
+        rates = {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'login_ip': None, 'login_username': None}
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}):
+            self.stdout.write(f"{'scenario':<10} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+            for name in options['scenarios'] or SCENARIOS:
+                # `delete` removes the tasks `create` added, so it needs them first.
+                if name == 'delete' and not run.created:
+                    _measure(run, 'create', options['warmup'] + options['requests'], 0)
+                results[name] = _measure(run, name, options['requests'], options['warmup'])
+                self._write_row(name, results[name])
+
+        run.cleanup(keep=options['keep'])
+
+        report = {
+            'vendor': connection.vendor,
+            'users': options['users'],
+            'tasks_per_user': options['tasks'],
+            'requests': options['requests'],
+            'scenarios': results,
+        }
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(report, indent=2) + '\n')
+            self.stdout.write(f'Saved baseline to {baseline_path}')
+        if baseline is not None:
+            self._compare(report, baseline, options['tolerance'])
+
+    def _write_row(self, name, result):
+        self.stdout.write(
+            f"{name:<10} {result['throughput_rps']:>9.1f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+            f"{result['p99_ms']:>8.2f} {result['queries_per_request']:>8.1f}"
+        )
+
+    def _compare(self, report, baseline, tolerance):
+        for key in ('vendor', 'users', 'tasks_per_user'):
+            if report[key] != baseline.get(key):
+                raise CommandError(f'Baseline was recorded with {key}={baseline.get(key)!r}, this run has {report[key]!r}.')
+        regressions = []
+        for name, result in report['scenarios'].items():
+            base = baseline['scenarios'].get(name)
+            if base is None:
+                continue
+            if result['p50_ms'] > base['p50_ms'] * (1 + tolerance):
+                regressions.append(f"{name}: p50 {result['p50_ms']:.2f} ms vs baseline {base['p50_ms']:.2f} ms")
+            if result['queries_per_request'] > base['queries_per_request']:
+                regressions.append(
+                    f"{name}: {result['queries_per_request']:.1f} queries/request "
+                    f"vs baseline {base['queries_per_request']:.1f}"
+                )
+        if regressions:
+            raise CommandError('Regressed beyond the baseline:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(f'No regressions against the baseline (tolerance {tolerance:.0%}).')
+
+
+# Run
+# State shared by the scenarios of one benchmark run: the seeded users, an
+# authenticated client per user, and what the run has created so far.
+class Run:
+    def __init__(self, prefix, users, clients, tasks_per_user):
+        self.prefix = prefix
+        self.users = users
+        self.clients = clients
+        self.tasks_per_user = tasks_per_user
+        self.task_ids = {
+            user.pk: list(Task.objects.filter(user=user).order_by('id').values_list('id', flat=True)[:100])
+            for user in users
+        }
+        self.anonymous = APIClient(SERVER_NAME='localhost')
+        self.registered = 0
+        self.created = []  # (client, task id) of tasks created by the `create` scenario
+        self.run_id = int(time.time())
+
+    # One request of the scenario; `i` is the request number.
+    def request(self, name, i):
+        user_index = i % len(self.users)
+        user = self.users[user_index]
+        client = self.clients[user_index]
+        task_ids = self.task_ids[user.pk]
+
+        if name == 'register':
+            username = f'{self.prefix}_reg_{self.run_id}_{self.registered}'
+            self.registered += 1
+            response = self.anonymous.post(reverse('register'), {
+                'username': username, 'email': f'{username}@example.com',
+                'password': PASSWORD, 'password2': PASSWORD,
+            })
+            expected = 201
+        elif name == 'login':
+            response = self.anonymous.post(reverse('token_obtain_pair'), {'username': user.username, 'password': PASSWORD})
+            expected = 200
+        elif name == 'list':
+            pages = max(1, (self.tasks_per_user + settings.REST_FRAMEWORK['PAGE_SIZE'] - 1)
+                        // settings.REST_FRAMEWORK['PAGE_SIZE'])
+            response = client.get(reverse('task-list-create'), {'page': (i // len(self.users)) % pages + 1})
+            expected = 200
+        elif name == 'detail':
+            response = client.get(reverse('task-detail', args=[task_ids[i % len(task_ids)]]))
+            expected = 200
+        elif name == 'create':
+            response = client.post(reverse('task-list-create'), {'title': f'Benchmark create {i}', 'status': 'pending'})
+            expected = 201
+            if response.status_code == expected:
+                self.created.append((client, response.data['id']))
+        elif name == 'update':
+            response = client.patch(reverse('task-detail', args=[task_ids[i % len(task_ids)]]),
+                                    {'title': f'Benchmark update {i}'})
+            expected = 200
+        else:
+            created_client, task_id = self.created.pop()
+            response = created_client.delete(reverse('task-detail', args=[task_id]))
+            expected = 204
+        if response.status_code != expected:
+            raise CommandError(f'{name}: expected HTTP {expected}, got {response.status_code}: {response.content[:200]!r}')
+
+    def cleanup(self, keep):
+        User.objects.filter(username__startswith=f'{self.prefix}_reg_{self.run_id}_').delete()
+        if not keep:
+            User.objects.filter(pk__in=[user.pk for user in self.users]).delete()
+
+
+# Runs `warmup` untimed and then `count` timed requests of one scenario.
+def _measure(run, name, count, warmup):
+    for i in range(warmup):
+        run.request(name, i)
+    latencies = []
+    queries = 0
+    started = time.perf_counter()
+    for i in range(warmup, warmup + count):
+        with count_queries() as counter:
+            request_started = time.perf_counter()
+            run.request(name, i)
+            latencies.append((time.perf_counter() - request_started) * 1000)
+        queries += counter['queries']
+    elapsed = time.perf_counter() - started
+    if not count:
+        return None
+    latencies.sort()
+    return {
+        'throughput_rps': round(count / elapsed, 1),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'queries_per_request': round(queries / count, 2),
+    }
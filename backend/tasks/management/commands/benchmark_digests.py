@@ -0,0 +1,109 @@
+# backend/tasks/management/commands/benchmark_digests.py
+
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from tasks.benchmarking import time_call
+from tasks.models import Task, TaskDigest
+
+User = get_user_model()
+
+# benchmark_digests
+# Shows that `build_task_digests` covers a large user base within its time budget.
+# Seeds `--users` users (1M by default), a `--active` fraction of them with
+# `--tasks-per-user` tasks due between two weeks ago and two weeks ahead, runs the
+# digest build with the given workers, and times `/api/tasks/digest/`.
+#
+# Seeding writes the rows directly (no per-task counter maintenance, no events), so
+# run it against a scratch database, e.g.:
+#
+#   DB_NAME=taskmanager_bench python manage.py migrate
+#   DB_NAME=taskmanager_bench python manage.py benchmark_digests --workers 8
+#
+# The seeded users and their tasks and digests are deleted afterwards unless
+# `--keep` is given; a kept population is reused by the next run.
+class Command(BaseCommand):
+    help = 'Benchmark building task digests for a large number of users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000, help='Users to seed.')
+        parser.add_argument('--active', type=float, default=0.2, help='Fraction of users that have tasks.')
+        parser.add_argument('--tasks-per-user', type=int, default=10, help='Tasks per active user.')
+        parser.add_argument('--workers', type=int, default=1, help='Passed to build_task_digests.')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Passed to build_task_digests.')
+        parser.add_argument('--time-budget', type=float, default=600, help='Passed to build_task_digests.')
+        parser.add_argument('--prefix', default='bench_digest', help='Username prefix of the seeded users.')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded users afterwards.')
+
+    def handle(self, *args, **options):
+        seeded = User.objects.filter(username__startswith=f"{options['prefix']}_")
+        if not seeded.exists():
+            started = time.perf_counter()
+            self._seed(options)
+            self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+        bounds = seeded.aggregate(first=Min('id'), last=Max('id'))
+        tasks = Task.objects.filter(user_id__gte=bounds['first'], user_id__lte=bounds['last']).count()
+        self.stdout.write(f"{bounds['last'] - bounds['first'] + 1} users, {tasks} tasks ({connection.vendor})")
+
+        try:
+            call_command(
+                'build_task_digests', workers=options['workers'], chunk_size=options['chunk_size'],
+                time_budget=options['time_budget'], stdout=self.stdout,
+            )
+        finally:
+            # The pool (if any) closed this process's connections; the next query reopens.
+            user = seeded.filter(task_digest__isnull=False).order_by('id').first()
+            if user is not None:
+                client = APIClient(SERVER_NAME='localhost')
+                client.force_authenticate(user=user)
+                url = reverse('task-digest')
+                stats = time_call(lambda: client.get(url), repeat=50)
+                self.stdout.write(f"/api/tasks/digest/: median {stats['median_ms']:.2f} ms")
+            if not options['keep']:
+                self._delete(options['prefix'], bounds['first'], bounds['last'])
+
+    def _seed(self, options):
+        prefix = options['prefix']
+        password = make_password(None)  # Unusable: nobody logs in as these users.
+        active_every = max(1, round(1 / options['active'])) if options['active'] > 0 else 0
+        statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+        today = timezone.localdate()
+        batch_size = 10000
+        for start in range(0, options['users'], batch_size):
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(username=f'{prefix}_{i}', password=password)
+                    for i in range(start, min(start + batch_size, options['users']))
+                ])
+                if not users[0].pk:
+                    # Backends that don't return ids from bulk inserts.
+                    users = list(User.objects.filter(username__in=[user.username for user in users]))
+                # The base manager skips the per-task counter maintenance of `Task.objects`.
+                Task._base_manager.bulk_create([
+                    Task(
+                        user=user, title=f'Digest task {n}', status=statuses[(user.pk + n) % len(statuses)],
+                        due_date=today + timedelta(days=(user.pk * 7 + n * 3) % 29 - 14),
+                    )
+                    for user in users if active_every and user.pk % active_every == 0
+                    for n in range(options['tasks_per_user'])
+                ], batch_size=5000)
+
+    # Raw deletes by id range: the ORM would load every task to send delete signals.
+    def _delete(self, prefix, first, last):
+        users = f'SELECT id FROM {User._meta.db_table} WHERE id >= %s AND id < %s AND username LIKE %s'
+        with connection.cursor() as cursor:
+            for start in range(first, last + 1, 50000):
+                params = [start, start + 50000, f'{prefix}_%']
+                for model in (TaskDigest, Task):
+                    cursor.execute(f'DELETE FROM {model._meta.db_table} WHERE user_id IN ({users})', params)
+                cursor.execute(f'DELETE FROM {User._meta.db_table} WHERE id IN ({users})', params)
@@ -0,0 +1,60 @@
+# backend/tasks/management/commands/benchmark_jobs.py
+
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from tasks.benchmarking import sleep_job, time_call
+from tasks.jobs import enqueue
+from tasks.models import Job
+
+# benchmark_jobs
+# Throughput of the job queue (tasks/jobs.py):
+# - the cost `enqueue` adds to a write (one INSERT, timed per call),
+# - jobs per second through `run_workers --once` for `--jobs` queued jobs, each
+#   sleeping `--job-ms` to stand in for the I/O a real job does.
+#
+# Usage:
+#   python manage.py benchmark_jobs --jobs 10000 --processes 4 --threads 8 --job-ms 5
+#
+# Only the benchmark's own jobs are queued and deleted, but workers run whatever
+# else is due: use a scratch database.
+class Command(BaseCommand):
+    help = 'Benchmark enqueueing and running background jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=5000, help='Jobs to queue and run.')
+        parser.add_argument('--job-ms', type=float, default=0, help='Milliseconds each job sleeps.')
+        parser.add_argument('--processes', type=int, default=1, help='Passed to run_workers.')
+        parser.add_argument('--threads', type=int, default=4, help='Passed to run_workers.')
+        parser.add_argument('--batch-size', type=int, default=20, help='Passed to run_workers.')
+
+    def handle(self, *args, **options):
+        def enqueue_one():
+            with transaction.atomic():
+                enqueue(sleep_job, ms=options['job_ms'])
+
+        enqueue_stats = time_call(enqueue_one, repeat=200)
+        self.stdout.write(f"enqueue: median {enqueue_stats['median_ms']:.3f} ms per job ({connection.vendor})")
+
+        name = f'{sleep_job.__module__}.{sleep_job.__qualname__}'
+        Job.objects.filter(name=name).delete()
+        Job.objects.bulk_create(
+            [Job(name=name, payload={'ms': options['job_ms']}, max_attempts=1) for _ in range(options['jobs'])],
+            batch_size=5000,
+        )
+        queued = Job.objects.filter(name=name).count()
+        started = time.perf_counter()
+        call_command(
+            'run_workers', once=True, processes=options['processes'], threads=options['threads'],
+            batch_size=options['batch_size'], stdout=self.stdout,
+        )
+        elapsed = time.perf_counter() - started
+        left = Job.objects.filter(name=name).count()
+        self.stdout.write(
+            f"{queued - left} jobs in {elapsed:.2f}s: {(queued - left) / elapsed:.0f} jobs/s "
+            f"with {options['processes']} process(es) x {options['threads']} thread(s)"
+        )
+        Job.objects.filter(name=name).delete()
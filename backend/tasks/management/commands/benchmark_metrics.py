@@ -0,0 +1,65 @@
+# backend/tasks/management/commands/benchmark_metrics.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tasks.benchmarking import get_bench_user, seed_tasks, time_call
+from tasks.models import Task
+
+# benchmark_metrics
+# Measures what the request metrics (backend/metrics.py) add to a request: the same
+# `/api/tasks/` list and `/api/tasks/<id>/` detail requests are timed with
+# `METRICS['ENABLED']` on and off, alternating rounds so drift affects both alike.
+# The list cache is disabled so every list request runs its queries.
+#
+# Usage:
+#   python manage.py benchmark_metrics --requests 500 --rounds 5
+class Command(BaseCommand):
+    help = 'Benchmark the per-request overhead of the metrics middleware.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=100, help='Number of tasks to seed for the benchmark user.')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint in each round.')
+        parser.add_argument('--rounds', type=int, default=5, help='Alternating on/off rounds; the median is reported.')
+        parser.add_argument('--username', default='bench_metrics', help='Benchmark user to create (or reuse).')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded user and tasks afterwards.')
+
+    def handle(self, *args, **options):
+        user = get_bench_user(options['username'])
+        existing = Task.objects.filter(user=user).count()
+        if existing < options['tasks']:
+            seed_tasks(user, options['tasks'] - existing)
+        task = Task.objects.filter(user=user).first()
+
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user=user)
+        endpoints = {
+            'task-list-create': reverse('task-list-create'),
+            'task-detail': reverse('task-detail', args=[task.pk]),
+        }
+
+        self.stdout.write(f"{'endpoint':<18} {'off (us/req)':>13} {'on (us/req)':>12} {'overhead (us)':>14}")
+        for name, url in endpoints.items():
+            timings = {False: [], True: []}
+            for _ in range(options['rounds']):
+                for enabled in (False, True):
+                    with override_settings(
+                        METRICS={**settings.METRICS, 'ENABLED': enabled, 'SLOW_REQUEST_MS': float('inf')},
+                        TASKS_LIST_CACHE={**settings.TASKS_LIST_CACHE, 'ENABLED': False},
+                    ):
+                        stats = time_call(lambda: self._get_many(client, url, options['requests']), repeat=1)
+                    timings[enabled].append(stats['median_ms'] * 1000 / options['requests'])
+            off = sorted(timings[False])[len(timings[False]) // 2]
+            on = sorted(timings[True])[len(timings[True]) // 2]
+            self.stdout.write(f'{name:<18} {off:>13.1f} {on:>12.1f} {on - off:>14.1f}')
+
+        if not options['keep']:
+            user.delete()
+
+    def _get_many(self, client, url, count):
+        for _ in range(count):
+            response = client.get(url)
+            assert response.status_code == 200, response.content
@@ -0,0 +1,74 @@
+# backend/tasks/management/commands/benchmark_pagination.py
+
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+from rest_framework.pagination import Cursor
+from rest_framework.test import APIClient
+
+from tasks.benchmarking import get_bench_user, seed_tasks, time_call
+from tasks.models import Task
+from tasks.pagination import TaskCursorPagination
+
+# benchmark_pagination
+# Compares page-number and cursor pagination on `/api/tasks/` for one user with a
+# large backlog (100k tasks by default). For each depth it times fetching the page
+# that starts at that row, once via `?page=N` and once via an equivalent cursor.
+#
+# Usage:
+#   python manage.py benchmark_pagination --tasks 100000 --repeat 5
+class Command(BaseCommand):
+    help = 'Benchmark page-number vs cursor pagination on /api/tasks/ at increasing depths.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=100000, help='Number of tasks to seed for the benchmark user.')
+        parser.add_argument('--page-size', type=int, default=10, help='Page size used by both modes.')
+        parser.add_argument('--repeat', type=int, default=5, help='Requests timed per depth and mode.')
+        parser.add_argument('--username', default='bench_pagination', help='Benchmark user to create (or reuse).')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded user and tasks afterwards.')
+
+    def handle(self, *args, **options):
+        user = get_bench_user(options['username'])
+        existing = Task.objects.filter(user=user).count()
+        if existing < options['tasks']:
+            self.stdout.write(f"Seeding {options['tasks'] - existing} tasks...")
+            seed_tasks(user, options['tasks'] - existing)
+        total = Task.objects.filter(user=user).count()
+
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user=user)
+        url = reverse('task-list-create')
+        page_size = options['page_size']
+        last_page = (total + page_size - 1) // page_size
+
+        self.stdout.write(f'{total} tasks, page size {page_size}')
+        self.stdout.write(f"{'page':>8} {'page-number (ms)':>18} {'cursor (ms)':>14}")
+        for page in sorted({1, 10, 100, 1000, last_page // 2, last_page}):
+            if page < 1 or page > last_page:
+                continue
+            page_url = f"{url}?{urlencode({'page': page, 'page_size': page_size})}"
+            cursor_url = self._cursor_url(user, url, (page - 1) * page_size, page_size)
+
+            page_stats = time_call(lambda: self._get(client, page_url), options['repeat'])
+            cursor_stats = time_call(lambda: self._get(client, cursor_url), options['repeat'])
+            self.stdout.write(f"{page:>8} {page_stats['median_ms']:>18.2f} {cursor_stats['median_ms']:>14.2f}")
+
+        if not options['keep']:
+            user.delete()
+
+    # Build the cursor URL a client would hold after paging down to `offset` rows.
+    # The position is looked up outside the timed section.
+    def _cursor_url(self, user, url, offset, page_size):
+        params = {'pagination': 'cursor', 'page_size': page_size}
+        if offset == 0:
+            return f'{url}?{urlencode(params)}'
+        # The cursor points just past the previous page's last row.
+        previous = Task.objects.filter(user=user).order_by('-created_at', '-id')[offset - 1]
+        paginator = TaskCursorPagination()
+        paginator.base_url = f'http://localhost{url}?{urlencode(params)}'
+        return paginator.encode_cursor(Cursor(offset=0, reverse=False, position=paginator.position(previous)))
+
+    def _get(self, client, url):
+        response = client.get(url)
+        assert response.status_code == 200, response.content
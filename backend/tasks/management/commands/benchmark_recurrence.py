@@ -0,0 +1,76 @@
+# backend/tasks/management/commands/benchmark_recurrence.py
+
+from datetime import timedelta
+from itertools import count
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from tasks.benchmarking import count_queries, get_bench_user, seed_tasks, time_call
+from tasks.models import Task, TaskRecurrence
+
+# Rules the seeded series cycle through.
+RULES = ['FREQ=DAILY', 'FREQ=WEEKLY;BYDAY=MO,WE,FR', 'FREQ=WEEKLY;INTERVAL=2', 'FREQ=MONTHLY;BYMONTHDAY=1,-1']
+
+# benchmark_recurrence
+# The task list of a user with `--series` recurring tasks and `--tasks` stored
+# tasks, over a due-date window of a week and of a year. Times, for each window,
+# the first page and a page `--depth` pages in, with the page cache bypassed, and
+# prints the occurrence count and the queries per request.
+#
+# Usage:
+#   python manage.py benchmark_recurrence --series 2000 --tasks 10000 --repeat 20
+#
+# The seeded user, series and tasks are deleted afterwards unless `--keep` is given.
+class Command(BaseCommand):
+    help = 'Benchmark windowed task lists that expand many recurring tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--series', type=int, default=2000, help='Recurring tasks of the benchmark user.')
+        parser.add_argument('--tasks', type=int, default=10000, help='Stored tasks of the benchmark user.')
+        parser.add_argument('--depth', type=int, default=50, help='Page number of the deep page.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per measurement.')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data afterwards.')
+
+    def handle(self, *args, **options):
+        user = get_bench_user('bench_recurrence')
+        today = timezone.localdate()
+        if not TaskRecurrence.objects.filter(user=user).exists():
+            seed_tasks(user, options['tasks'])
+            TaskRecurrence.objects.bulk_create([
+                TaskRecurrence(
+                    user=user, title=f'Series {i}', rule=RULES[i % len(RULES)],
+                    starts_on=today - timedelta(days=i % 1000),
+                )
+                for i in range(options['series'])
+            ])
+        self.stdout.write(f"{options['series']} series, {options['tasks']} tasks ({connection.vendor})")
+
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user=user)
+        url = reverse('task-list-create')
+        requests = count()
+        for label, days in (('week', 7), ('year', 365)):
+            window = {'due_after': today.isoformat(), 'due_before': (today + timedelta(days=days - 1)).isoformat(),
+                      'ordering': 'due_date'}
+            total = client.get(url, window).data['count']
+            for page in (1, options['depth']):
+                # A query string never seen before misses the page cache.
+                fetch = lambda: client.get(url, {**window, 'page': page, 'run': next(requests)})  # noqa: E731
+                if fetch().status_code != 200:
+                    continue
+                with count_queries() as counter:
+                    fetch()
+                timing = time_call(fetch, repeat=options['repeat'])
+                self.stdout.write(
+                    f"{label:<5} ({total:>7} rows) page {page:<4} median {timing['median_ms']:7.2f} ms   "
+                    f"max {timing['max_ms']:7.2f} ms, {counter['queries']} queries"
+                )
+
+        if not options['keep']:
+            Task.objects.filter(user=user).delete()
+            TaskRecurrence.objects.filter(user=user).delete()
+            user.delete()
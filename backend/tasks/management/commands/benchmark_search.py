@@ -0,0 +1,60 @@
+# backend/tasks/management/commands/benchmark_search.py
+
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tasks.benchmarking import get_bench_user, seed_tasks, time_call
+from tasks.filters import TaskFilterBackend
+from tasks.models import Task
+
+# benchmark_search
+# Times `?search=` on `/api/tasks/` for one user with a large backlog (100k tasks
+# by default), both as a bare query and as a full request through the view.
+# On PostgreSQL the search uses the GIN-indexed `search_vector` column; on other
+# databases the numbers reflect the substring fallback and are not representative.
+#
+# Usage:
+#   python manage.py benchmark_search --tasks 100000 --term "task 4242"
+class Command(BaseCommand):
+    help = 'Benchmark full-text search on /api/tasks/.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=100000, help='Number of tasks to seed for the benchmark user.')
+        parser.add_argument('--term', action='append', help='Search term to time (may be repeated).')
+        parser.add_argument('--repeat', type=int, default=10, help='Runs timed per term.')
+        parser.add_argument('--username', default='bench_search', help='Benchmark user to create (or reuse).')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded user and tasks afterwards.')
+
+    def handle(self, *args, **options):
+        user = get_bench_user(options['username'])
+        existing = Task.objects.filter(user=user).count()
+        if existing < options['tasks']:
+            self.stdout.write(f"Seeding {options['tasks'] - existing} tasks...")
+            seed_tasks(user, options['tasks'] - existing)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE tasks_task')
+
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user=user)
+        url = reverse('task-list-create')
+        backend = TaskFilterBackend()
+
+        self.stdout.write(f'Database: {connection.vendor}')
+        self.stdout.write(f"{'term':<24} {'matches':>8} {'query (ms)':>12} {'request (ms)':>14}")
+        for term in options['term'] or ['4242', 'seeded benchmarking', 'nonexistentword']:
+            queryset = backend._search(Task.objects.filter(user=user), term)
+            matches = queryset.count()
+            query_stats = time_call(lambda: list(queryset.order_by('-created_at', '-id')[:10]), options['repeat'])
+            request_url = f"{url}?{urlencode({'search': term, 'pagination': 'cursor'})}"
+            request_stats = time_call(lambda: client.get(request_url), options['repeat'])
+            self.stdout.write(
+                f"{term:<24} {matches:>8} {query_stats['median_ms']:>12.2f} {request_stats['median_ms']:>14.2f}"
+            )
+
+        if not options['keep']:
+            user.delete()
@@ -0,0 +1,64 @@
+# backend/tasks/management/commands/benchmark_serialization.py
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from tasks.benchmarking import get_bench_user, seed_tasks, time_call
+from tasks.models import Task
+from tasks.renderers import FastJSONRenderer
+from tasks.serializers import TaskSerializer, task_row_encoder
+
+# benchmark_serialization
+# Time to turn 1,000 tasks into a JSON response body, with the query excluded:
+# - `TaskSerializer(many=True).data` rendered by DRF's `JSONRenderer` (the full path),
+# - `task_row_encoder` over `.values()` rows rendered by `FastJSONRenderer` (the list
+#   fast path).
+# Both steps are timed separately, and the command checks the two bodies are identical.
+#
+# Usage:
+#   python manage.py benchmark_serialization --tasks 1000 --repeat 20
+class Command(BaseCommand):
+    help = 'Benchmark TaskSerializer vs the .values()/orjson fast path per 1,000 tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000, help='Tasks serialized per run.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per step.')
+        parser.add_argument('--username', default='bench_serialization', help='Benchmark user to create (or reuse).')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded user and tasks afterwards.')
+
+    def handle(self, *args, **options):
+        user = get_bench_user(options['username'])
+        missing = options['tasks'] - Task.objects.filter(user=user).count()
+        if missing > 0:
+            seed_tasks(user, missing)
+        queryset = TaskSerializer.setup_queryset(Task.objects.filter(user=user)).order_by('-created_at', '-id')
+        queryset = queryset[:options['tasks']]
+        # Fetched once up front: only serialization and rendering are timed.
+        tasks = list(queryset)
+        rows = list(task_row_encoder.values(queryset))
+
+        full_data = TaskSerializer(tasks, many=True).data
+        fast_data = task_row_encoder.encode(rows)
+        if JSONRenderer().render(full_data) != FastJSONRenderer().render(fast_data):
+            raise CommandError('The fast path produced a different response body.')
+
+        scale = 1000 / len(tasks)
+        timings = {
+            'TaskSerializer': (
+                time_call(lambda: TaskSerializer(tasks, many=True).data, options['repeat']),
+                time_call(lambda: JSONRenderer().render(full_data), options['repeat']),
+            ),
+            'fast path': (
+                time_call(lambda: task_row_encoder.encode(rows), options['repeat']),
+                time_call(lambda: FastJSONRenderer().render(fast_data), options['repeat']),
+            ),
+        }
+        self.stdout.write(f'{len(tasks)} tasks; median milliseconds per 1,000 tasks')
+        self.stdout.write(f"{'path':<16} {'serialize':>10} {'render':>8} {'total':>8}")
+        for name, (serialize, render) in timings.items():
+            serialize_ms = serialize['median_ms'] * scale
+            render_ms = render['median_ms'] * scale
+            self.stdout.write(f'{name:<16} {serialize_ms:>10.2f} {render_ms:>8.2f} {serialize_ms + render_ms:>8.2f}')
+
+        if not options['keep']:
+            user.delete()
@@ -0,0 +1,133 @@
+# backend/tasks/management/commands/benchmark_task_tree.py
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, Q
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tasks.benchmarking import count_queries, get_bench_user, time_call
+from tasks.models import Task
+from tasks.serializers import task_row_encoder
+from tasks.tree import descendants_of
+
+# benchmark_task_tree
+# Subtask queries on one large tree: a root task with `--branching` subtasks per
+# task, `--depth` levels deep (11,111 tasks with the defaults). Measures, each
+# against reading the tree one level at a time (`parent__in` the previous level):
+# - the rows of the whole subtree, and `/api/tasks/<id>/tree/` on top of them,
+# - the subtree's counts by status (one aggregate over the path prefix),
+# - moving a subtree of `branching ** (depth - 1)` tasks to another parent and back,
+# - a page of `/api/tasks/?parent=<root>&nest=N`.
+#
+# Usage:
+#   python manage.py benchmark_task_tree --branching 10 --depth 4 --repeat 10
+#
+# The tree is seeded once for the `bench_tree` user and reused by later runs with
+# the same shape; `--reset` deletes it first.
+class Command(BaseCommand):
+    help = 'Benchmark subtree reads, counts, moves and nested lists on a large task tree.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branching', type=int, default=10, help='Subtasks per task.')
+        parser.add_argument('--depth', type=int, default=4, help='Levels below the root.')
+        parser.add_argument('--nest', type=int, default=3, help='`?nest=` levels for the list.')
+        parser.add_argument('--repeat', type=int, default=10, help='Timed runs per measurement.')
+        parser.add_argument('--reset', action='store_true', help='Delete and reseed the tree.')
+
+    def handle(self, *args, **options):
+        user = get_bench_user('bench_tree')
+        if options['reset']:
+            Task.objects.filter(user=user).delete()
+        size = sum(options['branching'] ** level for level in range(options['depth'] + 1))
+        root = Task.objects.filter(user=user, parent=None, title='Tree root').first()
+        if root is None or root.descendants().count() != size - 1:
+            Task.objects.filter(user=user).delete()
+            root = self._seed(user, options['branching'], options['depth'])
+        self.stdout.write(f'Tree of {size} tasks, {options["depth"]} levels below the root ({connection.vendor})')
+
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user=user)
+        repeat = options['repeat']
+
+        self._report(
+            'subtree rows, path prefix',
+            lambda: list(task_row_encoder.values(descendants_of(user, [(root.pk, root.path)]))),
+            repeat,
+        )
+        self._report('subtree rows, per level', lambda: self._per_level(root, options['depth']), repeat)
+        tree_url = reverse('task-tree', args=[root.pk])
+        self._report('tree view (rows, nesting, JSON)', lambda: client.get(tree_url), repeat)
+
+        statuses = [value for value, _ in Task.STATUS_CHOICES]
+        counts = {value: Count('id', filter=Q(status=value)) for value in statuses}
+        self._report('counts, path prefix', lambda: root.descendants().aggregate(**counts), repeat)
+        self._report(
+            'counts, per level',
+            lambda: [
+                Task.objects.filter(pk__in=ids).aggregate(**counts)
+                for ids in self._per_level(root, options['depth'], flat=True)
+            ],
+            repeat,
+        )
+
+        first, second = root.children.order_by('id')[:2]
+        moved = first.children.order_by('id').first() or first
+
+        def move_and_back():
+            for parent in (second, first):
+                task = Task.objects.get(pk=moved.pk)
+                task.parent = parent
+                task.save(update_fields=['parent'])
+
+        self._report(f'move {moved.descendants().count() + 1} tasks and back', move_and_back, repeat)
+
+        list_url = reverse('task-list-create')
+        params = {'parent': root.pk, 'nest': options['nest']}
+        # The page cache is cleared before every run, so each one reads the database.
+        self._report(f'list ?nest={options["nest"]}', lambda: client.get(list_url, params), repeat, clear_cache=True)
+        self._report(
+            f'list + {options["nest"]} levels, per level',
+            lambda: (client.get(list_url, {'parent': root.pk}), self._per_level(root, options['nest'] + 1)),
+            repeat, clear_cache=True,
+        )
+
+    def _seed(self, user, branching, depth):
+        root = Task.objects.create(user=user, title='Tree root')
+        level = [root]
+        for number in range(1, depth + 1):
+            level = Task.objects.bulk_create(
+                [
+                    Task(user=user, parent=parent, title=f'Level {number} task {i}',
+                         status=Task.STATUS_CHOICES[i % len(Task.STATUS_CHOICES)][0])
+                    for parent in level for i in range(branching)
+                ],
+                batch_size=5000,
+            )
+        return root
+
+    # The subtree read level by level: one query per level, as without paths.
+    def _per_level(self, root, depth, flat=False):
+        levels, ids = [], [root.pk]
+        for _ in range(depth):
+            if flat:
+                ids = list(Task.objects.filter(parent__in=ids).values_list('id', flat=True))
+            else:
+                ids = [row['id'] for row in task_row_encoder.values(Task.objects.filter(parent__in=ids))]
+            levels.append(ids)
+        return levels
+
+    def _report(self, label, func, repeat, clear_cache=False):
+        def run():
+            if clear_cache:
+                cache.clear()
+            func()
+
+        with count_queries() as counter:
+            run()
+        stats = time_call(run, repeat=repeat)
+        self.stdout.write(
+            f"{label:<32} median {stats['median_ms']:8.2f} ms  max {stats['max_ms']:8.2f} ms  "
+            f"{counter['queries']} queries"
+        )
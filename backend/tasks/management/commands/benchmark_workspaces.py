@@ -0,0 +1,92 @@
+# backend/tasks/management/commands/benchmark_workspaces.py
+
+from itertools import count
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tasks.benchmarking import count_queries, get_bench_user, seed_tasks, time_call
+from tasks.models import Task
+from tasks.serializers import TaskSerializer, task_row_encoder
+from users.models import Membership, Workspace
+from users.workspaces import forget_workspace_ids
+
+# benchmark_workspaces
+# The task list of a member of many workspaces against that of a user with only
+# private tasks, both seeing `--tasks` tasks. The member owns half of them; the
+# other half are spread over `--workspaces` workspaces. Times, for each user:
+# - the page query of `/api/tasks/` on its own (`.values()` rows, newest first),
+# - the whole request, with the page cache bypassed,
+# and prints the member's page query plan on PostgreSQL.
+#
+# Usage:
+#   python manage.py benchmark_workspaces --tasks 100000 --workspaces 50 --repeat 20
+#
+# The seeded users, workspaces and tasks are deleted afterwards unless `--keep` is given.
+class Command(BaseCommand):
+    help = 'Benchmark the task list for a member of many workspaces against a single user.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=100000, help='Tasks visible to each benchmark user.')
+        parser.add_argument('--workspaces', type=int, default=50, help='Workspaces the member belongs to.')
+        parser.add_argument('--page-size', type=int, default=10, help='Page size of the list.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per measurement.')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data afterwards.')
+
+    def handle(self, *args, **options):
+        solo, member, owner = (get_bench_user(f'bench_workspaces_{name}') for name in ('solo', 'member', 'owner'))
+        users = [solo, member, owner]
+        if not Task.objects.filter(user=solo).exists():
+            self._seed(solo, member, owner, options)
+        self.stdout.write(
+            f"{options['tasks']} tasks per user, member of {options['workspaces']} workspaces ({connection.vendor})"
+        )
+
+        requests = count()
+        for label, user in (('single user', solo), ('member', member)):
+            queryset = TaskSerializer.setup_queryset(Task.objects.visible_to(user)).order_by('-created_at', '-id')
+            rows = task_row_encoder.values(queryset)[:options['page_size']]
+            page = time_call(lambda: list(rows.all()), repeat=options['repeat'])
+
+            client = APIClient(SERVER_NAME='localhost')
+            client.force_authenticate(user=user)
+            url = reverse('task-list-create')
+            # A query string never seen before misses the page cache.
+            fetch = lambda: client.get(url, {'page_size': options['page_size'], 'run': next(requests)})  # noqa: E731
+            fetch()
+            with count_queries() as counter:
+                fetch()
+            request = time_call(fetch, repeat=options['repeat'])
+            self.stdout.write(
+                f"{label:<12} page query median {page['median_ms']:7.2f} ms   "
+                f"request median {request['median_ms']:7.2f} ms, {counter['queries']} queries"
+            )
+            if label == 'member' and connection.vendor == 'postgresql':
+                self.stdout.write(rows.explain())
+
+        if not options['keep']:
+            Task.objects.filter(user__in=users).delete()
+            Workspace.objects.filter(memberships__user=member).delete()
+            for user in users:
+                user.delete()
+
+    def _seed(self, solo, member, owner, options):
+        half = options['tasks'] // 2
+        seed_tasks(solo, options['tasks'])
+        seed_tasks(member, half)
+        seed_tasks(owner, options['tasks'] - half)
+        workspaces = Workspace.objects.bulk_create(
+            [Workspace(name=f'Bench workspace {i}', created_by=owner) for i in range(options['workspaces'])]
+        )
+        Membership.objects.bulk_create(
+            [Membership(workspace=workspace, user=member) for workspace in workspaces]
+            + [Membership(workspace=workspace, user=owner, role=Membership.OWNER) for workspace in workspaces]
+        )
+        ids = list(Task.objects.filter(user=owner).order_by('id').values_list('id', flat=True))
+        for index, workspace in enumerate(workspaces):
+            Task.objects.filter(pk__in=ids[index::len(workspaces)]).update(workspace=workspace)
+        # `bulk_create` sends no signals.
+        for user in (member, owner):
+            forget_workspace_ids(user.pk)
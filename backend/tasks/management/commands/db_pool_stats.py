@@ -0,0 +1,36 @@
+# backend/tasks/management/commands/db_pool_stats.py
+
+from django.core.management.base import BaseCommand
+
+from backend.dbpool import pool_stats
+
+# db_pool_stats
+# Prints the connection pool counters of this process (see backend/dbpool.py).
+# A fresh process has only the connections it opens itself, so this is mostly
+# useful from a long-running shell or with `--requests` to warm the pool first.
+#
+# Usage:
+#   python manage.py db_pool_stats --requests 200
+class Command(BaseCommand):
+    help = 'Show database connection pool statistics, including time spent waiting for a connection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=0,
+                            help='Run this many trivial queries through the pool first.')
+
+    def handle(self, *args, **options):
+        from django.db import connection
+
+        for _ in range(options['requests']):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.close()  # Returns the connection to the pool.
+
+        stats = pool_stats()
+        if not stats:
+            self.stdout.write('No connection pools are configured (set DB_POOL=True with PostgreSQL).')
+            return
+        for alias, alias_stats in stats.items():
+            self.stdout.write(f'{alias}:')
+            for name, value in sorted(alias_stats.items()):
+                self.stdout.write(f'  {name:<24} {value:.2f}' if isinstance(value, float) else f'  {name:<24} {value}')
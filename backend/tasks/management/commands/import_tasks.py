@@ -0,0 +1,56 @@
+# backend/tasks/management/commands/import_tasks.py
+
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.importing import IMPORT_FORMATS, import_tasks
+
+# import_tasks
+# Loads tasks for one user from a CSV or NDJSON file (or '-' for stdin), e.g.
+# when migrating a customer from another tool:
+#
+#   python manage.py import_tasks tasks.csv --user alice
+#   zcat tasks.ndjson.gz | python manage.py import_tasks - --user alice --format ndjson
+#
+# Same pipeline as `POST /api/tasks/import/` (see tasks/importing.py): invalid rows
+# are reported and skipped, and the throughput is printed at the end.
+class Command(BaseCommand):
+    help = 'Import tasks for a user from a CSV or NDJSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' to read from stdin.")
+        parser.add_argument('--user', required=True, help='Username of the owner of the imported tasks.')
+        parser.add_argument('--format', choices=IMPORT_FORMATS,
+                            help='Input format (default: from the file extension).')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows validated and written per batch.')
+        parser.add_argument('--show-errors', type=int, default=20, help='How many row errors to print.')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User \"{options['user']}\" does not exist.")
+
+        path = options['path']
+        import_format = options['format'] or path.rsplit('.', 1)[-1].lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError(f'Cannot tell the format of "{path}"; pass --format.')
+
+        if path == '-':
+            report = import_tasks(user, sys.stdin.buffer, import_format, batch_size=options['batch_size'])
+        else:
+            try:
+                stream = open(path, 'rb')
+            except OSError as exc:
+                raise CommandError(str(exc))
+            with stream:
+                report = import_tasks(user, stream, import_format, batch_size=options['batch_size'])
+
+        for error in report.errors[:options['show_errors']]:
+            self.stdout.write(f"  line {error['line']}: {error['errors']}")
+        self.stdout.write(
+            f'Imported {report.imported} tasks, {report.failed} rows failed, '
+            f'in {report.seconds:.2f}s ({report.rows_per_second:.0f} rows/s).'
+        )
@@ -0,0 +1,125 @@
+# backend/tasks/management/commands/loadtest.py
+
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.benchmarking import get_bench_user, percentile, seed_tasks
+from tasks.models import Task
+from users.serializers import MyTokenObtainPairSerializer
+
+# loadtest
+# Drives a running server with many concurrent keep-alive connections and reports
+# requests/sec and latency percentiles. Used to compare the sync endpoints under
+# WSGI with the async endpoints under ASGI. Start the server(s) against the same
+# database this command uses, then point the command at them, e.g.:
+#
+#   gunicorn backend.wsgi -w 4 -b 127.0.0.1:8001
+#   uvicorn backend.asgi:application --workers 4 --port 8002
+#
+#   python manage.py loadtest http://127.0.0.1:8001/api/tasks/ --connections 500
+#   python manage.py loadtest http://127.0.0.1:8002/api/async/tasks/ --connections 500
+#
+# The command creates (or reuses) a benchmark user with some tasks and sends that
+# user's access token with every request. The HTTP client is a minimal HTTP/1.1
+# implementation on asyncio streams, so no extra dependencies are needed.
+class Command(BaseCommand):
+    help = 'Load-test a running server with concurrent connections and report throughput and latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Full URL to request, e.g. http://127.0.0.1:8000/api/tasks/')
+        parser.add_argument('--connections', type=int, default=500, help='Concurrent connections.')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run for.')
+        parser.add_argument('--tasks', type=int, default=100, help='Tasks to seed for the benchmark user.')
+        parser.add_argument('--username', default='bench_load', help='Benchmark user to create (or reuse).')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('Only plain http:// URLs are supported.')
+
+        user = get_bench_user(options['username'])
+        missing = options['tasks'] - Task.objects.filter(user=user).count()
+        if missing > 0:
+            seed_tasks(user, missing)
+        token = str(MyTokenObtainPairSerializer.get_token(user).access_token)
+
+        target = (url.hostname, url.port or 80, url.path + (f'?{url.query}' if url.query else ''))
+        latencies, errors, elapsed = asyncio.run(
+            self._run(target, token, options['connections'], options['duration'])
+        )
+        if not latencies:
+            raise CommandError(f'No successful requests ({errors} errors).')
+
+        latencies.sort()
+        self.stdout.write(f"{options['url']} with {options['connections']} connections for {elapsed:.1f}s")
+        self.stdout.write(f'  requests:   {len(latencies)} ok, {errors} errors')
+        self.stdout.write(f'  throughput: {len(latencies) / elapsed:.1f} req/s')
+        self.stdout.write(f'  latency:    p50 {percentile(latencies, 50):.1f} ms, '
+                          f'p99 {percentile(latencies, 99):.1f} ms, max {latencies[-1]:.1f} ms, '
+                          f'mean {statistics.fmean(latencies):.1f} ms')
+
+    async def _run(self, target, token, connections, duration):
+        latencies, errors = [], [0]
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            self._connection(target, token, deadline, latencies, errors) for _ in range(connections)
+        ))
+        return latencies, errors[0], time.perf_counter() - started
+
+    # One keep-alive connection sending requests back to back until the deadline.
+    async def _connection(self, target, token, deadline, latencies, errors):
+        host, port, path = target
+        request = (
+            f'GET {path} HTTP/1.1\r\nHost: {host}\r\nAuthorization: Bearer {token}\r\n'
+            f'Accept: application/json\r\nConnection: keep-alive\r\n\r\n'
+        ).encode()
+        reader = writer = None
+        while time.perf_counter() < deadline:
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                sent = time.perf_counter()
+                writer.write(request)
+                await writer.drain()
+                status, keep_alive = await _read_response(reader)
+                if status == 200:
+                    latencies.append((time.perf_counter() - sent) * 1000)
+                else:
+                    errors[0] += 1
+                if not keep_alive:
+                    writer.close()
+                    writer = None
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                errors[0] += 1
+                if writer is not None:
+                    writer.close()
+                writer = None
+                await asyncio.sleep(0.01)
+        if writer is not None:
+            writer.close()
+
+
+# Reads one HTTP/1.1 response; returns (status code, whether the connection stays open).
+async def _read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip().lower()
+    if headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(int(headers.get('content-length', '0')))
+    return status, headers.get('connection') != 'close'
@@ -0,0 +1,21 @@
+# backend/tasks/management/commands/prune_task_tombstones.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.models import TaskTombstone
+
+# prune_task_tombstones
+# Deletes tombstones older than `TASKS_TOMBSTONE_RETENTION_DAYS`. Delta sync
+# rejects `since` values older than that horizon anyway, so these rows are no
+# longer needed. Meant to be run periodically (e.g. daily from cron).
+class Command(BaseCommand):
+    help = 'Delete task tombstones older than the delta sync retention period.'
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=settings.TASKS_TOMBSTONE_RETENTION_DAYS)
+        deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(f'Deleted {deleted} tombstones older than {cutoff:%Y-%m-%d %H:%M}.')
@@ -0,0 +1,56 @@
+# backend/tasks/management/commands/rebuild_task_stats.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.models import Task, TaskDueDateCount, TaskStats
+
+# rebuild_task_stats
+# Recomputes the `/api/tasks/stats/` counters (`TaskStats`, `TaskDueDateCount`)
+# from the tasks table. The counters are maintained on every write, so this is
+# only needed after writes that bypassed the ORM (raw SQL, restores) or to check
+# that nothing has drifted:
+#
+#   python manage.py rebuild_task_stats            rebuild every user's counters
+#   python manage.py rebuild_task_stats --verify   only compare, exit 1 on drift
+#   python manage.py rebuild_task_stats --user 42  limit to some user ids
+class Command(BaseCommand):
+    help = 'Rebuild (or verify) the per-user task statistics counters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='Only check the counters; change nothing.')
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='User id (repeatable).')
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids'] or sorted(
+            set(Task.objects.order_by().values_list('user_id', flat=True).distinct())
+            | set(TaskStats.objects.values_list('user_id', flat=True))
+            | set(TaskDueDateCount.objects.values_list('user_id', flat=True).distinct())
+        )
+
+        drifted = []
+        for user_id in user_ids:
+            if _stored(user_id) != TaskStats.compute(user_id):
+                drifted.append(user_id)
+                self.stdout.write(f'User {user_id}: counters do not match the tasks.')
+            if not options['verify']:
+                TaskStats.rebuild(user_id)
+
+        if options['verify']:
+            if drifted:
+                raise CommandError(f'{len(drifted)} of {len(user_ids)} users have stale task counters.')
+            self.stdout.write(f'Checked {len(user_ids)} users: all task counters are correct.')
+        else:
+            self.stdout.write(f'Rebuilt task counters for {len(user_ids)} users ({len(drifted)} were stale).')
+
+
+# The counters as stored, in the same shape as `TaskStats.compute`.
+# A missing row is built from scratch on the user's next write, and zero due-date
+# rows are left behind by decrements; both mean the same as zero counts.
+def _stored(user_id):
+    stats = TaskStats.objects.filter(user_id=user_id).first()
+    statuses = {value: getattr(stats, value, 0) for value, _ in Task.STATUS_CHOICES}
+    due_dates = dict(
+        TaskDueDateCount.objects.filter(user_id=user_id).exclude(open_count=0).values_list('due_date', 'open_count')
+    )
+    return statuses, due_dates
+
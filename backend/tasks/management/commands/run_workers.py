@@ -0,0 +1,85 @@
+# backend/tasks/management/commands/run_workers.py
+
+import multiprocessing
+import signal
+from queue import Empty
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks.jobs import Worker
+
+# run_workers
+# Runs background jobs (tasks/jobs.py) from the `Job` table until stopped with
+# Ctrl-C or SIGTERM; jobs already claimed are finished first. `--processes` worker
+# processes each run jobs on `--threads` threads:
+#
+#   python manage.py run_workers                              settings.JOBS defaults
+#   python manage.py run_workers --processes 4 --threads 8    PostgreSQL only
+#   python manage.py run_workers --once                       drain the due jobs and exit
+class Command(BaseCommand):
+    help = 'Run background jobs from the job queue.'
+
+    def add_arguments(self, parser):
+        config = settings.JOBS
+        parser.add_argument('--processes', type=int, default=config['PROCESSES'], help='Worker processes.')
+        parser.add_argument('--threads', type=int, default=config['THREADS'], help='Threads per process.')
+        parser.add_argument('--batch-size', type=int, default=config['BATCH_SIZE'], help='Jobs claimed per query.')
+        parser.add_argument('--poll-interval', type=float, default=config['POLL_INTERVAL_SECONDS'],
+                            help='Seconds to wait when no job is due.')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is due.')
+
+    def handle(self, *args, **options):
+        stop = multiprocessing.Event()
+        worker_options = {key: options[key] for key in ('threads', 'batch_size', 'poll_interval', 'once')}
+        previous = {sig: signal.signal(sig, lambda *args: stop.set()) for sig in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            if options['processes'] <= 1:
+                counts = run_worker(stop, worker_options)
+            else:
+                # Child processes must not share this process's database connections.
+                connections.close_all()
+                queue = multiprocessing.Queue()
+                processes = [
+                    multiprocessing.Process(target=_worker_process, args=(stop, worker_options, queue))
+                    for _ in range(options['processes'])
+                ]
+                for process in processes:
+                    process.start()
+                for process in processes:
+                    process.join()
+                counts = {'done': 0, 'retried': 0, 'failed': 0}
+                for _ in processes:
+                    try:
+                        results = queue.get(timeout=1)
+                    except Empty:  # A process that crashed reports nothing.
+                        break
+                    for outcome, count in results.items():
+                        counts[outcome] += count
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+        self.stdout.write(
+            f"Ran {sum(counts.values())} jobs: {counts['done']} done, {counts['retried']} to retry, "
+            f"{counts['failed']} failed."
+        )
+
+
+def run_worker(stop, options):
+    worker = Worker(threads=options['threads'], batch_size=options['batch_size'], poll_interval=options['poll_interval'])
+    return worker.run(stop, once=options['once'])
+
+
+def _worker_process(stop, options, queue):
+    # Ctrl-C reaches the whole process group: let the parent decide when to stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    django.setup()
+    counts = {}
+    try:
+        counts = run_worker(stop, options)
+    finally:
+        queue.put(counts)
+        connections.close_all()
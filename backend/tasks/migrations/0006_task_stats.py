@@ -0,0 +1,74 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+CLOSED_STATUSES = ['completed', 'cancelled']
+
+
+# Fills the new counter tables from the existing tasks, two grouped queries in total.
+def backfill_task_stats(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskStats = apps.get_model('tasks', 'TaskStats')
+    TaskDueDateCount = apps.get_model('tasks', 'TaskDueDateCount')
+    db = schema_editor.connection.alias
+    tasks = Task.objects.using(db).order_by()
+
+    stats = {}
+    for user_id, status, count in tasks.values_list('user_id', 'status').annotate(n=Count('id')):
+        stats.setdefault(user_id, TaskStats(user_id=user_id))
+        setattr(stats[user_id], status, count)
+    TaskStats.objects.using(db).bulk_create(stats.values(), batch_size=1000)
+
+    due_dates = (
+        tasks.filter(due_date__isnull=False).exclude(status__in=CLOSED_STATUSES)
+        .values_list('user_id', 'due_date').annotate(n=Count('id'))
+    )
+    TaskDueDateCount.objects.using(db).bulk_create(
+        (TaskDueDateCount(user_id=user_id, due_date=due_date, open_count=count) for user_id, due_date, count in due_dates),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_tombstone'),
+        ('users', '0002_tokenclaimsuser'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('pending', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('deferred', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Task statistics',
+                'verbose_name_plural': 'Task statistics',
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskDueDateCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField()),
+                ('open_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_due_date_counts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Task due date count',
+                'verbose_name_plural': 'Task due date counts',
+                'constraints': [models.UniqueConstraint(fields=('user', 'due_date'), name='task_due_date_count_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_task_stats, migrations.RunPython.noop),
+    ]
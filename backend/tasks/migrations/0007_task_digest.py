@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_stats'),
+        ('users', '0002_tokenclaimsuser'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDigest',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_digest', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('digest_date', models.DateField()),
+                ('generated_at', models.DateTimeField()),
+                ('overdue_count', models.PositiveIntegerField(default=0)),
+                ('due_soon_count', models.PositiveIntegerField(default=0)),
+                ('overdue', models.JSONField(default=list)),
+                ('due_soon', models.JSONField(default=list)),
+            ],
+            options={
+                'verbose_name': 'Task digest',
+                'verbose_name_plural': 'Task digests',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('due_date__isnull', False), models.Q(('status__in', ['completed', 'cancelled']), _negated=True)), fields=['user', 'due_date'], name='task_open_due_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtask',
+            name='parent',
+            field=models.BigIntegerField(blank=True, db_column='parent_id', null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='path',
+            field=models.CharField(default='/', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='tasks.task'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='path',
+            field=models.CharField(db_default='/', default='/', editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'path'], name='task_user_path_idx', opclasses=['int8_ops', 'varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_task_hierarchy'),
+        ('users', '0003_workspaces'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_user_path_idx',
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='workspace',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_tasks', to='users.workspace'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='workspace',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tasks', to='users.workspace'),
+        ),
+        migrations.AddField(
+            model_name='tasktombstone',
+            name='workspace_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('workspace__isnull', False)), fields=['workspace', '-created_at', '-id'], name='task_workspace_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['path'], name='task_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='tasktombstone',
+            index=models.Index(condition=models.Q(('workspace_id__isnull', False)), fields=['workspace_id', 'deleted_at'], name='tombstone_ws_deleted_idx'),
+        ),
+    ]
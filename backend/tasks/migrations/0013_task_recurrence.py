@@ -0,0 +1,81 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0012_task_workspaces'),
+        ('users', '0003_workspaces'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskRecurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('rule', models.CharField(max_length=255)),
+                ('starts_on', models.DateField()),
+                ('ends_on', models.DateField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Recurring task',
+                'verbose_name_plural': 'Recurring tasks',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='occurrence_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='recurrence',
+            field=models.BigIntegerField(blank=True, db_column='recurrence_id', null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='occurrence_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(condition=models.Q(('recurrence__isnull', False)), fields=['recurrence', 'occurrence_date'], name='archived_task_occurrence_idx'),
+        ),
+        migrations.AddField(
+            model_name='taskrecurrence',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_recurrences', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='taskrecurrence',
+            name='workspace',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='task_recurrences', to='users.workspace'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='recurrence',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='tasks.taskrecurrence'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('recurrence__isnull', False)), fields=('recurrence', 'occurrence_date'), name='task_occurrence_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='taskrecurrence',
+            index=models.Index(fields=['user', 'starts_on'], name='recurrence_user_starts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskrecurrence',
+            index=models.Index(condition=models.Q(('workspace__isnull', False)), fields=['workspace', 'starts_on'], name='recurrence_ws_starts_idx'),
+        ),
+    ]
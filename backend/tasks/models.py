@@ -1,7 +1,89 @@
 # backend/tasks/models.py
 
-from django.db import models
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, models, router, transaction
 from django.conf import settings # Import settings to access AUTH_USER_MODEL
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.contrib.postgres.search import SearchVectorField # Full-text search column type
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Concat, Length, Replace, Substr
+from django.utils import timezone
+
+from users import workspaces
+from .recurrence import Schedule, last_date, parse_rule
+
+# TaskQuerySet
+# Custom queryset for Task.
+# - Deleting tasks through a queryset (bulk deletes, the admin "delete selected"
+#   action) records a tombstone for every deleted task, so clients syncing with
+#   `/api/tasks/?since=...` learn about the deletion.
+# - Every bulk write path (`bulk_create`, `update`, `delete`) keeps the per-user
+#   counters in `TaskStats` up to date, in the same transaction. `bulk_update` is
+#   covered too, since Django implements it with `update`.
+# - Deleting a task deletes its subtasks (the `parent` foreign key cascades); they
+#   get their tombstones and counter updates too.
+class TaskQuerySet(models.QuerySet):
+    # The tasks `user` may see and edit: their own, and all tasks of the workspaces
+    # they are a member of. The workspace ids come from the cache (see
+    # users/workspaces.py), so this is a plain `user_id = ... OR workspace_id IN (...)`
+    # filter, without a join on memberships. Async callers read the ids first and
+    # pass them as `workspace_ids`.
+    def visible_to(self, user, workspace_ids=None):
+        return self.filter(visible_tasks_q(user, workspace_ids))
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            rows = list(self.order_by().select_for_update().values_list(*DESCENDANT_COLUMNS))
+            if not rows:
+                return 0, {}
+            ids = {row[0] for row in rows}
+            rows += [row for row in descendant_rows(rows, using=self.db) if row[0] not in ids]
+            TaskTombstone.objects.using(self.db).bulk_create([
+                TaskTombstone(task_id=task_id, user_id=user_id, workspace_id=workspace_id)
+                for task_id, user_id, workspace_id, _, _, _ in rows
+            ])
+            result = super().delete()
+            deltas = Counter()
+            for _, user_id, _, status, due_date, _ in rows:
+                count_task(deltas, user_id, status, due_date, -1)
+            TaskStats.apply(deltas, using=self.db)
+            return result
+
+    def bulk_create(self, objs, *args, **kwargs):
+        for task in objs:
+            if task.parent_id is not None:
+                task.path = task.path_under(task.parent)
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            deltas = Counter()
+            for task in objs:
+                count_task(deltas, task.user_id, task.status, task.due_date, 1)
+                task._stats_state = task.stats_state()
+            TaskStats.apply(deltas, using=self.db)
+        return objs
+
+    def update(self, **kwargs):
+        kwargs.setdefault('version', F('version') + 1)
+        if not {'user', 'user_id', 'status', 'due_date'} & kwargs.keys():
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            # Locked, so a concurrent write can't change the rows between this read
+            # and the update, which would count its change twice.
+            before = list(self.order_by().select_for_update().values_list('pk', 'user_id', 'status', 'due_date'))
+            result = super().update(**kwargs)
+            after = self.model._base_manager.using(self.db).filter(pk__in=[row[0] for row in before])
+            deltas = Counter()
+            for _, user_id, status, due_date in before:
+                count_task(deltas, user_id, status, due_date, -1)
+            for _, user_id, status, due_date in after.values_list('pk', 'user_id', 'status', 'due_date'):
+                count_task(deltas, user_id, status, due_date, 1)
+            TaskStats.apply(deltas, using=self.db)
+            return result
+
 
 # Task Model
 # Represents a single task in the task manager application.
@@ -36,6 +118,8 @@ class Task(models.Model):
         choices=STATUS_CHOICES,
         default='pending',
     )
+    # Statuses that count as "done": a done task is never overdue.
+    CLOSED_STATUSES = ['completed', 'cancelled']
 
     # Automatically sets the creation timestamp when the task is first created.
     created_at = models.DateTimeField(auto_now_add=True)
@@ -43,12 +127,596 @@ class Task(models.Model):
     # Automatically updates the timestamp every time the task is saved.
     updated_at = models.DateTimeField(auto_now=True)
 
+    # The workspace the task is shared in (see users/models.py), or None for a
+    # private task. Members of the workspace see and edit it like their own; `user`
+    # stays the member who created it. Deleting the workspace makes its tasks private
+    # to their creators again: the workspace views do that as a versioned update (see
+    # tasks/sharing.py); SET_NULL only covers other deletes.
+    workspace = models.ForeignKey(
+        'users.Workspace', on_delete=models.SET_NULL, blank=True, null=True, related_name='tasks'
+    )
+
+    # Subtasks. `path` is the materialized path of the task's ancestors' ids, root
+    # first: "/" for a top-level task, "/12/40/" for a task whose parent is 40 and
+    # whose grandparent is 12. A task's descendants are then exactly the tasks whose
+    # path starts with its `subtree_prefix` ("/12/40/<id>/"): the whole subtree, or
+    # its status counts, is one prefix query on the path index, and moving a subtree
+    # is one `UPDATE` rewriting that prefix. `save`, `apply_changes` and
+    # `bulk_create` keep the path in step with `parent`.
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, blank=True, null=True, related_name='children')
+    path = models.CharField(max_length=255, default='/', db_default='/', editable=False)
+
+    # Incremented by every write (`save`, `apply_changes`, queryset `update`), so
+    # clients can make an update conditional on the version they last read
+    # (`If-Match`, see `TaskDetailView.update`). The database default covers raw
+    # inserts such as the bulk import.
+    version = models.PositiveIntegerField(default=1, db_default=1, editable=False)
+
+    # Set on a task that stands in for one occurrence of a recurring task (see
+    # `TaskRecurrence`): the series, and the date the occurrence was scheduled for,
+    # which stays as it was if the task's `due_date` is moved. There is at most one
+    # task per occurrence. Deleting the series leaves its tasks as ordinary tasks.
+    recurrence = models.ForeignKey(
+        'TaskRecurrence', on_delete=models.SET_NULL, blank=True, null=True, related_name='occurrences',
+        editable=False,
+    )
+    occurrence_date = models.DateField(blank=True, null=True, editable=False)
+
+    # Pre-computed full-text search document built from `title` and `description`.
+    # On PostgreSQL it is kept up to date by a database trigger and covered by a GIN
+    # index (both created in migration 0004), so searching never scans the table.
+    # It is never set from Python; on other databases it simply stays empty.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = TaskQuerySet.as_manager()
+
     class Meta:
         # Orders tasks by creation date by default, newest first.
         ordering = ['-created_at']
         verbose_name = 'Task'
         verbose_name_plural = 'Tasks'
+        # Composite indexes matching how tasks are actually read.
+        # Queries are scoped to one user, or to a user's workspaces, so `user` or
+        # `workspace` leads the index.
+        indexes = [
+            # The task list, newest first. `-id` is included so the cursor
+            # pagination ordering (-created_at, -id) is served without a sort.
+            models.Index(fields=['user', '-created_at', '-id'], name='task_user_created_idx'),
+            # Filtering or counting a user's tasks by status.
+            models.Index(fields=['user', 'status'], name='task_user_status_idx'),
+            # Due-date lookups (overdue, due this week) for a user.
+            models.Index(fields=['user', 'due_date'], name='task_user_due_date_idx'),
+            # The shared part of the task list (`visible_to`): the tasks of each
+            # workspace, newest first. PostgreSQL combines it with
+            # `task_user_created_idx` in a bitmap OR.
+            models.Index(
+                fields=['workspace', '-created_at', '-id'], name='task_workspace_created_idx',
+                condition=Q(workspace__isnull=False),
+            ),
+            # Subtree lookups: `path LIKE '<prefix>%'`. The prefix starts with the
+            # root's id, so it is selective on its own, whoever owns the subtasks.
+            # The pattern operator class lets PostgreSQL use the index for prefix
+            # matches whatever the database collation; other backends ignore it.
+            models.Index(fields=['path'], name='task_path_idx', opclasses=['varchar_pattern_ops']),
+            # Open tasks with a due date, for the digest builder (tasks/digests.py),
+            # which scans them for a range of users at a time. Completed and cancelled
+            # tasks (`CLOSED_STATUSES`) pile up over time and are left out of the index.
+            models.Index(
+                fields=['user', 'due_date'], name='task_open_due_idx',
+                condition=Q(due_date__isnull=False) & ~Q(status__in=['completed', 'cancelled']),
+            ),
+        ]
+        constraints = [
+            # One task per occurrence; its index also finds the saved occurrences of a
+            # set of series within a date window.
+            models.UniqueConstraint(
+                fields=['recurrence', 'occurrence_date'], name='task_occurrence_uniq',
+                condition=Q(recurrence__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         # String representation of a Task object, useful for admin and debugging.
-        return f"{self.title} ({self.user.username})"
\ No newline at end of file
+        return f"{self.title} ({self.user.username})"
+
+    # The fields the `TaskStats` counters depend on, as (user_id, status, due_date).
+    def stats_state(self):
+        return (self.user_id, self.status, self.due_date)
+
+    # Remember the counted fields as loaded, so `apply_changes` can tell what changed
+    # without reading the row again: its version check ensures the row still has them.
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        task = super().from_db(db, field_names, values)
+        if {'user_id', 'status', 'due_date'} <= set(field_names):
+            task._stats_state = task.stats_state()
+        if 'parent_id' in field_names:
+            task._loaded_parent_id = task.parent_id
+        return task
+
+    # The `path` prefix shared by all of this task's descendants.
+    @property
+    def subtree_prefix(self):
+        return f'{self.path}{self.pk}/'
+
+    # The depth of the task in its tree: 0 for a top-level task.
+    @property
+    def depth(self):
+        return self.path.count('/') - 1
+
+    # The task's descendants, at any depth.
+    def descendants(self):
+        return type(self).objects.filter(path__startswith=self.subtree_prefix)
+
+    # The path this task has as a child of `parent` (a Task, or None for top level).
+    def path_under(self, parent):
+        if parent is None:
+            return '/'
+        if self.pk is not None and (parent.pk == self.pk or parent.path.startswith(self.subtree_prefix)):
+            raise ValueError('A task cannot be moved under itself or one of its subtasks.')
+        return parent.subtree_prefix
+
+    # After this task's path changed from `old_path`: moves its descendants along,
+    # in one `UPDATE` that swaps the old prefix of their paths for the new one.
+    def _move_descendants(self, old_path, using):
+        old_prefix = f'{old_path}{self.pk}/'
+        type(self)._base_manager.using(using).filter(path__startswith=old_prefix).update(
+            path=Concat(Value(self.subtree_prefix), Substr('path', len(old_prefix) + 1)),
+        )
+
+    # Saving updates the owner's counters in the same transaction (see `TaskStats`).
+    # The counted fields are read back from the row, locked until the transaction
+    # ends, rather than taken from when this instance was loaded: another write may
+    # have changed them since, and subtracting the stale values would count that
+    # change twice. Saves with `update_fields` that leave out the owner, status and
+    # due date don't change the counters and cost no extra query.
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        update_fields = kwargs.get('update_fields')
+        counted = update_fields is None or bool({'user', 'user_id', 'status', 'due_date'} & set(update_fields))
+        with transaction.atomic(using=using, savepoint=False):
+            old = None
+            if not self._state.adding and counted:
+                old = type(self)._base_manager.using(using).select_for_update().filter(pk=self.pk).values_list(
+                    'user_id', 'status', 'due_date'
+                ).first()
+            old_path = None
+            if self._state.adding or self.parent_id != getattr(self, '_loaded_parent_id', self.parent_id):
+                old_path = self.path
+                self.path = self.path_under(self.parent)
+            if not self._state.adding:
+                self.version += 1
+                if kwargs.get('update_fields') is not None:
+                    kwargs['update_fields'] = {*kwargs['update_fields'], 'version', 'updated_at', 'path'}
+            adding = self._state.adding
+            super().save(*args, **kwargs)
+            if not adding and old_path is not None and old_path != self.path:
+                self._move_descendants(old_path, using)
+            self._loaded_parent_id = self.parent_id
+            if adding or counted:
+                deltas = Counter()
+                if old is not None:
+                    count_task(deltas, *old, -1)
+                count_task(deltas, *self.stats_state(), 1)
+                TaskStats.apply(deltas, using=using)
+        self._stats_state = self.stats_state()
+
+    # Writes only `changes` (a dict of field values), with one
+    # `UPDATE ... WHERE id = ... AND version = <self.version>`. Returns False, and
+    # changes nothing, if the row no longer has the version this instance was read
+    # with: someone else wrote it in between. Otherwise the instance is updated
+    # and `post_save` is sent as by `save(update_fields=...)`.
+    def apply_changes(self, changes):
+        using = router.db_for_write(type(self), instance=self)
+        now = timezone.now()
+        old_path = self.path
+        if 'parent' in changes:
+            changes = {**changes, 'path': self.path_under(changes['parent'])}
+        with transaction.atomic(using=using, savepoint=False):
+            written = type(self)._base_manager.using(using).filter(pk=self.pk, version=self.version).update(
+                **changes, updated_at=now, version=self.version + 1,
+            )
+            if not written:
+                return False
+            old = getattr(self, '_stats_state', None) or self.stats_state()
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self.updated_at = now
+            self.version += 1
+            if self.path != old_path:
+                self._move_descendants(old_path, using)
+            self._loaded_parent_id = self.parent_id
+            if self.stats_state() != old:
+                deltas = Counter()
+                count_task(deltas, *old, -1)
+                count_task(deltas, *self.stats_state(), 1)
+                TaskStats.apply(deltas, using=using)
+            self._stats_state = self.stats_state()
+            models.signals.post_save.send(
+                sender=type(self), instance=self, created=False, update_fields=frozenset(changes),
+                raw=False, using=using,
+            )
+        return True
+
+    # Deleting a single task also leaves a tombstone behind (see `TaskQuerySet.delete`)
+    # and updates the owner's counters. Its subtasks are deleted first, the same way.
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            self.descendants().using(using).delete()
+            TaskTombstone.objects.using(using).create(
+                task_id=self.pk, user_id=self.user_id, workspace_id=self.workspace_id,
+            )
+            # As in `save`, the counted fields are those of the row, read under a lock.
+            old = type(self)._base_manager.using(using).select_for_update().filter(pk=self.pk).values_list(
+                'user_id', 'status', 'due_date'
+            ).first()
+            result = super().delete(using=using, keep_parents=keep_parents)
+            if old is not None:
+                deltas = Counter()
+                count_task(deltas, *old, -1)
+                TaskStats.apply(deltas, using=using)
+            return result
+
+
+# TaskRecurrence Model
+# A repeating task ("every Monday", "on the last day of every month"), stored once:
+# its title and description, a recurrence rule (the RRULE subset of
+# tasks/recurrence.py) and the date of its first occurrence. Occurrences are not
+# stored. The task list and the digests work out the ones that fall in the dates they
+# cover when they are read (see tasks/occurrences.py), so a daily series costs one
+# row however far ahead anyone looks. An occurrence becomes a `Task` only once it is
+# completed or edited (`/api/tasks/recurring/<id>/occurrences/<date>/`), and that task
+# is listed in its place from then on.
+# `ends_on` is the last date the rule allows (its UNTIL date or COUNT-th occurrence,
+# None for no end); `save` keeps it up to date, so queries can skip ended series.
+class TaskRecurrence(models.Model):
+    # The creator, who owns the tasks saved for its occurrences.
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='task_recurrences')
+    # Shared like a task: members of the workspace see and edit the series and its
+    # occurrences.
+    workspace = models.ForeignKey(
+        'users.Workspace', on_delete=models.SET_NULL, blank=True, null=True, related_name='task_recurrences'
+    )
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    # Normalized RRULE text, e.g. "FREQ=WEEKLY;BYDAY=MO,WE".
+    rule = models.CharField(max_length=255)
+    starts_on = models.DateField()
+    ends_on = models.DateField(blank=True, null=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Recurring task'
+        verbose_name_plural = 'Recurring tasks'
+        indexes = [
+            # A user's series, and those of each workspace, that have started by the
+            # end of a window.
+            models.Index(fields=['user', 'starts_on'], name='recurrence_user_starts_idx'),
+            models.Index(
+                fields=['workspace', 'starts_on'], name='recurrence_ws_starts_idx',
+                condition=Q(workspace__isnull=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.rule})"
+
+    # The series' occurrences (see `recurrence.Schedule`).
+    @property
+    def schedule(self):
+        return Schedule(parse_rule(self.rule), self.starts_on, self.ends_on)
+
+    # Model validation (the admin) normalizes the rule as the API does.
+    def clean(self):
+        try:
+            self.rule = str(parse_rule(self.rule))
+        except ValueError as error:
+            raise ValidationError({'rule': str(error)})
+
+    def save(self, *args, **kwargs):
+        self.ends_on = last_date(parse_rule(self.rule), self.starts_on)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'ends_on'}
+        super().save(*args, **kwargs)
+
+    # Filter for the series overlapping the dates from `first` to `last`.
+    @staticmethod
+    def window_q(first, last):
+        return Q(starts_on__lte=last) & (Q(ends_on__isnull=True) | Q(ends_on__gte=first))
+
+
+# TaskTombstone Model
+# Records that a task was deleted, and when.
+# Delta sync (`/api/tasks/?since=<timestamp>`) returns the ids of tasks deleted
+# after the given time, so clients can drop them without re-downloading the list.
+# Tombstones older than `TASKS_TOMBSTONE_RETENTION` are pruned by the
+# `prune_task_tombstones` management command; clients that last synced before
+# that horizon are told to do a full refetch instead.
+class TaskTombstone(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='task_tombstones')
+    # The id the deleted task had. Not a foreign key, since the task no longer exists.
+    task_id = models.BigIntegerField()
+    # The workspace the task was shared in, so its members learn about the deletion.
+    # Not a foreign key either: tombstones outlive workspaces as they do tasks.
+    workspace_id = models.BigIntegerField(blank=True, null=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Task tombstone'
+        verbose_name_plural = 'Task tombstones'
+        indexes = [
+            # "Deleted since" lookups for one user.
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+            # ... and for one workspace.
+            models.Index(
+                fields=['workspace_id', 'deleted_at'], name='tombstone_ws_deleted_idx',
+                condition=Q(workspace_id__isnull=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Task {self.task_id} deleted at {self.deleted_at}"
+
+
+# SQL expression for the depth of a task (see `Task.depth`) from its `path`.
+def path_depth(field='path'):
+    return Length(field) - Length(Replace(field, Value('/'), Value(''))) - 1
+
+
+# Filter for the tasks (or archived tasks, or tombstones) `user` has access to:
+# their own, and those of the workspaces they are a member of.
+def visible_tasks_q(user, workspace_ids=None):
+    if workspace_ids is None:
+        workspace_ids = workspaces.workspace_ids(user)
+    if not workspace_ids:
+        return Q(user=user)
+    return Q(user=user) | Q(workspace_id__in=workspace_ids)
+
+
+# Columns read for tasks being deleted, see `descendant_rows`.
+DESCENDANT_COLUMNS = ['id', 'user_id', 'workspace_id', 'status', 'due_date', 'path']
+
+
+# The `DESCENDANT_COLUMNS` rows of every descendant of the tasks in `rows` (same
+# shape), one prefix query per 500 tasks.
+def descendant_rows(rows, using=None):
+    found = {}
+    for start in range(0, len(rows), 500):
+        subtrees = [Q(path__startswith=f'{row[-1]}{row[0]}/') for row in rows[start:start + 500]]
+        for row in Task._base_manager.using(using).filter(reduce(or_, subtrees)).values_list(*DESCENDANT_COLUMNS):
+            found[row[0]] = row
+    return list(found.values())
+
+
+# Adds one task's contribution to the counters to `deltas` (`sign` is 1 or -1).
+# Keys are (user_id, status, None) for the status counters and
+# (user_id, None, due_date) for the open-tasks-per-due-date counters.
+def count_task(deltas, user_id, status, due_date, sign):
+    deltas[(user_id, status, None)] += sign
+    if due_date is not None and status not in Task.CLOSED_STATUSES:
+        deltas[(user_id, None, due_date)] += sign
+
+
+# TaskStats Model
+# Per-user task counters behind `/api/tasks/stats/`: how many of the user's tasks
+# are in each status. Together with `TaskDueDateCount` this answers the dashboard
+# numbers without scanning the user's tasks.
+# The counters are changed in the same transaction as the task writes themselves
+# (`Task.save`/`delete` and the `TaskQuerySet` bulk methods), with `F()` increments
+# so concurrent writers don't lose updates. A user without a row yet (or whose row
+# was removed) gets one computed from scratch on their next write. The
+# `rebuild_task_stats` command recomputes and verifies all of them.
+class TaskStats(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='task_stats',
+    )
+    # One counter per `Task.STATUS_CHOICES` value, named after the status.
+    pending = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    deferred = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Task statistics'
+        verbose_name_plural = 'Task statistics'
+
+    def __str__(self):
+        return f"Task statistics for user {self.user_id}"
+
+    # Applies counter changes built with `count_task`. Must run inside the
+    # transaction that wrote the tasks.
+    @classmethod
+    def apply(cls, deltas, using=None):
+        by_user = {}
+        for (user_id, status, due_date), delta in deltas.items():
+            if delta:
+                by_user.setdefault(user_id, []).append((status, due_date, delta))
+        for user_id, changes in by_user.items():
+            status_changes = {status: F(status) + delta for status, _, delta in changes if status is not None}
+            if status_changes:
+                updated = cls.objects.using(using).filter(user_id=user_id).update(**status_changes)
+            else:
+                updated = cls.objects.using(using).filter(user_id=user_id).exists()
+            if not updated:
+                # No counters yet: compute them from the tasks, which already
+                # include this write.
+                cls.rebuild(user_id, using=using)
+                continue
+            for _, due_date, delta in changes:
+                if due_date is not None:
+                    TaskDueDateCount.add(user_id, due_date, delta, using=using)
+
+    # The counters computed from the tasks table:
+    # ({status: count}, {due_date: open task count}).
+    @staticmethod
+    def compute(user_id, using=None):
+        tasks = Task._base_manager.using(using).filter(user_id=user_id).order_by()
+        statuses = {value: 0 for value, _ in Task.STATUS_CHOICES}
+        statuses.update(tasks.values_list('status').annotate(n=Count('id')))
+        due_dates = dict(
+            tasks.filter(due_date__isnull=False).exclude(status__in=Task.CLOSED_STATUSES)
+            .values_list('due_date').annotate(n=Count('id'))
+        )
+        return statuses, due_dates
+
+    # Replaces a user's counters with freshly computed ones.
+    @classmethod
+    def rebuild(cls, user_id, using=None):
+        with transaction.atomic(using=using):
+            statuses, due_dates = cls.compute(user_id, using=using)
+            cls.objects.using(using).update_or_create(user_id=user_id, defaults=statuses)
+            TaskDueDateCount.objects.using(using).filter(user_id=user_id).delete()
+            TaskDueDateCount.objects.using(using).bulk_create([
+                TaskDueDateCount(user_id=user_id, due_date=due_date, open_count=count)
+                for due_date, count in due_dates.items()
+            ])
+
+
+# TaskDueDateCount Model
+# How many of a user's open (not completed/cancelled) tasks are due on each date.
+# "Overdue" and "due this week" depend on today's date, so they can't be stored as
+# plain counters; they are sums over these rows instead, which is proportional to
+# the number of distinct due dates rather than the number of tasks. Maintained
+# together with `TaskStats`.
+class TaskDueDateCount(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='task_due_date_counts')
+    due_date = models.DateField()
+    open_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Task due date count'
+        verbose_name_plural = 'Task due date counts'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'due_date'], name='task_due_date_count_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.open_count} open tasks due {self.due_date} for user {self.user_id}"
+
+    @classmethod
+    def add(cls, user_id, due_date, delta, using=None):
+        rows = cls.objects.using(using).filter(user_id=user_id, due_date=due_date)
+        if rows.update(open_count=F('open_count') + delta):
+            return
+        try:
+            with transaction.atomic(using=using):
+                cls.objects.using(using).create(user_id=user_id, due_date=due_date, open_count=delta)
+        except IntegrityError:
+            # Another transaction created the row in the meantime.
+            rows.update(open_count=F('open_count') + delta)
+
+
+# TaskDigest Model
+# A user's overdue and due-soon open tasks, precomputed by `build_task_digests`
+# (see tasks/digests.py) and served as-is by `/api/tasks/digest/`. Each section
+# keeps its total count and the first `TASK_DIGESTS['MAX_ITEMS']` tasks by due
+# date. Users with nothing overdue or due soon have no row.
+class TaskDigest(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='task_digest',
+    )
+    # The day the digest was computed for ("overdue" is relative to it).
+    digest_date = models.DateField()
+    generated_at = models.DateTimeField()
+    overdue_count = models.PositiveIntegerField(default=0)
+    due_soon_count = models.PositiveIntegerField(default=0)
+    # Lists of {"id", "title", "due_date", "status"}, earliest due date first.
+    # Occurrences of recurring tasks not saved as tasks have `id` None and the
+    # series id under `recurrence`.
+    overdue = models.JSONField(default=list)
+    due_soon = models.JSONField(default=list)
+
+    class Meta:
+        verbose_name = 'Task digest'
+        verbose_name_plural = 'Task digests'
+
+    def __str__(self):
+        return f"Digest for user {self.user_id} on {self.digest_date}"
+
+
+# ArchivedTask Model
+# Completed and cancelled tasks moved out of the live `Task` table by
+# `archive_tasks` (see tasks/archive.py) once they haven't changed for
+# `TASK_ARCHIVE['AFTER_DAYS']`, so the list, stats and sync queries on the live
+# table don't keep scanning them. Rows keep the task's id and columns unchanged and
+# are read-only; `/api/tasks/?include_archived=true` lists them with the live tasks.
+class ArchivedTask(models.Model):
+    # The id the task had in the live table.
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_tasks')
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    due_date = models.DateField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    # Copied from the live row, so `?search=` keeps working on archived tasks.
+    search_vector = SearchVectorField(null=True, editable=False)
+    version = models.PositiveIntegerField(default=1)
+    workspace = models.ForeignKey(
+        'users.Workspace', on_delete=models.SET_NULL, blank=True, null=True, related_name='archived_tasks'
+    )
+    # The parent's id (no foreign key: it may be archived too) and the task's path.
+    parent = models.BigIntegerField(blank=True, null=True, db_column='parent_id')
+    path = models.CharField(max_length=255, default='/')
+    # The series and occurrence date of an occurrence's task (see `Task.recurrence`);
+    # no foreign key either, the series may be gone.
+    recurrence = models.BigIntegerField(blank=True, null=True, db_column='recurrence_id')
+    occurrence_date = models.DateField(blank=True, null=True)
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Archived task'
+        verbose_name_plural = 'Archived tasks'
+        indexes = [
+            # Same access path as the live list.
+            models.Index(fields=['user', '-created_at', '-id'], name='archived_task_user_created_idx'),
+            # Archived occurrences of a set of series within a date window: they
+            # were completed, so they stay out of the expanded lists too.
+            models.Index(
+                fields=['recurrence', 'occurrence_date'], name='archived_task_occurrence_idx',
+                condition=Q(recurrence__isnull=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.title} (archived, user {self.user_id})"
+
+
+# Job Model
+# A deferred side effect of a write (see tasks/jobs.py): the dotted path of the
+# function to call and its keyword arguments. Rows are inserted by `enqueue` in the
+# writer's transaction, claimed by `run_workers` and deleted once the function has
+# run. A job is due when `run_at` has passed; claiming a job moves `run_at` to the
+# end of its lease, so the job of a worker that died comes back on its own. Jobs
+# that fail `max_attempts` times stay in the table as `failed` for inspection.
+class Job(models.Model):
+    QUEUED = 'queued'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField()
+    run_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # The claim query: queued jobs by due time. Failed jobs are left out.
+            models.Index(fields=['run_at', 'id'], name='job_queued_run_at_idx', condition=Q(status='queued')),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status}, attempt {self.attempts}/{self.max_attempts})"
+
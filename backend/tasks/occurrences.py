@@ -0,0 +1,247 @@
+# backend/tasks/occurrences.py
+
+# Occurrences of recurring tasks (see `TaskRecurrence`), expanded when a list or a
+# digest asks for a range of dates.
+#
+# An occurrence that hasn't been completed or edited is not a row: it is the series'
+# title and description on one of the dates of its rule. Reading the occurrences of
+# a window therefore costs one query for the series overlapping it and one for the
+# occurrences already saved as tasks (live or archived) within it, which are
+# skipped; the dates themselves are computed (tasks/recurrence.py). Counting them is
+# arithmetic per series, and a page only generates the occurrences up to its end, so
+# a list over thousands of daily series does about as much work for a year as for a
+# week. Only the columns that place occurrences are read for every series; the rest
+# (description, owner, timestamps) only for the few series on the page, with a third
+# query.
+
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+from functools import total_ordering
+from itertools import islice
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .models import ArchivedTask, Task, TaskRecurrence
+from .recurrence import Schedule, parse_rule
+from .serializers import task_row_encoder
+
+# Series columns read for every series of a window: its schedule.
+SCHEDULE_COLUMNS = ['id', 'rule', 'starts_on', 'ends_on']
+
+# Series columns an occurrence row is made from.
+SERIES_COLUMNS = [
+    'id', 'user_id', 'user__username', 'workspace', 'title', 'description', 'rule', 'starts_on', 'ends_on',
+    'created_at', 'updated_at',
+]
+
+
+# The `(series id, date)` pairs of the occurrences of `series` (a TaskRecurrence
+# queryset) between `first` and `last` that are saved as tasks, live or archived.
+def saved_occurrences(series, first, last):
+    window = {
+        'recurrence__in': series.order_by().values('pk'), 'recurrence__isnull': False,
+        'occurrence_date__gte': first, 'occurrence_date__lte': last,
+    }
+    live = Task._base_manager.filter(**window).order_by().values_list('recurrence_id', 'occurrence_date')
+    archived = ArchivedTask.objects.filter(**window).order_by().values_list('recurrence', 'occurrence_date')
+    saved = defaultdict(set)
+    for series_id, day in live.union(archived, all=True):
+        saved[series_id].add(day)
+    return saved
+
+
+# Expansion
+# The series of a window with their schedules and saved occurrences, read with the
+# two queries above (none at all for the second if there are no series). Series
+# rows have the `SCHEDULE_COLUMNS` and the given `columns`.
+class Expansion:
+    def __init__(self, series, first, last, columns=()):
+        self.first, self.last = first, last
+        rows = list(
+            series.filter(TaskRecurrence.window_q(first, last)).order_by('id').values(*SCHEDULE_COLUMNS, *columns)
+        )
+        self.saved = saved_occurrences(series, first, last) if rows else {}
+        self.series = [
+            (row, Schedule(parse_rule(row['rule']), row['starts_on'], row['ends_on'])) for row in rows
+        ]
+
+    # The unsaved occurrences of one series from `first` to `last`, in date order.
+    def dates(self, row, schedule, first, last, reverse=False):
+        saved = self.saved.get(row['id'], ())
+        for day in schedule.between(first, last, reverse=reverse):
+            if day not in saved:
+                yield day
+
+    # How many unsaved occurrences one series has from `first` to `last`.
+    def count(self, row, schedule, first, last):
+        saved = sum(
+            first <= day <= last and schedule.includes(day) for day in self.saved.get(row['id'], ())
+        )
+        return schedule.count_between(first, last) - saved
+
+
+# Sorts its value in reverse, for the descending fields of an ordering.
+@total_ordering
+class Descending:
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+# OccurrenceRows
+# A task list's `.values()` rows (`rows`, already filtered and ordered by `ordering`)
+# together with the unsaved occurrences of `series` from `first` to `last`, as one
+# sequence the paginator can count and slice. Occurrences are rows like those of the
+# stored tasks, with `id` None, `recurrence` and `occurrence_date` set, the status
+# "pending" and the series' timestamps; `version` is None, as nothing was written.
+#
+# They are placed by the same ordering as the tasks, occurrences of one series after
+# tasks that compare equal and in date order among themselves. A slice `[a:b]`
+# reads the first `b` task rows from the database and merges them with the first
+# `b` occurrences, taken lazily from every series at once. Merged occurrences carry
+# only the columns the ordering compares; those in the slice are then completed
+# from the rows of their series.
+class OccurrenceRows:
+    def __init__(self, rows, series, first, last, ordering, extra=()):
+        self.rows = rows
+        self.series, self.first, self.last = series, first, last
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-')) for name in ordering if name.lstrip('-') != 'id'
+        ]
+        self.ids_descending = '-id' in ordering
+        # Each series yields its dates in the order the key puts them in.
+        self.reverse = next((descending for name, descending in self.fields if name == 'due_date'), False)
+        self.extra = extra
+        # The series columns the ordering compares occurrences by.
+        self.key_columns = [name for name, _ in self.fields if name in SERIES_COLUMNS]
+        self._expansion = None
+
+    @property
+    def expansion(self):
+        if self._expansion is None:
+            missing = [column for column in self.columns() if column not in OCCURRENCE_COLUMNS]
+            if missing:
+                raise ImproperlyConfigured(f'Occurrences have no value for {", ".join(missing)}.')
+            self._expansion = Expansion(self.series, self.first, self.last, self.key_columns)
+        return self._expansion
+
+    # The columns of the task rows, which occurrence rows must have too.
+    def columns(self):
+        return [*(column for _, column, _ in task_row_encoder.plan), *self.extra]
+
+    def count(self):
+        expansion = self.expansion
+        return self.rows.count() + sum(
+            expansion.count(row, schedule, self.first, self.last) for row, schedule in expansion.series
+        )
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step is not None or index.stop is None:
+            raise TypeError('OccurrenceRows only supports [start:stop] slices.')
+        start = index.start or 0
+        return self._completed(list(islice(self._merged(self.rows[:index.stop]), start, index.stop)))
+
+    def __iter__(self):
+        return iter(self._completed(list(self._merged(self.rows))))
+
+    def _key(self, row):
+        values = tuple(Descending(row[name]) if descending else row[name] for name, descending in self.fields)
+        if row['id'] is None:
+            return values + (1, row['recurrence'], row['occurrence_date'])
+        return values + (0, Descending(row['id']) if self.ids_descending else row['id'])
+
+    def _merged(self, rows):
+        expansion = self.expansion
+        series = [self._occurrences(row, schedule) for row, schedule in expansion.series]
+        return heapq.merge(rows, *series, key=self._key)
+
+    def _occurrences(self, row, schedule):
+        key = {name: row[name] for name in self.key_columns}
+        for day in self.expansion.dates(row, schedule, self.first, self.last, reverse=self.reverse):
+            yield {**key, 'id': None, 'recurrence': row['id'], 'status': 'pending', 'due_date': day,
+                   'occurrence_date': day}
+
+    # `rows` with their merged occurrences replaced by full occurrence rows.
+    def _completed(self, rows):
+        series_ids = {row['recurrence'] for row in rows if row['id'] is None}
+        if not series_ids:
+            return rows
+        templates = {
+            row['id']: occurrence_template(row)
+            for row in self.series.filter(pk__in=series_ids).order_by().values(*SERIES_COLUMNS)
+        }
+        completed = []
+        for row in rows:
+            if row['id'] is None:
+                day = row['occurrence_date']
+                row = {**templates[row['recurrence']], 'occurrence_date': day, 'due_date': day}
+            completed.append(row)
+        return completed
+
+
+# A `.values()` row, as `task_row_encoder.values()` reads them, for the occurrences
+# of the series `row`; `occurrence_date` and `due_date` are filled in per date.
+def occurrence_template(row):
+    return {
+        'id': None, 'user__username': row['user__username'], 'workspace': row['workspace'], 'parent': None,
+        'recurrence': row['id'], 'occurrence_date': None, 'title': row['title'],
+        'description': row['description'], 'due_date': None, 'status': 'pending',
+        'created_at': row['created_at'], 'updated_at': row['updated_at'], 'version': None, 'path': '/',
+    }
+
+
+# The `.values()` row of the occurrence of `series` (a TaskRecurrence, with its
+# user) on `day`.
+def occurrence_row(series, day):
+    template = occurrence_template({
+        'id': series.pk, 'user__username': series.user.username, 'workspace': series.workspace_id,
+        'title': series.title, 'description': series.description,
+        'created_at': series.created_at, 'updated_at': series.updated_at,
+    })
+    return {**template, 'occurrence_date': day, 'due_date': day}
+
+
+# The columns `occurrence_template` fills in.
+OCCURRENCE_COLUMNS = frozenset(occurrence_template(dict.fromkeys(SERIES_COLUMNS)))
+
+
+# The digest sections (see tasks/digests.py) of the unsaved occurrences of the
+# series created by users with ids in [start_id, end_id): overdue ones from
+# `overdue_since` until the day before `today`, due-soon ones from `today` to
+# `horizon`. Returns {user_id: {is_overdue: (count, items)}} for the users with any,
+# with at most `max_items` items per section, earliest first, shaped like the
+# digest's task items plus the series id under `recurrence`.
+def digest_occurrences(start_id, end_id, today, overdue_since, horizon, max_items):
+    expansion = Expansion(
+        TaskRecurrence.objects.filter(user_id__gte=start_id, user_id__lt=end_id), overdue_since, horizon,
+        columns=('user_id', 'title'),
+    )
+    by_user = defaultdict(list)
+    for row, schedule in expansion.series:
+        by_user[row['user_id']].append((row, schedule))
+
+    def items(row, schedule, first, last):
+        for day in expansion.dates(row, schedule, first, last):
+            yield (day, row['id'], row['title'])
+
+    sections = {}
+    yesterday = today - timedelta(days=1)
+    for user_id, user_series in by_user.items():
+        for is_overdue, first, last in ((True, overdue_since, yesterday), (False, today, horizon)):
+            count = sum(expansion.count(row, schedule, first, last) for row, schedule in user_series)
+            if not count:
+                continue
+            merged = heapq.merge(*(items(row, schedule, first, last) for row, schedule in user_series))
+            sections.setdefault(user_id, {})[is_overdue] = (count, [
+                {'id': None, 'title': title, 'due_date': day.isoformat(), 'status': 'pending', 'recurrence': series_id}
+                for day, series_id, title in islice(merged, max_items)
+            ])
+    return sections
@@ -0,0 +1,115 @@
+# backend/tasks/pagination.py
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+# TaskCursorPagination
+# Keyset (cursor) pagination for the task list.
+# The default `PageNumberPagination` has to run `OFFSET n` plus a `COUNT(*)` over
+# every task the user owns, so deep pages get slower the further the client goes.
+# Cursor pagination instead remembers where the previous page stopped and asks the
+# database for "the next rows after this position", which stays flat at any depth.
+#
+# DRF's own cursor holds only the first ordering field and skips rows sharing it
+# with an OFFSET. Here the cursor's position is the whole key, `created_at` and
+# `id` of the row the page stopped at, and the next page is the rows strictly
+# after it, `(created_at, id) < (x, y)`. Positions are unique, so no offset is
+# ever needed, however many tasks share a timestamp.
+class TaskCursorPagination(CursorPagination):
+    # Keyset ordering: newest first, with the primary key as a tie-breaker so rows
+    # sharing a `created_at` value are still returned in a stable order.
+    ordering = ('-created_at', '-id')
+
+    # Clients may ask for smaller or larger pages, within a sane upper bound.
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    # The cursor always uses the keyset ordering above. Any client-supplied
+    # ordering only applies to the page-number mode.
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse, position = (False, None) if self.cursor is None else (self.cursor.reverse, self.cursor.position)
+
+        # A reverse cursor (a `previous` link) reads oldest first, from its position.
+        if reverse:
+            queryset = queryset.order_by('created_at', 'id')
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            created_at, task_id = self.parse_position(position)
+            if reverse:
+                after = Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=task_id)
+            else:
+                after = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=task_id)
+            queryset = queryset.filter(after)
+
+        # One row more than the page shows whether another page follows.
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_following
+        else:
+            self.has_next, self.has_previous = has_following, position is not None
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        # Past the last row shown, or past the position this page came from if it is empty.
+        position = self.position(self.page[-1]) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self.position(self.page[0]) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    # The cursor position of a task (a model instance or a `.values()` row).
+    @staticmethod
+    def position(task):
+        if isinstance(task, dict):
+            created_at, task_id = task['created_at'], task['id']
+        else:
+            created_at, task_id = task.created_at, task.pk
+        return f'{created_at.isoformat()}|{task_id}'
+
+    def parse_position(self, position):
+        try:
+            created_at, task_id = position.split('|')
+            created_at, task_id = parse_datetime(created_at), int(task_id)
+        except ValueError:
+            created_at = None
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, task_id
+
+
+# Query parameter and value that switch `/api/tasks/` into cursor mode.
+# Sending a `cursor` parameter (as returned in the `next`/`previous` links) also
+# selects cursor mode, so clients can simply follow the links they are given.
+PAGINATION_MODE_PARAM = 'pagination'
+CURSOR_MODE = 'cursor'
+
+
+def wants_cursor_pagination(request):
+    # Returns True when the request asked for keyset pagination instead of page numbers.
+    params = request.query_params
+    return (
+        params.get(PAGINATION_MODE_PARAM) == CURSOR_MODE
+        or TaskCursorPagination.cursor_query_param in params
+    )
@@ -0,0 +1,262 @@
+# backend/tasks/recurrence.py
+
+# Recurrence rules for repeating tasks (see `TaskRecurrence`), and the dates they
+# produce.
+#
+# A rule is a subset of the iCalendar RRULE (RFC 5545), for whole days:
+#   FREQ=DAILY|WEEKLY|MONTHLY|YEARLY   required
+#   INTERVAL=n                         every n days / weeks / months / years (default 1)
+#   BYDAY=MO,WE,FR                     WEEKLY only: the weekdays (default: the first date's)
+#   BYMONTHDAY=1,15,-1                 MONTHLY only: days of the month, negative ones
+#                                      counted from its end (default: the first date's day)
+#   COUNT=n  or  UNTIL=YYYYMMDD        stop after n occurrences / after that date
+#   WKST=MO                            accepted; weeks always start on Monday
+# As in the RFC, dates that don't exist are skipped rather than moved: "the 31st" has
+# no occurrence in April, a yearly rule from February 29th only in leap years.
+#
+# Every rule repeats in periods (a day, `INTERVAL` weeks, ...) with a fixed set of
+# dates in each, so `Schedule` finds the dates in a window by jumping straight to the
+# window's first period, however long ago the series started, and counts them with
+# arithmetic rather than by listing them. Nothing here touches the database.
+
+import calendar
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import islice
+
+FREQUENCIES = ['DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY']
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+
+# Rule
+# A parsed rule. `str(rule)` is its normalized RRULE text, which is what gets stored.
+class Rule:
+    def __init__(self, freq, interval=1, weekdays=(), month_days=(), count=None, until=None):
+        self.freq = freq
+        self.interval = interval
+        # Weekday numbers (Monday is 0) and days of the month, sorted.
+        self.weekdays = weekdays
+        self.month_days = month_days
+        self.count = count
+        self.until = until
+
+    def __str__(self):
+        parts = [f'FREQ={self.freq}']
+        if self.interval != 1:
+            parts.append(f'INTERVAL={self.interval}')
+        if self.weekdays:
+            parts.append('BYDAY=' + ','.join(WEEKDAYS[day] for day in self.weekdays))
+        if self.month_days:
+            parts.append('BYMONTHDAY=' + ','.join(str(day) for day in self.month_days))
+        if self.count is not None:
+            parts.append(f'COUNT={self.count}')
+        if self.until is not None:
+            parts.append(f'UNTIL={self.until:%Y%m%d}')
+        return ';'.join(parts)
+
+
+# Parses RRULE text (with or without the "RRULE:" prefix) into a `Rule`, raising
+# ValueError with a message fit for the client if it isn't in the supported subset.
+# A few rules ("FREQ=DAILY", "FREQ=WEEKLY") are shared by most series, so parsed
+# rules are kept: expanding thousands of series parses each distinct rule once.
+@lru_cache(maxsize=4096)
+def parse_rule(text):
+    text = text.strip()
+    if text.upper().startswith('RRULE:'):
+        text = text[len('RRULE:'):]
+    parts = {}
+    for part in text.split(';'):
+        if not part.strip():
+            continue
+        name, separator, value = part.partition('=')
+        name, value = name.strip().upper(), value.strip().upper()
+        if not separator or not name or not value:
+            raise ValueError(f'"{part}" is not a NAME=VALUE pair.')
+        if name in parts:
+            raise ValueError(f'{name} is given more than once.')
+        parts[name] = value
+
+    freq = parts.pop('FREQ', None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f'FREQ must be one of {", ".join(FREQUENCIES)}.')
+    interval = _positive_int(parts.pop('INTERVAL', '1'), 'INTERVAL')
+
+    weekdays = ()
+    if 'BYDAY' in parts:
+        if freq != 'WEEKLY':
+            raise ValueError('BYDAY is only supported with FREQ=WEEKLY.')
+        names = parts.pop('BYDAY').split(',')
+        unknown = [name for name in names if name not in WEEKDAYS]
+        if unknown:
+            raise ValueError(f'BYDAY takes weekdays ({",".join(WEEKDAYS)}), not "{unknown[0]}".')
+        weekdays = tuple(sorted({WEEKDAYS.index(name) for name in names}))
+
+    month_days = ()
+    if 'BYMONTHDAY' in parts:
+        if freq != 'MONTHLY':
+            raise ValueError('BYMONTHDAY is only supported with FREQ=MONTHLY.')
+        try:
+            days = {int(value) for value in parts.pop('BYMONTHDAY').split(',')}
+        except ValueError:
+            days = {0}
+        if not all(1 <= abs(day) <= 31 for day in days):
+            raise ValueError('BYMONTHDAY takes days from 1 to 31, or -31 to -1 counted from the end of the month.')
+        month_days = tuple(sorted(days))
+
+    count = until = None
+    if 'COUNT' in parts:
+        count = _positive_int(parts.pop('COUNT'), 'COUNT')
+    if 'UNTIL' in parts:
+        value = parts.pop('UNTIL')
+        try:
+            until = date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+        except ValueError:
+            until = None
+        # A date, optionally followed by a time, which whole-day rules ignore.
+        if until is None or len(value) not in (8, 15, 16) or (len(value) > 8 and value[8] != 'T'):
+            raise ValueError('UNTIL must be a date in YYYYMMDD format.')
+    if count is not None and until is not None:
+        raise ValueError('Use either COUNT or UNTIL, not both.')
+
+    if parts.pop('WKST', 'MO') != 'MO':
+        raise ValueError('Only WKST=MO is supported.')
+    if parts:
+        raise ValueError(f'{sorted(parts)[0]} is not supported.')
+    return Rule(freq, interval, weekdays, month_days, count, until)
+
+
+def _positive_int(value, name):
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError(f'{name} must be a positive whole number.')
+    return int(value)
+
+
+# The last date `rule` allows for a series starting on `start`: its UNTIL date, the
+# date of its COUNT-th occurrence, or None if it repeats forever. Stored with the
+# series (`TaskRecurrence.ends_on`), so COUNT is resolved once, not per query.
+def last_date(rule, start):
+    if rule.until is not None:
+        return rule.until
+    if rule.count is None:
+        return None
+    day = None
+    for day in islice(Schedule(rule, start).between(start, date.max), rule.count):
+        pass
+    return day
+
+
+# Schedule
+# The occurrences of one series: `rule` applied from `start`, and nothing after `end`
+# (the series' `last_date`, None for no end).
+class Schedule:
+    def __init__(self, rule, start, end=None):
+        self.rule = rule
+        self.start = start
+        self.end = end
+        freq = rule.freq
+        # Dates per period when every period has the same number of them, so whole
+        # periods can be counted without being listed; None otherwise.
+        if freq == 'DAILY':
+            self.per_period = 1
+        elif freq == 'WEEKLY':
+            # Periods are `interval` weeks from the Monday of the first week.
+            self.monday = start - timedelta(days=start.weekday())
+            self.offsets = rule.weekdays or (start.weekday(),)
+            self.per_period = len(self.offsets)
+        elif freq == 'MONTHLY':
+            self.first_month = start.year * 12 + start.month - 1
+            self.month_days = rule.month_days or (start.day,)
+            # Every month has days 1 to 28, and days -28 to -1; a mix of both, or later
+            # days, gives some months fewer dates than others.
+            short = all(1 <= day <= 28 for day in self.month_days) or all(-28 <= day <= -1 for day in self.month_days)
+            self.per_period = len(self.month_days) if short else None
+            # Otherwise the number depends only on the month's length.
+            self.per_month_length = {}
+        else:
+            self.per_period = None if (start.month, start.day) == (2, 29) else 1
+
+    # The number of the period `day` falls in; period 0 holds `start`.
+    def period(self, day):
+        rule = self.rule
+        if rule.freq == 'DAILY':
+            return (day - self.start).days // rule.interval
+        if rule.freq == 'WEEKLY':
+            return (day - self.monday).days // (7 * rule.interval)
+        if rule.freq == 'MONTHLY':
+            return (day.year * 12 + day.month - 1 - self.first_month) // rule.interval
+        return (day.year - self.start.year) // rule.interval
+
+    # The dates the rule gives in period `number`, in order (before `start` included).
+    def period_dates(self, number):
+        rule = self.rule
+        if rule.freq == 'DAILY':
+            return [self.start + timedelta(days=number * rule.interval)]
+        if rule.freq == 'WEEKLY':
+            monday = self.monday + timedelta(days=7 * rule.interval * number)
+            return [monday + timedelta(days=offset) for offset in self.offsets]
+        if rule.freq == 'MONTHLY':
+            year, month = divmod(self.first_month + number * rule.interval, 12)
+            if year > date.max.year:
+                return []
+            length = calendar.monthrange(year, month + 1)[1]
+            days = sorted({day if day > 0 else length + 1 + day for day in self.month_days if abs(day) <= length})
+            return [date(year, month + 1, day) for day in days]
+        year = self.start.year + number * rule.interval
+        if year > date.max.year or (self.start.month, self.start.day) == (2, 29) and not calendar.isleap(year):
+            return []
+        return [self.start.replace(year=year)]
+
+    # `first` and `last` narrowed to the series' own dates; None if nothing is left.
+    def _bounds(self, first, last):
+        first = max(first, self.start)
+        if self.end is not None:
+            last = min(last, self.end)
+        return (first, last) if first <= last else None
+
+    # The occurrences from `first` to `last` (both included), in date order, or
+    # latest first with `reverse`. Generated as they are consumed.
+    def between(self, first, last, reverse=False):
+        bounds = self._bounds(first, last)
+        if bounds is None:
+            return
+        first, last = bounds
+        start, stop = self.period(first), self.period(last)
+        for number in (range(stop, start - 1, -1) if reverse else range(start, stop + 1)):
+            days = self.period_dates(number)
+            for day in (reversed(days) if reverse else days):
+                if first <= day <= last:
+                    yield day
+
+    # How many occurrences fall from `first` to `last`: the two partial periods at
+    # the ends are listed, the whole periods in between only counted.
+    def count_between(self, first, last):
+        bounds = self._bounds(first, last)
+        if bounds is None:
+            return 0
+        first, last = bounds
+        start, stop = self.period(first), self.period(last)
+        ends = {start, stop}
+        count = sum(first <= day <= last for number in ends for day in self.period_dates(number))
+        if stop - start < 2:
+            return count
+        if self.per_period is not None:
+            return count + (stop - start - 1) * self.per_period
+        return count + sum(self.period_length(number) for number in range(start + 1, stop))
+
+    # `len(self.period_dates(number))`, without listing monthly dates.
+    def period_length(self, number):
+        if self.rule.freq != 'MONTHLY':
+            return len(self.period_dates(number))
+        year, month = divmod(self.first_month + number * self.rule.interval, 12)
+        if year > date.max.year:
+            return 0
+        length = calendar.mdays[month + 1] + (month == 1 and calendar.isleap(year))
+        if length not in self.per_month_length:
+            self.per_month_length[length] = len(
+                {day if day > 0 else length + 1 + day for day in self.month_days if abs(day) <= length}
+            )
+        return self.per_month_length[length]
+
+    # Whether `day` is one of the occurrences.
+    def includes(self, day):
+        return self._bounds(day, day) is not None and day in self.period_dates(self.period(day))
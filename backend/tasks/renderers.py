@@ -0,0 +1,46 @@
+# backend/tasks/renderers.py
+
+# FastJSONRenderer
+# orjson-based replacement for DRF's `JSONRenderer` on the task list, producing the
+# same bytes: compact separators, non-ASCII characters left unescaped, U+2028/U+2029
+# escaped, and datetimes, decimals and lazy strings handed to DRF's own JSON encoder.
+# Anything else it can't reproduce exactly falls back to the standard renderer:
+# indented output (`Accept: application/json; indent=4`, the browsable API), the
+# `UNICODE_JSON` / `COMPACT_JSON` settings turned off, orjson not installed, or
+# data orjson refuses (non-string keys, integers over 64 bits).
+#
+# Floats are the one thing that isn't covered: orjson writes `1e16` and NaN as
+# `null` where `json` writes `1e+16` and raises. Only use this renderer for
+# responses without floats, like the task list.
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from backend.metrics import TimedJSONRenderer, serialization_timer
+
+try:
+    import orjson
+except ImportError:  # Optional: without it every response takes the standard path.
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(TimedJSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        with serialization_timer():
+            try:
+                # Dates and times go to DRF's encoder, which formats them differently.
+                ret = orjson.dumps(data, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+            except orjson.JSONEncodeError:
+                ret = None
+            else:
+                # As `JSONRenderer`: keep the output a strict JavaScript subset.
+                ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+        if ret is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret
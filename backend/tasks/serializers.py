@@ -1,7 +1,91 @@
 # backend/tasks/serializers.py
 
-from rest_framework import serializers
-from .models import Task # Import the Task model from the same app
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from backend.metrics import serialization_timer
+from users.models import Workspace
+from users.workspaces import workspace_ids
+from .models import Task, TaskRecurrence, path_depth # Import the Task models from the same app
+from .recurrence import parse_rule
+
+# TaskBulkListSerializer
+# List-aware variant of `TaskSerializer`, used automatically when the serializer is
+# created with `many=True`. It validates every item with the regular TaskSerializer
+# rules, then writes all of them at once:
+# - creating uses a single `bulk_create`,
+# - updating uses a single `bulk_update` over the fields that were sent.
+# For updates, `instance` is a list of Task objects and every data item carries the
+# `id` of the task it applies to.
+class TaskBulkListSerializer(serializers.ListSerializer):
+    # Validate each item against its own task when updating, so partial updates
+    # and field validation behave exactly like `TaskDetailView`.
+    def run_child_validation(self, data):
+        if self.instance is not None:
+            self.child.instance = self._instances_by_id()[data['id']]
+            self.child.initial_data = data
+        return super().run_child_validation(data)
+
+    def _instances_by_id(self):
+        if not hasattr(self, '_instance_map'):
+            self._instance_map = {task.pk: task for task in self.instance}
+        return self._instance_map
+
+    def create(self, validated_data):
+        tasks = [Task(**attrs) for attrs in validated_data]
+        return Task.objects.bulk_create(tasks)
+
+    def update(self, instances, validated_data):
+        # `bulk_update` doesn't run `auto_now`, so `updated_at` is stamped here.
+        now = timezone.now()
+        fields = {'updated_at'}
+        for task, attrs in zip(instances, validated_data):
+            for attr, value in attrs.items():
+                setattr(task, attr, value)
+            task.updated_at = now
+            fields.update(attrs)
+        # The queryset update behind `bulk_update` increments every version.
+        Task.objects.bulk_update(instances, sorted(fields))
+        for task in instances:
+            task.version += 1
+        return instances
+
+    # Counted as serialization time in the request metrics (backend/metrics.py).
+    @property
+    def data(self):
+        with serialization_timer():
+            return super().data
+
+
+# The Task columns `TaskSerializer` reads: all but the full-text `search_vector`.
+TASK_COLUMNS = [field.name for field in Task._meta.concrete_fields if field.name != 'search_vector']
+
+
+# VisibleTaskField
+# A task id that must be one of the requesting user's visible tasks (their own or
+# their workspaces', see `TaskQuerySet.visible_to`); other tasks are reported as
+# not existing.
+class VisibleTaskField(serializers.PrimaryKeyRelatedField):
+    def get_queryset(self):
+        request = self.context.get('request')
+        if request is None:
+            return Task.objects.none()
+        return Task.objects.visible_to(request.user).defer('search_vector')
+
+
+# MemberWorkspaceField
+# A workspace id that must be one of the requesting user's workspaces.
+class MemberWorkspaceField(serializers.PrimaryKeyRelatedField):
+    def get_queryset(self):
+        request = self.context.get('request')
+        if request is None:
+            return Workspace.objects.none()
+        return Workspace.objects.filter(pk__in=workspace_ids(request.user))
+
 
 # TaskSerializer
 # This serializer is used for converting Task model instances to JSON
@@ -10,17 +94,257 @@ class TaskSerializer(serializers.ModelSerializer):
     # 'user' field is read-only and represents the username of the task owner.
     # This prevents the client from setting the user directly when creating/updating tasks,
     # as the user should be determined by the authenticated user making the request.
+    # Reading `user.username` follows the foreign key, so querysets passed to this
+    # serializer should use `select_related('user')` (see `TaskSerializer.setup_queryset`)
+    # to avoid one extra query per task.
     user = serializers.ReadOnlyField(source='user.username')
 
+    # The id of the parent task, or null for a top-level task. Changing it moves
+    # the task together with its subtasks.
+    parent = VisibleTaskField(required=False, allow_null=True)
+
+    # The id of the workspace the task is shared in, or null for a private task.
+    # Subtasks are always in their parent's workspace, and default to it.
+    workspace = MemberWorkspaceField(required=False, allow_null=True)
+
     class Meta:
         model = Task # Specifies that this serializer is for our Task model
         # Fields to include in the serialization/deserialization.
         # 'id' is automatically generated by Django and is useful for frontend operations.
         # 'user' is included as a read-only field.
         # 'created_at' and 'updated_at' are automatically managed by the model.
-        fields = ['id', 'user', 'title', 'description', 'due_date', 'status', 'created_at', 'updated_at']
+        # 'version' counts the writes to the task; send it back in `If-Match` to make an
+        # update conditional on nobody else having changed the task since.
+        # 'recurrence' and 'occurrence_date' are set on the task saved for an
+        # occurrence of a recurring task (see `TaskRecurrence`).
+        fields = [
+            'id', 'user', 'workspace', 'parent', 'recurrence', 'occurrence_date', 'title', 'description', 'due_date',
+            'status', 'created_at', 'updated_at', 'version',
+        ]
         # 'read_only_fields' explicitly marks fields that should only be read, not written to by the client.
         # 'user' is already handled by ReadOnlyField, but explicitly listing it here is good practice.
         # 'created_at' and 'updated_at' are auto-managed timestamps.
-        read_only_fields = ['user', 'created_at', 'updated_at']
+        read_only_fields = ['user', 'recurrence', 'occurrence_date', 'created_at', 'updated_at', 'version']
+        # Serializing or validating many tasks at once uses the bulk-aware list serializer.
+        list_serializer_class = TaskBulkListSerializer
+
+    # Apply the joins this serializer needs to a Task queryset.
+    # Keeping this next to the field definitions means a new related field and its
+    # eager loading are changed together. The full-text `search_vector` column is
+    # never serialized, so it is not loaded either (and `save()` then leaves it to
+    # the database trigger). Of the owner only the username is read: the rest of the
+    # user row (password hash included) would double the width of every row fetched.
+    @staticmethod
+    def setup_queryset(queryset):
+        return queryset.select_related('user').only(*TASK_COLUMNS, 'user__username')
+
+    # A new parent must not be the task itself or one of its subtasks, and the task's
+    # subtree must still fit within `TASK_HIERARCHY['MAX_DEPTH']` levels under it.
+    def validate_parent(self, parent):
+        instance = self.instance
+        parent_id = None if parent is None else parent.pk
+        if instance is not None and parent_id == instance.parent_id:
+            return parent
+        if instance is not None:
+            if isinstance(self.parent, serializers.ListSerializer):
+                # `bulk_update` can't rewrite the paths of the subtasks.
+                raise serializers.ValidationError('Move tasks one at a time, with PATCH /api/tasks/<id>/.')
+            if parent is not None and (parent.pk == instance.pk or parent.path.startswith(instance.subtree_prefix)):
+                raise serializers.ValidationError('A task cannot be moved under itself or one of its subtasks.')
+        if parent is None:
+            return parent
+        height = 0
+        if instance is not None:
+            deepest = instance.descendants().aggregate(depth=Max(path_depth()))['depth']
+            height = 0 if deepest is None else deepest - instance.depth
+        max_depth = settings.TASK_HIERARCHY['MAX_DEPTH']
+        if parent.depth + 1 + height > max_depth:
+            raise serializers.ValidationError(f'Tasks can be nested at most {max_depth} levels deep.')
+        return parent
+
+    # Keeps every tree within one workspace: a subtask is in its parent's workspace,
+    # and a task with subtasks can't change workspace on its own.
+    def validate(self, attrs):
+        if 'parent' not in attrs and 'workspace' not in attrs:
+            return attrs
+        instance = self.instance
+        if 'parent' in attrs:
+            parent = attrs['parent']
+        else:
+            parent = instance.parent if instance is not None and instance.parent_id is not None else None
+        if 'workspace' not in attrs:
+            if instance is None:
+                if parent is not None and parent.workspace_id is not None:
+                    attrs['workspace_id'] = parent.workspace_id
+                return attrs
+            workspace_id = instance.workspace_id
+        else:
+            workspace_id = None if attrs['workspace'] is None else attrs['workspace'].pk
+        if parent is not None and parent.workspace_id != workspace_id:
+            raise serializers.ValidationError({'workspace': ["A subtask must be in its parent's workspace."]})
+        if instance is not None and workspace_id != instance.workspace_id and instance.children.exists():
+            raise serializers.ValidationError(
+                {'workspace': ['Move the subtasks out of this task before moving it to another workspace.']}
+            )
+        return attrs
+
+    # Counted as serialization time in the request metrics (backend/metrics.py).
+    @property
+    def data(self):
+        with serialization_timer():
+            return super().data
+
+
+# TaskRecurrenceSerializer
+# A recurring task (see `TaskRecurrence`). `rule` is accepted as RRULE text in the
+# subset of tasks/recurrence.py, with or without the "RRULE:" prefix, and stored and
+# returned normalized; `ends_on`, the last date the rule allows, is computed from it.
+class TaskRecurrenceSerializer(serializers.ModelSerializer):
+    user = serializers.ReadOnlyField(source='user.username')
+    workspace = MemberWorkspaceField(required=False, allow_null=True)
+
+    class Meta:
+        model = TaskRecurrence
+        fields = [
+            'id', 'user', 'workspace', 'title', 'description', 'rule', 'starts_on', 'ends_on', 'created_at',
+            'updated_at',
+        ]
+        read_only_fields = ['user', 'ends_on', 'created_at', 'updated_at']
+
+    def validate_rule(self, value):
+        try:
+            rule = parse_rule(value)
+        except ValueError as error:
+            raise serializers.ValidationError(str(error))
+        max_count = settings.TASK_RECURRENCE['MAX_COUNT']
+        if rule.count is not None and rule.count > max_count:
+            raise serializers.ValidationError(f'COUNT can be at most {max_count}; use UNTIL for longer series.')
+        return str(rule)
+
+    # A rule whose UNTIL date comes before the first date has no occurrences at all.
+    def validate(self, attrs):
+        rule = attrs.get('rule', getattr(self.instance, 'rule', None))
+        starts_on = attrs.get('starts_on', getattr(self.instance, 'starts_on', None))
+        if rule and starts_on:
+            until = parse_rule(rule).until
+            if until is not None and until < starts_on:
+                raise serializers.ValidationError({'rule': ['UNTIL is before the first date, so nothing would recur.']})
+        return attrs
+
+
+# TaskRowEncoder
+# Read-only fast path for task lists. Running every task of a page through the
+# `TaskSerializer` field machinery costs more than the query itself, so list
+# responses are built from `.values()` rows instead:
+#
+#   rows = task_row_encoder.values(queryset)        # a `.values()` queryset
+#   data = task_row_encoder.encode(page_of_rows)    # same as `TaskSerializer(tasks, many=True).data`
+#
+# Which column feeds which output key, and how it's converted, is worked out once
+# from `TaskSerializer`'s own fields, so a field added there shows up on both paths;
+# a field the encoder can't reproduce exactly raises ImproperlyConfigured rather
+# than rendering something different. Writes, and anything that needs validation,
+# keep using `TaskSerializer`.
+class TaskRowEncoder:
+    # Field types whose `to_representation` returns a database value unchanged.
+    PASSTHROUGH_FIELDS = (serializers.ReadOnlyField, serializers.CharField, serializers.IntegerField)
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._plan = None
+
+    # (output key, `.values()` column, conversion) per serialized field, built on
+    # first use because the serializer's fields need the app registry.
+    @property
+    def plan(self):
+        if self._plan is None:
+            self._plan = self._compile()
+        return self._plan
+
+    def _compile(self):
+        serializer = self.serializer_class()
+        if type(serializer).to_representation is not serializers.ModelSerializer.to_representation:
+            raise ImproperlyConfigured(f'{self.serializer_class.__name__} overrides to_representation.')
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, (serializers.DateTimeField, serializers.DateField)):
+                kind = 'datetime' if isinstance(field, serializers.DateTimeField) else 'date'
+                default_format = api_settings.DATETIME_FORMAT if kind == 'datetime' else api_settings.DATE_FORMAT
+                output_format = getattr(field, 'format', default_format)
+                if not isinstance(output_format, str) or output_format.lower() != ISO_8601:
+                    raise ImproperlyConfigured(f'Field "{name}" does not use the ISO 8601 format.')
+            elif isinstance(field, serializers.ChoiceField) and all(isinstance(key, str) for key in field.choices):
+                # Stored values are the (string) choice keys, which render as themselves.
+                kind = None
+            elif isinstance(field, self.PASSTHROUGH_FIELDS):
+                kind = None
+            elif isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+                # `.values()` of a foreign key gives the related id, as the field does.
+                kind = None
+            else:
+                raise ImproperlyConfigured(f'Field "{name}" ({type(field).__name__}) has no fast-path encoding.')
+            plan.append((name, '__'.join(field.source_attrs), kind))
+        return tuple(plan)
+
+    # A `.values()` queryset with the columns `encode` needs, plus any `extra`
+    # columns for the caller's own use (`encode` ignores them).
+    def values(self, queryset, extra=()):
+        return queryset.values(*dict.fromkeys([*(column for _, column, _ in self.plan), *extra]))
+
+    # Converts `.values()` rows into what `TaskSerializer` would have produced.
+    def encode(self, rows):
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+
+        # As DRF's DateTimeField: into the current timezone, ISO 8601, "Z" for UTC.
+        def datetime_value(value):
+            if tz is not None and value.tzinfo is not None:
+                value = value.astimezone(tz)
+            value = value.isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+        converters = {'datetime': datetime_value, 'date': lambda value: value.isoformat()}
+        steps = [(name, column, converters[kind] if kind else None) for name, column, kind in self.plan]
+        return [
+            {
+                name: row[column] if convert is None or row[column] is None else convert(row[column])
+                for name, column, convert in steps
+            }
+            for row in rows
+        ]
+
+
+task_row_encoder = TaskRowEncoder(TaskSerializer)
+
+
+# TaskBulkOperationSerializer
+# Validates the envelope of one operation sent to `/api/tasks/bulk/`:
+#   {"action": "create", "data": {...}}
+#   {"action": "update", "id": 12, "data": {...}}   (partial update, like PATCH)
+#   {"action": "delete", "id": 12}
+# The task fields inside `data` are validated afterwards by `TaskSerializer`.
+class TaskBulkOperationSerializer(serializers.Serializer):
+    ACTION_CHOICES = ['create', 'update', 'delete']
+
+    action = serializers.ChoiceField(choices=ACTION_CHOICES)
+    id = serializers.IntegerField(required=False, min_value=1)
+    data = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        if attrs['action'] in ('update', 'delete') and 'id' not in attrs:
+            raise serializers.ValidationError({'id': 'This field is required for update and delete.'})
+        if attrs['action'] in ('create', 'update') and 'data' not in attrs:
+            raise serializers.ValidationError({'data': 'This field is required for create and update.'})
+        return attrs
+
 
+# TaskBulkRequestSerializer
+# The request body for `/api/tasks/bulk/`: a non-empty list of operations, capped by
+# `TASKS_BULK_MAX_OPERATIONS` so one request can't hold a transaction open for too long.
+class TaskBulkRequestSerializer(serializers.Serializer):
+    operations = TaskBulkOperationSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=getattr(settings, 'TASKS_BULK_MAX_OPERATIONS', 500),
+    )
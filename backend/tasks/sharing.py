@@ -0,0 +1,46 @@
+# backend/tasks/sharing.py
+
+# What happens to shared tasks when workspace access ends.
+#
+# Deleting a workspace, or removing one of its members, changes which tasks users
+# see without any task being edited or deleted. Clients that sync with ETags and
+# `?since=` only learn about changes that leave a trace, so these record one:
+# - tasks that become private get a new `version` and `updated_at`, as after an edit,
+#   so their creators' ETags change and their next delta lists them again;
+# - members who can no longer see a task get a tombstone for it, which their next
+#   delta reports under `deleted`, as if the task had been deleted.
+# Both are called from the workspace views (users/views.py), inside their transaction.
+
+from django.utils import timezone
+
+from .cache import invalidate_task_lists
+from .models import Task, TaskTombstone
+
+
+# The workspace `workspace_id` is about to be deleted: its tasks become private to
+# their creators, and the other `member_ids` lose them.
+def unshare_workspace_tasks(workspace_id, member_ids):
+    tasks = Task.objects.filter(workspace_id=workspace_id)
+    rows = list(tasks.order_by().values_list('pk', 'user_id'))
+    if not rows:
+        return
+    # Done here rather than by the foreign key's SET NULL, which bumps nothing.
+    tasks.update(workspace=None, updated_at=timezone.now())
+    TaskTombstone.objects.bulk_create([
+        TaskTombstone(task_id=task_id, user_id=member_id, workspace_id=workspace_id)
+        for member_id in member_ids
+        for task_id, owner_id in rows
+        if owner_id != member_id
+    ])
+    for owner_id in {owner_id for _, owner_id in rows}:
+        invalidate_task_lists(owner_id)
+
+
+# `user_id` has left the workspace `workspace_id` (or was removed): they lose its
+# tasks, except the ones they created. Their tombstones name no workspace, so the
+# remaining members, who still see the tasks, aren't told they were deleted.
+def revoke_workspace_tasks(workspace_id, user_id):
+    task_ids = (
+        Task.objects.filter(workspace_id=workspace_id).exclude(user_id=user_id).order_by().values_list('pk', flat=True)
+    )
+    TaskTombstone.objects.bulk_create([TaskTombstone(task_id=task_id, user_id=user_id) for task_id in task_ids])
@@ -0,0 +1,55 @@
+# backend/tasks/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_task_lists
+from .events import queue_task_event
+from .jobs import enqueue_task_write_jobs
+from .models import Task, TaskRecurrence
+
+# Signal handlers for Task writes.
+# Connected when the app is ready (see `TasksConfig.ready`), so every save and
+# delete goes through them, whether it comes from the API, the admin or a shell.
+# `bulk_create`, `bulk_update` and `QuerySet.update` don't send these signals;
+# code using them calls the same helpers itself (see `TaskBulkView`).
+
+
+# Any change to a user's tasks makes their cached list pages stale, and those of
+# the task's workspace members.
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_cached_task_lists(sender, instance, **kwargs):
+    invalidate_task_lists(instance.user_id, [instance.workspace_id])
+
+
+# Lists with a due-date window show the occurrences of recurring tasks, so a
+# change to a series makes them stale too.
+@receiver(post_save, sender=TaskRecurrence)
+@receiver(post_delete, sender=TaskRecurrence)
+def invalidate_cached_occurrence_lists(sender, instance, **kwargs):
+    invalidate_task_lists(instance.user_id, [instance.workspace_id])
+
+
+# Push the change to the owner's open event streams (see tasks/events.py).
+@receiver(post_save, sender=Task)
+def publish_task_saved(sender, instance, created, **kwargs):
+    queue_task_event('task.created' if created else 'task.updated', instance)
+
+
+@receiver(post_delete, sender=Task)
+def publish_task_deleted(sender, instance, **kwargs):
+    queue_task_event('task.deleted', instance)
+
+
+# Queue the background jobs listed in `JOBS['TASK_WRITE_JOBS']` (see
+# `enqueue_task_write_jobs`), in the same transaction as the write.
+@receiver(post_save, sender=Task)
+def enqueue_task_saved_jobs(sender, instance, created, **kwargs):
+    enqueue_task_write_jobs('task.created' if created else 'task.updated', [(instance.pk, instance.user_id)])
+
+
+@receiver(post_delete, sender=Task)
+def enqueue_task_deleted_jobs(sender, instance, **kwargs):
+    enqueue_task_write_jobs('task.deleted', [(instance.pk, instance.user_id)])
+
@@ -1,3 +1,1997 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import re
+import tempfile
+import tracemalloc
+import unittest
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from backend.metrics import registry
+from backend.routers import ReadReplicaMiddleware, ReadReplicaRouter, replica_reads_enabled
+from users.models import Membership, Workspace
+from users.serializers import MyTokenObtainPairSerializer
+from .benchmarking import seed_tasks
+from .cache import cache_stats, reset_cache_stats
+from .events import RESET_EVENT_TYPE, InProcessEventBackend, get_event_backend, reset_event_backend, user_channel
+from .filters import TaskFilterBackend
+from .importing import import_tasks
+from .archive import archive_batch
+from .digests import build_digest_chunk
+from .jobs import Worker, claim_jobs, enqueue
+from .models import ArchivedTask, Job, Task, TaskDigest, TaskDueDateCount, TaskRecurrence, TaskStats, TaskTombstone
+from .recurrence import Schedule, last_date, parse_rule
+from .renderers import FastJSONRenderer
+from .serializers import TaskRowEncoder, TaskSerializer, task_row_encoder
+from .views import TaskDetailView, TaskExportView, TaskListCreateView, TaskStatsView
+
+User = get_user_model()
+
+
+# Base class for API tests: starts every test with an empty cache, so pages cached
+# by an earlier test (for a user with the same id) can't leak into it.
+class TaskAPITestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+
+# Uses the test cache as the cache shared by every process that production gets from
+# REDIS_URL, for the tests of what it caches and of the queries it saves.
+shared_cache = override_settings(
+    WORKSPACES={**settings.WORKSPACES, 'CACHE_ALIAS': 'default'},
+    TASKS_LIST_CACHE={**settings.TASKS_LIST_CACHE, 'ENABLED': True},
+)
+
+
+# Cursor (keyset) pagination mode on /api/tasks/.
+class TaskCursorPaginationTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('task-list-create')
+
+    def test_default_mode_is_page_number(self):
+        seed_tasks(self.user, 3)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+
+    def test_cursor_mode_has_no_count(self):
+        seed_tasks(self.user, 3)
+        response = self.client.get(self.url, {'pagination': 'cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_cursor_walk_returns_every_task_once_in_order(self):
+        seed_tasks(self.user, 25)
+        seen = []
+        response = self.client.get(self.url, {'pagination': 'cursor'})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen.extend(task['id'] for task in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        expected = list(Task.objects.filter(user=self.user).order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_cursor_walk_with_identical_timestamps(self):
+        # Tasks created in the same instant still page in a stable order without duplicates.
+        other = Task.objects.create(user=self.user, title='t')
+        Task.objects.bulk_create([Task(user=self.user, title=f'dup {i}') for i in range(12)])
+        Task.objects.filter(user=self.user).update(created_at=other.created_at)
+        seen = []
+        response = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 5})
+        while True:
+            seen.extend(task['id'] for task in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(seen), 13)
+        self.assertEqual(len(set(seen)), 13)
+
+    def test_cursor_is_a_keyset_over_created_at_and_id(self):
+        # Walking forward through tied timestamps and back again sees the same pages,
+        # and no page query skips rows with an OFFSET.
+        Task.objects.bulk_create([Task(user=self.user, title=f'dup {i}') for i in range(12)])
+        Task.objects.filter(user=self.user).update(created_at=timezone.now())
+        pages = []
+        response = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 5})
+        while True:
+            pages.append([task['id'] for task in response.data['results']])
+            if not response.data['next']:
+                break
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(response.data['next'])
+            self.assertFalse(any('OFFSET' in query['sql'] for query in queries.captured_queries))
+        self.assertEqual(sum(pages, []), sorted(Task.objects.values_list('id', flat=True), reverse=True))
+        back = []
+        while response.data['previous']:
+            response = self.client.get(response.data['previous'])
+            back.insert(0, [task['id'] for task in response.data['results']])
+        self.assertEqual(back, pages[:-1])
+
+    def test_cursor_mode_only_returns_own_tasks(self):
+        other = User.objects.create_user(username='bob', password='pass12345')
+        seed_tasks(other, 5)
+        seed_tasks(self.user, 2)
+        response = self.client.get(self.url, {'pagination': 'cursor'})
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+# Query plan regression tests for the Task access patterns.
+# Sequential scans are disabled for the duration of each test, so the planner only
+# falls back to one when no usable index exists. Any `Seq Scan` or `Sort` node in
+# the plan therefore means an index stopped matching the query (except for the OR
+# of a workspace member's list, see `test_workspace_member_list`).
+@unittest.skipUnless(connection.vendor == 'postgresql', 'EXPLAIN checks require PostgreSQL')
+class TaskQueryPlanTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        seed_tasks(self.user, 200)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE tasks_task')
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertIndexedPlan(self, queryset):
+        plan = queryset.explain()
+        self.assertNotIn('Seq Scan', plan, plan)
+        self.assertIsNone(re.search(r'\bSort\b', plan), plan)
+
+    def test_list_newest_first(self):
+        self.assertIndexedPlan(Task.objects.filter(user=self.user).order_by('-created_at', '-id')[:10])
+
+    def test_cursor_page(self):
+        position = timezone.now()
+        self.assertIndexedPlan(
+            Task.objects.filter(user=self.user, created_at__lt=position).order_by('-created_at', '-id')[:11]
+        )
+
+    def test_detail_lookup(self):
+        task = Task.objects.filter(user=self.user).first()
+        self.assertIndexedPlan(Task.objects.filter(user=self.user, pk=task.pk))
+
+    def test_filter_by_status(self):
+        self.assertIndexedPlan(Task.objects.filter(user=self.user, status='pending').order_by())
+
+    def test_filter_by_due_date(self):
+        self.assertIndexedPlan(Task.objects.filter(user=self.user, due_date__lt=timezone.now().date()).order_by('due_date'))
+
+    def test_full_text_search_uses_gin_index(self):
+        queryset = TaskFilterBackend()._search(Task.objects.filter(user=self.user).order_by(), 'benchmark')
+        self.assertIn('task_search_vector_idx', queryset.explain())
+
+    # A workspace member's list (`visible_to`): their own tasks OR those of their
+    # workspaces. PostgreSQL can't read an OR in index order, so it combines
+    # `task_user_created_idx` and `task_workspace_created_idx` in a bitmap OR and
+    # sorts what they return; the sort only sees the visible rows, never the table
+    # (the tasks of the user outside the workspace stay unread).
+    def test_workspace_member_list(self):
+        bob = User.objects.create_user(username='bob', password='pass12345')
+        carol = User.objects.create_user(username='carol', password='pass12345')
+        team = Workspace.objects.create(name='Team', created_by=bob)
+        Membership.objects.create(workspace=team, user=bob, role=Membership.OWNER)
+        Membership.objects.create(workspace=team, user=carol)
+        seed_tasks(bob, 50)
+        Task.objects.filter(user=bob).update(workspace=team)
+        seed_tasks(carol, 20)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE tasks_task')
+        plan = Task.objects.visible_to(carol).order_by('-created_at', '-id')[:10].explain()
+        self.assertNotIn('Seq Scan', plan, plan)
+        self.assertIn('task_user_created_idx', plan, plan)
+        self.assertIn('task_workspace_created_idx', plan, plan)
+
+
+# Query counts for the task endpoints and the admin changelist.
+# The counts must not grow with the number of tasks on the page (no N+1 on `user.username`).
+@shared_cache
+class TaskQueryCountTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        seed_tasks(self.user, 10)
+
+    def test_list_page_number(self):
+        # Two aggregates for the ETag, COUNT(*) for the paginator, and one SELECT joined with the user.
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('task-list-create'))
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(response.data['results'][0]['user'], 'alice')
+
+    def test_list_cursor(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('task-list-create'), {'pagination': 'cursor'})
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_detail(self):
+        task = Task.objects.filter(user=self.user).first()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('task-detail', args=[task.pk]))
+        self.assertEqual(response.data['user'], 'alice')
+
+    # The INSERT plus the owner's `TaskStats` counter UPDATE.
+    def test_create(self):
+        with self.assertNumQueries(2):
+            response = self.client.post(reverse('task-list-create'), {'title': 'New task'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['user'], 'alice')
+
+    # The manifest storage used in production needs `collectstatic` to have run.
+    @override_settings(STORAGES={'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}})
+    def test_admin_changelist_does_not_scale_with_rows(self):
+        admin_user = User.objects.create_superuser(username='admin', password='pass12345', email='a@example.com')
+        self.client.force_login(admin_user)
+        url = reverse('admin:tasks_task_changelist')
+        self.client.get(url)  # Warm up per-process caches (content types, permissions).
+
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        seed_tasks(User.objects.create_user(username='bob', password='pass12345'), 40)
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(len(few), len(many))
+
+
+# Filtering, ordering and search query parameters on /api/tasks/.
+class TaskFilterTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('task-list-create')
+        today = timezone.localdate()
+        self.overdue = Task.objects.create(user=self.user, title='File taxes', status='pending', due_date=today - timedelta(days=3))
+        self.done = Task.objects.create(user=self.user, title='Old report', status='completed', due_date=today - timedelta(days=5))
+        self.soon = Task.objects.create(user=self.user, title='Team lunch', description='Book a table for taxes talk', status='in_progress', due_date=today + timedelta(days=2))
+        self.undated = Task.objects.create(user=self.user, title='Someday', status='deferred')
+
+    def ids(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return {task['id'] for task in response.data['results']}
+
+    def test_status(self):
+        self.assertEqual(self.ids({'status': 'pending,completed'}), {self.overdue.id, self.done.id})
+
+    def test_invalid_status(self):
+        response = self.client.get(self.url, {'status': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_due_range(self):
+        today = timezone.localdate()
+        params = {'due_after': str(today - timedelta(days=4)), 'due_before': str(today + timedelta(days=2))}
+        self.assertEqual(self.ids(params), {self.overdue.id, self.soon.id})
+
+    def test_invalid_date(self):
+        response = self.client.get(self.url, {'due_after': '2024-13-45'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_overdue_excludes_closed_tasks(self):
+        self.assertEqual(self.ids({'overdue': 'true'}), {self.overdue.id})
+
+    def test_ordering(self):
+        response = self.client.get(self.url, {'ordering': 'title'})
+        titles = [task['title'] for task in response.data['results']]
+        self.assertEqual(titles, sorted(titles))
+
+    def test_search_matches_title_and_description(self):
+        self.assertEqual(self.ids({'search': 'taxes'}), {self.overdue.id, self.soon.id})
+
+    def test_filters_combine_with_cursor_mode(self):
+        response = self.client.get(self.url, {'pagination': 'cursor', 'status': 'deferred'})
+        self.assertEqual([task['id'] for task in response.data['results']], [self.undated.id])
+
+
+# Batch create/update/delete through /api/tasks/bulk/.
+class TaskBulkTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.other = User.objects.create_user(username='bob', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('task-bulk')
+        self.task = Task.objects.create(user=self.user, title='Existing')
+        self.doomed = Task.objects.create(user=self.user, title='Delete me')
+        self.foreign = Task.objects.create(user=self.other, title='Not yours')
+
+    def test_mixed_operations(self):
+        response = self.client.post(self.url, [
+            {'action': 'create', 'data': {'title': 'One'}},
+            {'action': 'create', 'data': {'title': 'Two', 'status': 'in_progress'}},
+            {'action': 'update', 'id': self.task.id, 'data': {'status': 'completed'}},
+            {'action': 'delete', 'id': self.doomed.id},
+        ], format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        results = response.data['results']
+        self.assertEqual([result['action'] for result in results], ['create', 'create', 'update', 'delete'])
+        self.assertEqual(results[0]['task']['user'], 'alice')
+        self.assertEqual(results[2]['task']['status'], 'completed')
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'completed')
+        self.assertEqual(self.task.title, 'Existing')
+        self.assertFalse(Task.objects.filter(pk=self.doomed.pk).exists())
+        self.assertEqual(Task.objects.filter(user=self.user, title__in=['One', 'Two']).count(), 2)
+
+    def test_writes_are_batched(self):
+        operations = [{'action': 'create', 'data': {'title': f'Task {i}'}} for i in range(50)]
+        operations.append({'action': 'update', 'id': self.task.id, 'data': {'title': 'Renamed'}})
+        operations.append({'action': 'delete', 'id': self.doomed.id})
+        # Inside the transaction: one INSERT, one UPDATE, and one DELETE plus its tombstone
+        # INSERT, and a counter UPDATE each for the INSERT and the DELETE (the title-only
+        # UPDATE doesn't change any counter).
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'operations': operations}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        writes = [q['sql'] for q in queries if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        self.assertEqual(len(writes), 6, writes)
+
+    def test_other_users_tasks_are_not_found(self):
+        response = self.client.post(self.url, [
+            {'action': 'update', 'id': self.foreign.id, 'data': {'title': 'Mine now'}},
+            {'action': 'delete', 'id': self.foreign.id + 1000},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['operations'][0], {'detail': 'Not found.'})
+        self.assertEqual(response.data['operations'][1], {'detail': 'Not found.'})
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.title, 'Not yours')
+
+    def test_invalid_item_rolls_back_whole_batch(self):
+        response = self.client.post(self.url, [
+            {'action': 'create', 'data': {'title': 'Fine'}},
+            {'action': 'create', 'data': {'status': 'bogus'}},
+            {'action': 'delete', 'id': self.doomed.id},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.data['operations']
+        self.assertEqual(errors[0], {})
+        self.assertIn('title', errors[1])
+        self.assertIn('status', errors[1])
+        self.assertEqual(errors[2], {})
+        self.assertFalse(Task.objects.filter(title='Fine').exists())
+        self.assertTrue(Task.objects.filter(pk=self.doomed.pk).exists())
+
+    def test_duplicate_ids_are_rejected(self):
+        response = self.client.post(self.url, [
+            {'action': 'update', 'id': self.task.id, 'data': {'title': 'A'}},
+            {'action': 'delete', 'id': self.task.id},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('id', response.data['operations'][1])
+
+    def test_envelope_validation(self):
+        response = self.client.post(self.url, [{'action': 'update', 'data': {}}, {'action': 'explode'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('id', response.data['operations'][0])
+        self.assertIn('action', response.data['operations'][1])
+
+    def test_empty_batch_is_rejected(self):
+        response = self.client.post(self.url, [], format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+# ETag / Last-Modified handling and delta sync.
+class TaskConditionalGetTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('task-list-create')
+        self.task = Task.objects.create(user=self.user, title='First')
+
+    def test_list_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_etag_changes_on_write(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('task-detail', args=[self.task.pk]), {'title': 'Renamed'})
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_etag_changes_on_delete(self):
+        Task.objects.create(user=self.user, title='Second')
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('task-detail', args=[self.task.pk]))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_etag_depends_on_query(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertNotEqual(self.client.get(self.url, {'status': 'pending'})['ETag'], etag)
+
+    def test_detail_not_modified(self):
+        url = reverse('task-detail', args=[self.task.pk])
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+    def test_delta_returns_changes_and_tombstones(self):
+        since = timezone.now() - timedelta(minutes=1)
+        doomed = Task.objects.create(user=self.user, title='Doomed')
+        doomed_id = doomed.id
+        doomed.delete()
+        response = self.client.get(self.url, {'since': since.isoformat()})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.task.id])
+        self.assertEqual(response.data['deleted'], [doomed_id])
+        self.assertIn('server_time', response.data)
+
+    def test_delta_skips_older_changes(self):
+        Task.objects.filter(pk=self.task.pk).update(updated_at=timezone.now() - timedelta(hours=2))
+        response = self.client.get(self.url, {'since': (timezone.now() - timedelta(hours=1)).isoformat()})
+        self.assertEqual(response.data['tasks'], [])
+
+    def test_bulk_delete_records_tombstones(self):
+        Task.objects.create(user=self.user, title='Second')
+        Task.objects.filter(user=self.user).delete()
+        self.assertEqual(TaskTombstone.objects.filter(user=self.user).count(), 2)
+
+    def test_delta_too_old(self):
+        response = self.client.get(self.url, {'since': '2000-01-01T00:00:00Z'})
+        self.assertEqual(response.status_code, 410)
+
+    def test_delta_invalid_since(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'yesterday'}).status_code, 400)
+
+    @override_settings(TASKS_SYNC_MAX_TASKS=2)
+    def test_delta_pages(self):
+        since = timezone.now() - timedelta(minutes=1)
+        Task.objects.bulk_create([Task(user=self.user, title=f'Task {i}') for i in range(4)])
+        doomed = Task.objects.create(user=self.user, title='Doomed')
+        doomed_id = doomed.id
+        doomed.delete()
+        Task.objects.filter(user=self.user).update(updated_at=self.task.updated_at)  # All tie on updated_at.
+        params = {'since': since.isoformat()}
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.data['deleted'], [doomed_id])
+        server_time = response.data['server_time']
+        ids = []
+        while True:
+            self.assertEqual(response.data['server_time'], server_time)
+            ids += [task['id'] for task in response.data['tasks']]
+            if response.data['next'] is None:
+                break
+            response = self.client.get(self.url, {**params, 'cursor': response.data['next']})
+            self.assertEqual(response.data['deleted'], [])
+        self.assertEqual(ids, sorted(Task.objects.filter(user=self.user).values_list('id', flat=True)))
+        self.assertEqual(self.client.get(self.url, {**params, 'cursor': 'bogus'}).status_code, 400)
+
+
+# Per-user cache of task list pages.
+@shared_cache
+class TaskListCacheTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        reset_cache_stats()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('task-list-create')
+        self.task = Task.objects.create(user=self.user, title='First')
+
+    def test_second_read_is_served_from_cache(self):
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['results'][0]['title'], 'First')
+        self.assertEqual(cache_stats()['hits'], 1)
+        self.assertEqual(cache_stats()['misses'], 1)
+
+    def test_cached_page_answers_conditional_get(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_pages_are_cached_per_query(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url, {'status': 'completed'})['X-Cache'], 'MISS')
+
+    def test_pages_are_cached_per_user(self):
+        self.client.get(self.url)
+        other = User.objects.create_user(username='bob', password='pass12345')
+        self.client.force_authenticate(user=other)
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'], [])
+
+    def test_writes_invalidate(self):
+        detail = reverse('task-detail', args=[self.task.pk])
+        writes = [
+            lambda: self.client.post(self.url, {'title': 'Second'}),
+            lambda: self.client.patch(detail, {'title': 'Renamed'}),
+            lambda: self.client.post(reverse('task-bulk'), [{'action': 'create', 'data': {'title': 'Bulk'}}], format='json'),
+            lambda: self.client.delete(detail),
+        ]
+        for write in writes:
+            self.client.get(self.url)
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+            self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+
+    @override_settings(TASKS_LIST_CACHE={'ENABLED': True, 'ALIAS': 'default', 'TIMEOUT': 60, 'MAX_ENTRY_BYTES': 10})
+    def test_oversized_pages_are_not_cached(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+        self.assertEqual(cache_stats()['oversized'], 2)
+
+    @override_settings(TASKS_LIST_CACHE={'ENABLED': False, 'ALIAS': 'default', 'TIMEOUT': 60, 'MAX_ENTRY_BYTES': 262144})
+    def test_disabled(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+
+
+# Native async endpoints under /api/async/.
+class AsyncTaskViewTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        token = MyTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.url = reverse('async-task-list-create')
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_create_and_read_back(self):
+        response = self.client.post(self.url, {'title': 'Async task', 'status': 'in_progress'}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        task = Task.objects.get()
+        self.assertEqual(response.json(), TaskSerializer(task).data)
+        detail = self.client.get(reverse('async-task-detail', args=[task.pk]))
+        self.assertEqual(detail.json()['user'], 'alice')
+
+    def test_create_validates(self):
+        response = self.client.post(self.url, {'status': 'bogus'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('title', response.json())
+
+    def test_list_walks_all_pages(self):
+        seed_tasks(self.user, 25)
+        seen, url = [], self.url
+        while url:
+            body = self.client.get(url).json()
+            seen.extend(task['id'] for task in body['results'])
+            url = body['next']
+        expected = list(Task.objects.filter(user=self.user).order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_list_filters(self):
+        Task.objects.create(user=self.user, title='Open')
+        Task.objects.create(user=self.user, title='Closed', status='completed')
+        body = self.client.get(self.url, {'status': 'completed'}).json()
+        self.assertEqual([task['title'] for task in body['results']], ['Closed'])
+
+    def test_update_and_delete(self):
+        task = Task.objects.create(user=self.user, title='Before')
+        url = reverse('async-task-detail', args=[task.pk])
+        response = self.client.patch(url, {'title': 'After'}, format='json')
+        self.assertEqual(response.json()['title'], 'After')
+        task.refresh_from_db()
+        self.assertEqual(task.title, 'After')
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertFalse(Task.objects.filter(pk=task.pk).exists())
+        self.assertTrue(TaskTombstone.objects.filter(task_id=task.pk).exists())
+
+    def test_other_users_tasks_are_not_found(self):
+        other = User.objects.create_user(username='bob', password='pass12345')
+        task = Task.objects.create(user=other, title='Private')
+        self.assertEqual(self.client.get(reverse('async-task-detail', args=[task.pk])).status_code, 404)
+
+    def test_workspace_and_parent(self):
+        team = Workspace.objects.create(name='Team', created_by=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Membership.objects.create(workspace=team, user=self.user, role=Membership.OWNER)
+        response = self.client.post(self.url, {'title': 'Shared', 'workspace': team.pk}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        parent_id = response.json()['id']
+        response = self.client.post(self.url, {'title': 'Child', 'parent': parent_id}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual((response.json()['parent'], response.json()['workspace']), (parent_id, team.pk))
+        # Validation that reads the subtasks runs outside the event loop.
+        response = self.client.patch(
+            reverse('async-task-detail', args=[parent_id]), {'workspace': None}, format='json',
+        )
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertIn('workspace', response.json())
+
+    def test_update_honours_if_match(self):
+        task = Task.objects.create(user=self.user, title='Before')
+        url = reverse('async-task-detail', args=[task.pk])
+        response = self.client.patch(url, {'title': 'After'}, format='json', HTTP_IF_MATCH=f'"{task.version}"')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['version'], task.version + 1)
+        response = self.client.patch(url, {'title': 'Stale'}, format='json', HTTP_IF_MATCH=f'"{task.version}"')
+        self.assertEqual(response.status_code, 412)
+        task.refresh_from_db()
+        self.assertEqual(task.title, 'After')
+        # A request that changes nothing writes nothing.
+        self.client.patch(url, {'title': 'After'}, format='json')
+        self.assertEqual(Task.objects.get(pk=task.pk).version, task.version)
+
+
+# Reads `count` events from a subscription, failing instead of hanging when fewer arrive.
+async def take_events(subscription, count):
+    try:
+        return [await asyncio.wait_for(anext(subscription), timeout=1) for _ in range(count)]
+    finally:
+        await subscription.aclose()
+
+
+class TaskEventBackendTests(TestCase):
+    async def test_live_events_are_delivered(self):
+        backend = InProcessEventBackend(backlog=10)
+        subscription = backend.subscribe(['user:1'])
+        reader = asyncio.ensure_future(take_events(subscription, 1))
+        await asyncio.sleep(0.05)  # Let the reader subscribe.
+        backend.publish(['user:2'], 'task.created', {'id': 7})
+        event = backend.publish(['user:1'], 'task.created', {'id': 8})
+        self.assertEqual(await reader, [event])
+
+    async def test_events_on_several_channels_arrive_once(self):
+        backend = InProcessEventBackend(backlog=10)
+        missed = backend.publish(['user:1', 'workspace:3'], 'task.created', {'id': 1})
+        subscription = backend.subscribe(['user:1', 'workspace:3'], missed['id'] - 1)
+        reader = asyncio.ensure_future(take_events(subscription, 2))
+        await asyncio.sleep(0.05)
+        live = backend.publish(['user:2', 'workspace:3'], 'task.updated', {'id': 1})
+        self.assertEqual(await reader, [missed, live])
+
+    async def test_resume_replays_missed_events(self):
+        backend = InProcessEventBackend(backlog=10)
+        first = backend.publish(['user:1'], 'task.created', {'id': 1})
+        second = backend.publish(['user:1'], 'task.updated', {'id': 1})
+        third = backend.publish(['user:1'], 'task.deleted', {'id': 1})
+        self.assertEqual(await take_events(backend.subscribe(['user:1'], first['id']), 2), [second, third])
+
+    async def test_resume_past_the_backlog_sends_reset(self):
+        backend = InProcessEventBackend(backlog=2)
+        first = backend.publish(['user:1'], 'task.created', {'id': 1})
+        for _ in range(3):
+            backend.publish(['user:1'], 'task.updated', {'id': 1})
+        [event] = await take_events(backend.subscribe(['user:1'], first['id']), 1)
+        self.assertEqual(event['type'], RESET_EVENT_TYPE)
+
+
+class TaskEventTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        reset_event_backend()
+        self.addCleanup(reset_event_backend)
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.token = str(MyTokenObtainPairSerializer.get_token(self.user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def published(self, count):
+        return async_to_sync(take_events)(get_event_backend().subscribe([user_channel(self.user.pk)], 0), count)
+
+    def test_api_writes_publish_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task_id = self.client.post(reverse('task-list-create'), {'title': 'New'}, format='json').json()['id']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('task-detail', args=[task_id]), {'title': 'Renamed'}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('task-detail', args=[task_id]))
+        events = self.published(3)
+        self.assertEqual([event['type'] for event in events], ['task.created', 'task.updated', 'task.deleted'])
+        self.assertEqual(events[1]['task']['title'], 'Renamed')
+        self.assertEqual(events[2]['task'], {'id': task_id})
+
+    def test_events_wait_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Task.objects.create(user=self.user, title='Pending')
+        self.assertEqual(list(get_event_backend()._backlogs[user_channel(self.user.pk)]), [])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.published(1)[0]['task']['title'], 'Pending')
+
+    def test_bulk_writes_publish_events(self):
+        updated = Task.objects.create(user=self.user, title='Old')
+        deleted = Task.objects.create(user=self.user, title='Gone')
+        reset_event_backend()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('task-bulk'), [
+                {'action': 'create', 'data': {'title': 'Created'}},
+                {'action': 'update', 'id': updated.pk, 'data': {'status': 'completed'}},
+                {'action': 'delete', 'id': deleted.pk},
+            ], format='json')
+        events = {event['type']: event['task'] for event in self.published(3)}
+        self.assertEqual(events['task.created']['title'], 'Created')
+        self.assertEqual(events['task.updated']['status'], 'completed')
+        self.assertEqual(events['task.deleted'], {'id': deleted.pk})
+
+    def test_stream_requires_authentication(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get(reverse('async-task-events')).status_code, 401)
+
+    # Access tokens never go in the URL; short-lived stream tickets do.
+    def test_stream_tickets(self):
+        ticket = self.client.post(reverse('async-task-events-ticket')).json()['ticket']
+        self.client.credentials()
+        url = reverse('async-task-events')
+        self.assertEqual(self.client.get(url, {'token': self.token}).status_code, 401)
+        self.assertEqual(self.client.get(url, {'ticket': self.token}).status_code, 401)
+        self.assertEqual(self.client.post(reverse('async-task-events-ticket')).status_code, 401)
+        with override_settings(TASK_EVENTS={**settings.TASK_EVENTS, 'TICKET_SECONDS': -1}):
+            self.assertEqual(self.client.get(url, {'ticket': ticket}).json()['detail'], 'Invalid or expired stream ticket.')
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get(url, {'ticket': ticket}).status_code, 401)
+
+    async def test_stream_resumes_from_last_event_id(self):
+        backend = get_event_backend()
+        first = backend.publish([user_channel(self.user.pk)], 'task.created', {'id': 1, 'title': 'One'})
+        backend.publish([user_channel(self.user.pk)], 'task.updated', {'id': 1, 'title': 'Two'})
+        response = await self.async_client.post(
+            reverse('async-task-events-ticket'), headers={'Authorization': f'Bearer {self.token}'},
+        )
+        response = await self.async_client.get(
+            reverse('async-task-events'), {'ticket': response.json()['ticket']},
+            headers={'Last-Event-ID': str(first['id'])},
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        try:
+            self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+            event = (await anext(chunks)).decode()
+        finally:
+            await response.streaming_content.aclose()
+        self.assertEqual(event, f'id: {first["id"] + 1}\nevent: task.updated\ndata: {{"id": 1, "title": "Two"}}\n\n')
+
+    # Members follow the changes other members make to the tasks of their workspaces.
+    def test_members_receive_shared_task_events(self):
+        bob = User.objects.create_user(username='bob', password='pass12345')
+        team = Workspace.objects.create(name='Team', created_by=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Membership.objects.create(workspace=team, user=self.user, role=Membership.OWNER)
+            Membership.objects.create(workspace=team, user=bob)
+        task = Task.objects.create(user=self.user, title='Shared', workspace=team)
+        reset_event_backend()
+        self.client.force_authenticate(user=bob)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('task-detail', args=[task.pk]), {'status': 'completed'}, format='json')
+        [event] = self.published(1)
+        self.assertEqual((event['type'], event['task']['status']), ('task.updated', 'completed'))
+        ticket = self.client.post(reverse('async-task-events-ticket')).json()['ticket']
+        self.assertEqual(self.stream_event(ticket), event)
+
+    # The first event of the stream opened with `ticket`, replayed from the start.
+    def stream_event(self, ticket):
+        async def read():
+            response = await self.async_client.get(
+                reverse('async-task-events'), {'ticket': ticket}, headers={'Last-Event-ID': '0'},
+            )
+            chunks = aiter(response.streaming_content)
+            try:
+                await anext(chunks)
+                return (await anext(chunks)).decode()
+            finally:
+                await response.streaming_content.aclose()
+
+        event_id, event_type, data = (line.split(': ', 1)[1] for line in async_to_sync(read)().split('\n')[:3])
+        return {'id': int(event_id), 'type': event_type, 'task': json.loads(data)}
+
+
+class TaskStatsTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        self.today = timezone.localdate()
+
+    def stats(self):
+        response = self.client.get(reverse('task-stats'))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    # The counters must always equal what `rebuild_task_stats` computes from scratch.
+    def assertCountersCorrect(self):
+        call_command('rebuild_task_stats', '--verify', stdout=StringIO())
+
+    def test_counts(self):
+        Task.objects.create(user=self.user, title='Late', due_date=self.today - timedelta(days=2))
+        Task.objects.create(user=self.user, title='Soon', status='in_progress', due_date=self.today + timedelta(days=3))
+        Task.objects.create(user=self.user, title='Later', due_date=self.today + timedelta(days=10))
+        Task.objects.create(user=self.user, title='Done', status='completed', due_date=self.today - timedelta(days=1))
+        Task.objects.create(user=User.objects.create_user(username='bob', password='pass12345'), title='Not mine')
+        self.assertEqual(self.stats(), {
+            'total': 4,
+            'by_status': {'pending': 2, 'in_progress': 1, 'completed': 1, 'deferred': 0, 'cancelled': 0},
+            'overdue': 1,
+            'due_this_week': 1,
+        })
+
+    def test_served_from_counters(self):
+        seed_tasks(self.user, 30)
+        self.stats()
+        with CaptureQueriesContext(connection) as queries:
+            self.stats()
+        self.assertFalse([q['sql'] for q in queries if 'tasks_task"' in q['sql']])
+
+    def test_api_writes_keep_counters_in_sync(self):
+        task_id = self.client.post(reverse('task-list-create'), {'title': 'A', 'due_date': str(self.today)}).data['id']
+        self.client.patch(reverse('task-detail', args=[task_id]), {'status': 'completed'})
+        other_id = self.client.post(reverse('task-list-create'), {'title': 'B'}).data['id']
+        self.client.delete(reverse('task-detail', args=[other_id]))
+        self.client.post(reverse('task-bulk'), [
+            {'action': 'create', 'data': {'title': 'C', 'due_date': str(self.today - timedelta(days=1))}},
+            {'action': 'update', 'id': task_id, 'data': {'status': 'pending', 'due_date': str(self.today)}},
+        ], format='json')
+        stats = self.stats()
+        self.assertEqual(stats['by_status']['pending'], 2)
+        self.assertEqual((stats['overdue'], stats['due_this_week']), (1, 1))
+        self.assertCountersCorrect()
+
+    def test_queryset_writes_keep_counters_in_sync(self):
+        seed_tasks(self.user, 20)
+        ids = list(Task.objects.filter(user=self.user).values_list('id', flat=True)[:5])
+        Task.objects.filter(pk__in=ids).update(status='deferred', due_date=self.today)
+        Task.objects.filter(user=self.user, status='completed').delete()
+        self.assertCountersCorrect()
+        self.assertEqual(self.stats()['by_status']['deferred'], Task.objects.filter(status='deferred').count())
+
+    # Saves and deletes count the row as it is, not as a stale instance loaded it.
+    def test_stale_instances_keep_counters_in_sync(self):
+        task = Task.objects.create(user=self.user, title='Twice', due_date=self.today)
+        first, second = Task.objects.get(pk=task.pk), Task.objects.get(pk=task.pk)
+        first.status = 'completed'
+        first.save()
+        second.status = 'completed'
+        second.save()
+        self.assertEqual(self.stats()['by_status']['completed'], 1)
+        self.assertCountersCorrect()
+        first.delete()
+        self.assertEqual(self.stats()['total'], 0)
+        self.assertCountersCorrect()
+
+    def test_rebuild_repairs_drift(self):
+        Task.objects.create(user=self.user, title='A', due_date=self.today)
+        TaskStats.objects.filter(user=self.user).update(pending=7)
+        TaskDueDateCount.objects.filter(user=self.user).delete()
+        with self.assertRaises(CommandError):
+            self.assertCountersCorrect()
+        out = StringIO()
+        call_command('rebuild_task_stats', stdout=out)
+        self.assertIn('1 were stale', out.getvalue())
+        self.assertCountersCorrect()
+        self.assertEqual(self.stats()['due_this_week'], 1)
+
+
+class TaskExportTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('task-export')
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_matches_serializer(self):
+        Task.objects.create(user=self.user, title='Ünïcode "quoted"', description='multi\nline', due_date=timezone.localdate())
+        Task.objects.create(user=self.user, title='Second', status='completed')
+        Task.objects.create(user=User.objects.create_user(username='bob', password='pass12345'), title='Not mine')
+        lines = self.export().splitlines()
+        expected = TaskSerializer(Task.objects.filter(user=self.user).order_by('id'), many=True).data
+        self.assertEqual([json.loads(line) for line in lines], json.loads(json.dumps(expected)))
+
+    def test_csv(self):
+        Task.objects.create(user=self.user, title='Comma, "quote"', description='multi\nline')
+        response = self.client.get(self.url, {'as': 'csv'})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="tasks.csv"')
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode(), newline='')))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'Comma, "quote"')
+        self.assertEqual(rows[0]['description'], 'multi\nline')
+        self.assertEqual(rows[0]['user'], 'alice')
+
+    def test_csv_without_tasks_has_header(self):
+        self.assertEqual(self.export(**{'as': 'csv'}).splitlines(), [','.join(TaskSerializer.Meta.fields)])
+
+    def test_filters_apply(self):
+        Task.objects.create(user=self.user, title='Open')
+        Task.objects.create(user=self.user, title='Done', status='completed')
+        lines = self.export(status='completed').splitlines()
+        self.assertEqual([json.loads(line)['title'] for line in lines], ['Done'])
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get(self.url, {'as': 'xml'}).status_code, 400)
+
+    # Peak memory while streaming 10x more tasks must stay about the same.
+    @mock.patch.object(TaskExportView, 'chunk_size', 100)
+    def test_memory_is_flat(self):
+        def peak_memory():
+            response = self.client.get(self.url)
+            tracemalloc.start()
+            try:
+                for _ in response.streaming_content:
+                    pass
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        seed_tasks(self.user, 500)
+        small = peak_memory()
+        seed_tasks(self.user, 4500)
+        large = peak_memory()
+        self.assertLess(large, small * 1.5, (small, large))
+
+
+class TaskImportTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('task-import')
+
+    def upload(self, name, content, **params):
+        url = f"{self.url}?as={params['as']}" if 'as' in params else self.url
+        return self.client.post(url, {'file': SimpleUploadedFile(name, content.encode())}, format='multipart')
+
+    def test_csv_with_row_errors(self):
+        content = (
+            'title,description,due_date,status\n'
+            'First,,2030-01-02,pending\n'
+            ',missing title,,\n'
+            'Third,"multi\nline",,completed\n'
+            'Fourth,,not-a-date,bogus\n'
+        )
+        response = self.upload('tasks.csv', content)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['imported'], response.data['failed']), (2, 2))
+        self.assertEqual([error['line'] for error in response.data['errors']], [3, 6])
+        self.assertEqual(set(response.data['errors'][1]['errors']), {'due_date', 'status'})
+        third = Task.objects.get(title='Third')
+        self.assertEqual((third.description, third.status, third.user), ('multi\nline', 'completed', self.user))
+        call_command('rebuild_task_stats', '--verify', stdout=StringIO())
+
+    def test_ndjson(self):
+        content = '{"title": "One", "status": "deferred"}\n\nnot json\n["a list"]\n{"title": "Two"}\n'
+        response = self.upload('upload.txt', content, **{'as': 'ndjson'})
+        self.assertEqual((response.data['imported'], response.data['failed']), (2, 2))
+        self.assertEqual([error['line'] for error in response.data['errors']], [3, 4])
+        self.assertEqual(Task.objects.get(title='One').status, 'deferred')
+
+    def test_rows_follow_serializer_rules(self):
+        content = (
+            '{"title": "  Padded  "}\n'
+            '{"title": true}\n'
+            '{"title": "Nul\\u0000char"}\n'
+            '{"title": "Listed", "description": ["not", "text"]}\n'
+        )
+        response = self.upload('upload.ndjson', content, **{'as': 'ndjson'})
+        self.assertEqual((response.data['imported'], response.data['failed']), (1, 3))
+        self.assertEqual(Task.objects.get().title, 'Padded')
+        errors = {error['line']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(errors[2], {'title': ['Not a valid string.']})
+        self.assertEqual(errors[3], {'title': ['Null characters are not allowed.']})
+        self.assertEqual(errors[4], {'description': ['Not a valid string.']})
+
+    def test_unknown_format(self):
+        self.assertEqual(self.upload('tasks.xml', '<tasks/>').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {}, format='multipart').status_code, 400)
+
+    def test_export_round_trip(self):
+        Task.objects.create(user=self.user, title='Exported, "quoted"', description='x', due_date=timezone.localdate())
+        exported = b''.join(self.client.get(reverse('task-export'), {'as': 'csv'}).streaming_content).decode()
+        Task.objects.all().delete()
+        self.assertEqual(self.upload('tasks.csv', exported).data['imported'], 1)
+        self.assertEqual(Task.objects.get().title, 'Exported, "quoted"')
+
+    def test_batches(self):
+        content = ''.join(f'{{"title": "Task {i}"}}\n' for i in range(25))
+        report = import_tasks(self.user, BytesIO(content.encode()), 'ndjson', batch_size=10)
+        self.assertEqual(report.imported, 25)
+        self.assertEqual(TaskStats.objects.get(user=self.user).pending, 25)
+
+    def test_invalid_utf8_stops_and_reports(self):
+        # Text is decoded in blocks, so rows decoded before the bad block are kept.
+        report = import_tasks(self.user, BytesIO(b'title\n' + b'Good\n' * 5000 + b'\xff\xfe\n'), 'csv')
+        self.assertGreater(report.imported, 0)
+        self.assertEqual(report.failed, 1)
+        self.assertIn('Unreadable input', report.errors[0]['errors']['non_field_errors'][0])
+        self.assertEqual(Task.objects.count(), report.imported)
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'COPY is PostgreSQL-only')
+    def test_copy_load(self):
+        content = 'title,description,due_date\n"\\N",,2030-01-01\nSecond,plain,\n'
+        report = import_tasks(self.user, BytesIO(content.encode()), 'csv')
+        self.assertEqual(report.imported, 2)
+        self.assertEqual(Task.objects.get(title='\\N').description, '')
+        self.assertTrue(Task.objects.filter(search_vector__isnull=False).exists())
+        call_command('rebuild_task_stats', '--verify', stdout=StringIO())
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8') as handle:
+            handle.write('title,status\nFrom file,in_progress\nBad,unknown\n')
+            handle.flush()
+            out = StringIO()
+            call_command('import_tasks', handle.name, '--user', 'alice', stdout=out)
+        self.assertIn('Imported 1 tasks, 1 rows failed', out.getvalue())
+        self.assertEqual(Task.objects.get().status, 'in_progress')
+
+
+
+# The end-to-end API benchmark and its baseline comparison.
+class BenchmarkAPICommandTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.baseline = f'{directory.name}/api.json'
+
+    def run_benchmark(self, *args):
+        out = StringIO()
+        call_command('benchmark_api', '--users', '2', '--tasks', '15', '--requests', '3', '--warmup', '1',
+                     '--baseline', self.baseline, *args, stdout=out)
+        return out.getvalue()
+
+    def test_save_and_compare_baseline(self):
+        output = self.run_benchmark('--save-baseline')
+        for scenario in ('register', 'login', 'list', 'detail', 'create', 'update', 'delete'):
+            self.assertIn(scenario, output)
+        with open(self.baseline) as handle:
+            baseline = json.load(handle)
+        self.assertGreater(baseline['scenarios']['detail']['queries_per_request'], 0)
+        self.assertFalse(User.objects.filter(username__startswith='bench_api').exists())
+
+        # Pretend the baseline was faster and ran fewer queries than anything can.
+        baseline['scenarios']['list'].update(p50_ms=0.001, queries_per_request=0)
+        with open(self.baseline, 'w') as handle:
+            json.dump(baseline, handle)
+        with self.assertRaisesMessage(CommandError, 'list: p50'):
+            self.run_benchmark('--compare', '--scenario', 'list')
+        with self.assertRaisesMessage(CommandError, 'queries/request'):
+            self.run_benchmark('--compare', '--scenario', 'list', '--tolerance', '1000000')
+        self.assertIn('No regressions', self.run_benchmark('--compare', '--scenario', 'detail', '--tolerance', '1000'))
+
+    def test_compare_needs_a_matching_baseline(self):
+        with self.assertRaisesMessage(CommandError, 'No baseline'):
+            self.run_benchmark('--compare')
+        self.run_benchmark('--save-baseline', '--scenario', 'detail')
+        with self.assertRaisesMessage(CommandError, 'users=2'):
+            call_command('benchmark_api', '--users', '1', '--tasks', '15', '--requests', '1',
+                         '--scenario', 'detail', '--baseline', self.baseline, '--compare', stdout=StringIO())
+
+# Read-replica routing. No replica database exists in tests, so the routing
+# decision is checked without running queries (and outside a test transaction,
+# which would keep every read on the primary). The test cache stands in for the
+# shared pin cache of a deployment with REDIS_URL.
+@override_settings(
+    DATABASE_REPLICAS=['replica_0'], DATABASE_REPLICA_PIN_SECONDS=5, DATABASE_REPLICA_PIN_CACHE_ALIAS='default',
+)
+class ReadReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.seen = []
+
+        def view(request):
+            self.seen.append(ReadReplicaRouter().db_for_read(Task))
+            return HttpResponse()
+        self.view = view
+
+        # What the request handler does between the middleware's __call__ and the view.
+        def get_response(request):
+            self.middleware.process_view(request, view, (), {})
+            return view(request)
+        self.middleware = ReadReplicaMiddleware(get_response)
+
+    def request(self, method, view_class, token='Bearer a'):
+        self.view.cls = view_class
+        return self.middleware(getattr(self.factory, method)('/api/tasks/', HTTP_AUTHORIZATION=token))
+
+    def test_opted_in_reads_use_a_replica(self):
+        self.request('get', TaskDetailView)
+        self.request('get', TaskStatsView)
+        self.assertEqual(self.seen, ['replica_0', 'default'])
+        self.assertFalse(replica_reads_enabled())
+
+    def test_writes_use_the_primary(self):
+        self.request('post', TaskListCreateView)
+        self.assertEqual(ReadReplicaRouter().db_for_write(Task), 'default')
+        self.assertEqual(self.seen, ['default'])
+
+    def test_client_is_pinned_to_primary_after_writing(self):
+        self.request('post', TaskListCreateView)
+        self.request('get', TaskListCreateView)
+        self.request('get', TaskListCreateView, token='Bearer other')
+        self.assertEqual(self.seen[1:], ['default', 'replica_0'])
+
+    @override_settings(DATABASE_REPLICA_PIN_CACHE_ALIAS=None)
+    def test_reads_stay_on_the_primary_without_a_shared_cache(self):
+        self.request('get', TaskDetailView)
+        self.request('post', TaskListCreateView)
+        self.assertEqual(self.seen, ['default', 'default'])
+
+
+# Per-endpoint request metrics and the Prometheus /metrics endpoint.
+@override_settings(METRICS={
+    'ENABLED': True, 'AUTH_TOKEN': 'scrape-secret', 'SLOW_REQUEST_MS': 500, 'SLOW_REQUEST_SAMPLE_RATE': 1.0,
+    'MAX_SAMPLED_QUERIES': 50,
+})
+@shared_cache
+class RequestMetricsTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        registry.clear()
+        self.user = User.objects.create_user(username='metrics', password='password123')
+        self.task = Task.objects.create(user=self.user, title='Measured')
+        self.client.force_authenticate(user=self.user)
+
+    def metric(self, body, line_start):
+        for line in body.splitlines():
+            if line.startswith(line_start):
+                return float(line.rsplit(' ', 1)[1])
+        self.fail(f'No metric line starting with {line_start!r}')
+
+    def test_records_latency_queries_and_serialization_per_endpoint(self):
+        self.client.get(reverse('task-detail', args=[self.task.pk]))
+        self.client.get(reverse('task-detail', args=[self.task.pk]))
+        self.client.get('/api/no-such-endpoint/')
+
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        labels = 'endpoint="task-detail",method="GET"'
+        self.assertEqual(self.metric(body, f'http_request_duration_seconds_count{{{labels}}}'), 2)
+        self.assertEqual(self.metric(body, f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'), 2)
+        self.assertEqual(self.metric(body, f'http_requests_total{{{labels},status="200"}}'), 2)
+        # One query per detail request (see `TaskQueryCountTests.test_detail`).
+        self.assertEqual(self.metric(body, f'db_queries_per_request_sum{{{labels}}}'), 2)
+        self.assertEqual(self.metric(body, f'db_queries_per_request_bucket{{{labels},le="1"}}'), 2)
+        self.assertGreater(self.metric(body, f'db_query_duration_seconds_total{{{labels}}}'), 0)
+        self.assertGreater(self.metric(body, f'serialization_duration_seconds_total{{{labels}}}'), 0)
+        self.assertEqual(self.metric(body, 'http_requests_total{endpoint="unmatched",method="GET",status="404"}'), 1)
+
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with override_settings(METRICS={**settings.METRICS, 'SLOW_REQUEST_MS': 0}):
+            with self.assertLogs('backend.metrics.slow', level='WARNING') as logs:
+                self.client.get(reverse('task-detail', args=[self.task.pk]), {'secret': 'abc'})
+        self.assertIn('(task-detail)', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+        # Query strings can carry personal data and are left out.
+        self.assertNotIn('secret', logs.output[0])
+
+    def test_fast_requests_are_not_logged(self):
+        with self.assertNoLogs('backend.metrics.slow'):
+            self.client.get(reverse('task-detail', args=[self.task.pk]))
+
+    def test_auth_token_is_required(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        # Without a configured token there is no endpoint at all.
+        with override_settings(METRICS={**settings.METRICS, 'AUTH_TOKEN': ''}):
+            self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+
+# The read-only list fast path (`task_row_encoder` + `FastJSONRenderer`) must produce
+# exactly the bytes `TaskSerializer` + DRF's `JSONRenderer` would.
+class TaskFastPathParityTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='ünïcode "user"', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        seed_tasks(self.user, 25)
+        tricky = [
+            ('Line\u2028and\u2029paragraph', None),
+            ('Quotes " and \\ backslash / slash', ''),
+            ('Control \x00\x01\x1f\x7f chars\t\n', 'ünïcödé 😀 text'),
+            ('</script><script>alert(1)</script>', 'multi\nline\r\ndescription'),
+        ]
+        for title, description in tricky:
+            Task.objects.create(user=self.user, title=title, description=description, due_date=None)
+        # Whole-second timestamps render without a fraction; others with microseconds.
+        Task.objects.filter(title__startswith='Quotes').update(
+            created_at=timezone.now().replace(microsecond=0), updated_at=timezone.now().replace(microsecond=5),
+        )
+
+    def expected(self, tasks):
+        return JSONRenderer().render(TaskSerializer(tasks, many=True).data)
+
+    def fast(self, queryset):
+        return FastJSONRenderer().render(task_row_encoder.encode(task_row_encoder.values(queryset)))
+
+    def test_encoder_matches_serializer(self):
+        queryset = TaskSerializer.setup_queryset(Task.objects.filter(user=self.user)).order_by('-created_at', '-id')
+        self.assertEqual(self.fast(queryset), self.expected(queryset))
+        self.assertEqual(task_row_encoder.encode(task_row_encoder.values(queryset)),
+                         json.loads(self.expected(queryset)))
+
+    def test_encoder_follows_current_timezone(self):
+        queryset = TaskSerializer.setup_queryset(Task.objects.filter(user=self.user)).order_by('id')
+        with timezone.override('Asia/Kolkata'):
+            self.assertEqual(self.fast(queryset), self.expected(queryset))
+            self.assertIn(b'+05:30"', self.fast(queryset))
+
+    def test_list_responses_match_serializer(self):
+        list_url = reverse('task-list-create')
+        for params in ({}, {'page': 2}, {'ordering': 'title'}, {'status': 'pending'}, {'pagination': 'cursor'}):
+            with self.subTest(params=params):
+                response = self.client.get(list_url, params)
+                tasks = Task.objects.filter(pk__in=[task['id'] for task in response.data['results']])
+                by_id = {task.pk: task for task in tasks.select_related('user')}
+                page = [by_id[task['id']] for task in response.data['results']]
+                expected = dict(response.data, results=TaskSerializer(page, many=True).data)
+                self.assertEqual(response.content, JSONRenderer().render(expected))
+
+    def test_renderer_falls_back_when_it_cannot_match(self):
+        renderer = FastJSONRenderer()
+        data = {'when': timezone.now(), 'day': timezone.now().date(), 'big': 2 ** 70, 1: 'int key', 'ok': [True, None]}
+        self.assertEqual(renderer.render(data), JSONRenderer().render(data))
+        indented = 'application/json; indent=4'
+        self.assertEqual(renderer.render({'a': [1]}, indented), JSONRenderer().render({'a': [1]}, indented))
+        self.assertEqual(renderer.render(None), b'')
+
+    def test_unsupported_fields_are_rejected(self):
+        class CustomSerializer(TaskSerializer):
+            shout = serializers.SerializerMethodField()
+
+            class Meta(TaskSerializer.Meta):
+                fields = TaskSerializer.Meta.fields + ['shout']
+
+            def get_shout(self, task):
+                return task.title.upper()
+
+        with self.assertRaisesMessage(ImproperlyConfigured, 'shout'):
+            TaskRowEncoder(CustomSerializer).plan
+
+
+# Overdue / due-soon digests built by `build_task_digests` and served at /api/tasks/digest/.
+@override_settings(TASK_DIGESTS={
+    'DUE_SOON_DAYS': 7, 'MAX_ITEMS': 2, 'CHUNK_SIZE': 2, 'WORKERS': 1, 'TIME_BUDGET_SECONDS': 600,
+})
+class TaskDigestTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.today = timezone.localdate()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.other = User.objects.create_user(username='bob', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+
+    def add(self, title, days, status='pending', user=None):
+        return Task.objects.create(
+            user=user or self.user, title=title, status=status, due_date=self.today + timedelta(days=days),
+        )
+
+    def build(self, *args):
+        out = StringIO()
+        call_command('build_task_digests', *args, stdout=out)
+        return out.getvalue()
+
+    def test_digest_sections(self):
+        late = [self.add('Late 3', -3), self.add('Late 1', -1), self.add('Late 2', -2)]
+        self.add('Done late', -5, status='completed')
+        self.add('Cancelled soon', 1, status='cancelled')
+        today = self.add('Today', 0, status='in_progress')
+        self.add('Too far', 8)
+        Task.objects.create(user=self.user, title='No date')
+        self.add('Other user', -1, user=self.other)
+
+        self.assertIn('Built 2 digests', self.build())
+        data = self.client.get(reverse('task-digest')).data
+        self.assertEqual(data['date'], self.today)
+        # Earliest due first, cut to MAX_ITEMS; the count covers every overdue task.
+        self.assertEqual(data['overdue']['count'], 3)
+        self.assertEqual([task['id'] for task in data['overdue']['tasks']], [late[0].pk, late[2].pk])
+        self.assertEqual(data['due_soon'], {'count': 1, 'tasks': [
+            {'id': today.pk, 'title': 'Today', 'due_date': self.today.isoformat(), 'status': 'in_progress'},
+        ]})
+
+    def test_rebuild_drops_digests_with_nothing_due(self):
+        task = self.add('Soon', 2)
+        self.build()
+        Task.objects.filter(pk=task.pk).update(status='completed')
+        self.assertIn('Built 0 digests', self.build())
+        self.assertFalse(TaskDigest.objects.exists())
+        data = self.client.get(reverse('task-digest')).data
+        self.assertEqual((data['date'], data['overdue']['count'], data['due_soon']['tasks']), (None, 0, []))
+
+    def test_query_count_does_not_grow_with_users(self):
+        def chunk_queries():
+            with CaptureQueriesContext(connection) as queries:
+                build_digest_chunk(0, 10 ** 9, self.today)
+            return len(queries)
+
+        self.add('Mine', -1)
+        few = chunk_queries()
+        for i in range(10):
+            self.add('Theirs', i - 3, user=User.objects.create_user(username=f'user{i}', password='pass12345'))
+        self.assertEqual(chunk_queries(), few)
+
+    def test_date_and_time_budget(self):
+        self.add('Due in five days', 5)
+        self.build('--date', (self.today + timedelta(days=6)).isoformat())
+        self.assertEqual(TaskDigest.objects.get().overdue_count, 1)
+        with self.assertRaisesMessage(CommandError, 'budget'):
+            self.build('--time-budget', '-1')
+
+
+class TaskArchiveTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        self.old = timezone.now() - timedelta(days=365)
+
+    def add(self, title, status, age=None, user=None):
+        task = Task.objects.create(user=user or self.user, title=title, status=status)
+        if age is not None:
+            Task.objects.filter(pk=task.pk).update(updated_at=age, created_at=age)
+        return task
+
+    def archive(self, *args):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_tasks', *args, stdout=out)
+        return out.getvalue()
+
+    def test_moves_only_old_closed_tasks(self):
+        done = self.add('Done', 'completed', self.old)
+        cancelled = self.add('Cancelled', 'cancelled', self.old)
+        self.add('Old but open', 'pending', self.old)
+        self.add('Recently done', 'completed')
+
+        self.assertIn('Archived 2 tasks', self.archive())
+        self.assertEqual(sorted(ArchivedTask.objects.values_list('id', flat=True)), [done.pk, cancelled.pk])
+        self.assertEqual(Task.objects.count(), 2)
+        archived = ArchivedTask.objects.get(pk=done.pk)
+        self.assertEqual((archived.user_id, archived.title, archived.created_at), (self.user.pk, 'Done', self.old))
+        # The usual delete bookkeeping ran: tombstones and counters.
+        self.assertEqual(TaskTombstone.objects.filter(task_id__in=[done.pk, cancelled.pk]).count(), 2)
+        stats = TaskStats.objects.get(user=self.user)
+        self.assertEqual((stats.completed, stats.cancelled), (1, 0))
+
+    def test_batches_are_resumable(self):
+        tasks = [self.add(f'Done {i}', 'completed', self.old) for i in range(5)]
+        self.assertIn('(last id %d)' % tasks[1].pk, self.archive('--batch-size', '2', '--max-batches', '1'))
+        self.assertEqual(ArchivedTask.objects.count(), 2)
+        self.assertEqual(archive_batch(timezone.now(), 10, after_id=tasks[3].pk), [tasks[4].pk])
+        self.assertIn('Archived 2 tasks in 1 batches', self.archive('--after-id', str(tasks[1].pk)))
+        self.assertFalse(Task.objects.exists())
+
+    def test_list_includes_archived_only_on_request(self):
+        archived = self.add('Archived', 'completed', self.old)
+        self.add('Theirs', 'completed', self.old, user=User.objects.create_user(username='bob', password='pass12345'))
+        live = self.add('Live', 'pending')
+        self.archive()
+
+        response = self.client.get(reverse('task-list-create'))
+        self.assertEqual([task['id'] for task in response.data['results']], [live.pk])
+        response = self.client.get(reverse('task-list-create'), {'include_archived': 'true'})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([task['id'] for task in response.data['results']], [live.pk, archived.pk])
+        self.assertEqual(response.data['results'][1]['user'], 'alice')
+        # Filters and ordering apply to the archived tasks too.
+        response = self.client.get(
+            reverse('task-list-create'), {'include_archived': 'true', 'status': 'completed,pending', 'ordering': 'title'},
+        )
+        self.assertEqual([task['title'] for task in response.data['results']], ['Archived', 'Live'])
+        response = self.client.get(reverse('task-list-create'), {'include_archived': 'true', 'status': 'completed'})
+        self.assertEqual([task['id'] for task in response.data['results']], [archived.pk])
+
+    def test_include_archived_rejects_cursor_pagination(self):
+        response = self.client.get(reverse('task-list-create'), {'include_archived': 'true', 'pagination': 'cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('include_archived', response.data)
+
+
+# Background job called by JobQueueTests.
+job_calls = []
+
+
+def record_job(**kwargs):
+    if kwargs.get('fail'):
+        raise ValueError('Job failed on purpose')
+    job_calls.append(kwargs)
+
+
+class JobQueueTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        job_calls.clear()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+
+    def run_jobs(self):
+        return Worker(threads=1).run(once=True)
+
+    def test_enqueue_and_run(self):
+        enqueue(record_job, task_id=1)
+        enqueue('tasks.tests.record_job', task_id=2)
+        enqueue(record_job, delay=timedelta(hours=1), task_id=3)
+        self.assertEqual(self.run_jobs(), {'done': 2, 'retried': 0, 'failed': 0})
+        self.assertEqual(job_calls, [{'task_id': 1}, {'task_id': 2}])
+        # Done jobs are deleted; the delayed one isn't due yet.
+        self.assertEqual(list(Job.objects.values_list('payload', flat=True)), [{'task_id': 3}])
+
+    def test_enqueue_is_transactional(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                enqueue(record_job, task_id=1)
+                raise ValueError
+        self.assertFalse(Job.objects.exists())
+
+    def test_claimed_jobs_are_leased(self):
+        job = enqueue(record_job)
+        self.assertEqual([claimed.pk for claimed in claim_jobs(10)], [job.pk])
+        self.assertEqual(claim_jobs(10), [])
+        # An expired lease (the worker died) makes the job due again.
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertEqual([claimed.attempts for claimed in claim_jobs(10)], [2])
+
+    def test_retries_with_backoff_then_fails(self):
+        job = enqueue(record_job, max_attempts=2, fail=True)
+        before = timezone.now()
+        with self.assertLogs('tasks.jobs', 'WARNING'):
+            self.assertEqual(self.run_jobs(), {'done': 0, 'retried': 1, 'failed': 0})
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('Job failed on purpose', job.last_error)
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=settings.JOBS['BACKOFF_SECONDS']))
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('tasks.jobs', 'ERROR'):
+            self.assertEqual(self.run_jobs(), {'done': 0, 'retried': 0, 'failed': 1})
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertEqual(claim_jobs(10), [])
+
+    def test_task_writes_enqueue_configured_jobs(self):
+        self.client.force_authenticate(user=self.user)
+        with override_settings(JOBS={**settings.JOBS, 'TASK_WRITE_JOBS': ['tasks.tests.record_job']}):
+            response = self.client.post(reverse('task-list-create'), {'title': 'Write'})
+            self.client.delete(reverse('task-detail', args=[response.data['id']]))
+        out = StringIO()
+        call_command('run_workers', '--once', '--threads', '1', stdout=out)
+        self.assertIn('Ran 2 jobs: 2 done', out.getvalue())
+        self.assertEqual(
+            [(call['event'], call['task_id'], call['user_id']) for call in job_calls],
+            [('task.created', response.data['id'], self.user.pk), ('task.deleted', response.data['id'], self.user.pk)],
+        )
+
+    # Bulk writes and imports send no `post_save`, but queue the same jobs.
+    @override_settings(JOBS={**settings.JOBS, 'TASK_WRITE_JOBS': ['tasks.tests.record_job']})
+    def test_bulk_writes_and_imports_enqueue_configured_jobs(self):
+        self.client.force_authenticate(user=self.user)
+        task = Task.objects.create(user=self.user, title='Existing')
+        Job.objects.all().delete()
+        response = self.client.post(reverse('task-bulk'), [
+            {'action': 'create', 'data': {'title': 'One'}},
+            {'action': 'create', 'data': {'title': 'Two'}},
+            {'action': 'update', 'id': task.pk, 'data': {'status': 'completed'}},
+        ], format='json')
+        created = [result['id'] for result in response.data['results'][:2]]
+        report = import_tasks(self.user, BytesIO(b'title\nThree\nFour\n'), 'csv')
+        self.assertEqual(report.imported, 2)
+        imported = list(Task.objects.filter(title__in=['Three', 'Four']).order_by('id').values_list('pk', flat=True))
+        self.run_jobs()
+        self.assertEqual(
+            [(call['event'], call['task_id'], call['user_id']) for call in job_calls],
+            [('task.created', task_id, self.user.pk) for task_id in created]
+            + [('task.updated', task.pk, self.user.pk)]
+            + [('task.created', task_id, self.user.pk) for task_id in imported],
+        )
+
+
+
+class TaskOptimisticConcurrencyTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(user=self.user, title='Draft', status='pending')
+        self.url = reverse('task-detail', args=[self.task.pk])
+
+    def test_etag_is_the_version(self):
+        response = self.client.get(self.url)
+        self.assertEqual((response['ETag'], response.data['version']), ('"1"', 1))
+
+    def test_unchanged_update_writes_nothing(self):
+        before = Task.objects.get(pk=self.task.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(self.url, {'title': 'Draft', 'status': 'pending'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE')])
+        after = Task.objects.get(pk=self.task.pk)
+        self.assertEqual((after.version, after.updated_at), (1, before.updated_at))
+
+    def test_update_writes_only_changed_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, {'title': 'Final', 'status': 'pending'})
+        self.assertEqual((response.data['title'], response.data['version'], response['ETag']), ('Final', 2, '"2"'))
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "tasks_task"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"status"', updates[0].split('WHERE')[0])
+        self.assertIn('"version" = %d' % 1, updates[0].split('WHERE')[1].replace('"tasks_task".', ''))
+
+    def test_if_match(self):
+        response = self.client.patch(self.url, {'title': 'Mine'}, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 200)
+        # The client that still holds version 1 can't overwrite it.
+        response = self.client.patch(self.url, {'title': 'Theirs'}, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Task.objects.get(pk=self.task.pk).title, 'Mine')
+        for header in ('W/"2"', 'nonsense'):
+            self.assertEqual(self.client.patch(self.url, {'title': 'x'}, HTTP_IF_MATCH=header).status_code, 412)
+        self.assertEqual(self.client.patch(self.url, {'title': 'Any'}, HTTP_IF_MATCH='*').status_code, 200)
+
+    def test_apply_changes_refuses_stale_versions(self):
+        first, second = Task.objects.get(pk=self.task.pk), Task.objects.get(pk=self.task.pk)
+        self.assertTrue(first.apply_changes({'status': 'completed'}))
+        self.assertFalse(second.apply_changes({'title': 'Stale'}))
+        task = Task.objects.get(pk=self.task.pk)
+        self.assertEqual((task.title, task.status, task.version), ('Draft', 'completed', 2))
+        stats = TaskStats.objects.get(user=self.user)
+        self.assertEqual((stats.pending, stats.completed), (0, 1))
+
+    def test_concurrent_write_without_if_match_is_merged(self):
+        original = Task.apply_changes
+
+        def write_in_between(task, changes):
+            if task.version == 1:
+                Task.objects.filter(pk=task.pk).update(status='in_progress')
+            return original(task, changes)
+
+        with mock.patch.object(Task, 'apply_changes', write_in_between):
+            response = self.client.patch(self.url, {'title': 'Renamed'})
+        self.assertEqual((response.data['title'], response.data['status'], response.data['version']),
+                         ('Renamed', 'in_progress', 3))
+
+    def test_delete_if_match(self):
+        self.assertEqual(self.client.delete(self.url, HTTP_IF_MATCH='"7"').status_code, 412)
+        self.assertEqual(self.client.delete(self.url, HTTP_IF_MATCH='"1"').status_code, 204)
+        self.assertFalse(Task.objects.filter(pk=self.task.pk).exists())
+
+
+# Subtasks: `Task.parent` with its materialized `path`.
+@shared_cache
+class TaskHierarchyTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        self.project = Task.objects.create(user=self.user, title='Project')
+        self.step = Task.objects.create(user=self.user, title='Step', parent=self.project)
+        self.detail = Task.objects.create(user=self.user, title='Detail', parent=self.step, status='completed')
+
+    def test_paths(self):
+        self.assertEqual(self.project.path, '/')
+        self.assertEqual(self.detail.path, f'/{self.project.pk}/{self.step.pk}/')
+        self.assertEqual(self.detail.depth, 2)
+        self.assertEqual(list(self.project.descendants().order_by('id')), [self.step, self.detail])
+
+    def test_create_subtask(self):
+        response = self.client.post(reverse('task-list-create'), {'title': 'Sub', 'parent': self.detail.pk})
+        self.assertEqual((response.status_code, response.data['parent']), (201, self.detail.pk))
+        self.assertEqual(Task.objects.get(pk=response.data['id']).path, f'{self.detail.subtree_prefix}')
+
+    def test_other_users_parent_is_rejected(self):
+        bob = User.objects.create_user(username='bob', password='pass12345')
+        other = Task.objects.create(user=bob, title='Not yours')
+        response = self.client.post(reverse('task-list-create'), {'title': 'Sub', 'parent': other.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('parent', response.data)
+
+    def test_move_subtree_is_one_update(self):
+        other = Task.objects.create(user=self.user, title='Other project')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(reverse('task-detail', args=[self.step.pk]), {'parent': other.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.get(pk=self.step.pk).path, f'/{other.pk}/')
+        self.assertEqual(Task.objects.get(pk=self.detail.pk).path, f'/{other.pk}/{self.step.pk}/')
+        moves = [query for query in queries if query['sql'].startswith('UPDATE "tasks_task" SET "path"')]
+        self.assertEqual(len(moves), 1)
+        # And back to the top level.
+        self.client.patch(reverse('task-detail', args=[self.step.pk]), {'parent': None}, format='json')
+        self.assertEqual(Task.objects.get(pk=self.detail.pk).path, f'/{self.step.pk}/')
+
+    def test_cycles_are_rejected(self):
+        for parent in (self.project, self.detail):
+            response = self.client.patch(reverse('task-detail', args=[self.project.pk]), {'parent': parent.pk})
+            self.assertEqual(response.status_code, 400)
+        with self.assertRaises(ValueError):
+            self.project.parent = self.detail
+            self.project.save()
+
+    @override_settings(TASK_HIERARCHY={'MAX_DEPTH': 3, 'MAX_NEST': 3})
+    def test_max_depth(self):
+        # Detail is at depth 2: a subtask of it is at the limit, one more level is not.
+        url = reverse('task-list-create')
+        self.assertEqual(self.client.post(url, {'title': 'a', 'parent': self.detail.pk}).status_code, 201)
+        leaf = Task.objects.get(title='a')
+        self.assertEqual(self.client.post(url, {'title': 'b', 'parent': leaf.pk}).status_code, 400)
+        # Moving the project (3 levels) under another task would make it 4 deep.
+        other = Task.objects.create(user=self.user, title='Other')
+        response = self.client.patch(reverse('task-detail', args=[self.project.pk]), {'parent': other.pk})
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_moves_are_rejected(self):
+        response = self.client.post(reverse('task-bulk'), [
+            {'action': 'update', 'id': self.detail.pk, 'data': {'parent': None}},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse('task-bulk'), [
+            {'action': 'create', 'data': {'title': 'Sub', 'parent': self.step.pk}},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.get(title='Sub').path, self.step.subtree_prefix)
+
+    def test_delete_removes_subtree(self):
+        response = self.client.delete(reverse('task-detail', args=[self.step.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(list(Task.objects.values_list('title', flat=True)), ['Project'])
+        self.assertEqual(TaskTombstone.objects.filter(user=self.user).count(), 2)
+        stats = TaskStats.objects.get(user=self.user)
+        self.assertEqual((stats.pending, stats.completed), (1, 0))
+        # Queryset deletes take the subtasks along too.
+        Task.objects.filter(pk=self.project.pk).delete()
+        self.assertEqual(TaskStats.objects.get(user=self.user).pending, 0)
+
+    def test_parent_filter(self):
+        url = reverse('task-list-create')
+        titles = [task['title'] for task in self.client.get(url, {'parent': 'none'}).data['results']]
+        self.assertEqual(titles, ['Project'])
+        titles = [task['title'] for task in self.client.get(url, {'parent': self.step.pk}).data['results']]
+        self.assertEqual(titles, ['Detail'])
+        self.assertEqual(self.client.get(url, {'parent': 'x'}).status_code, 400)
+
+    def test_nested_list(self):
+        url = reverse('task-list-create')
+        with CaptureQueriesContext(connection) as flat:
+            self.client.get(url, {'parent': 'none'})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'parent': 'none', 'nest': 1})
+        [project] = response.data['results']
+        [step] = project['children']
+        self.assertEqual(step['title'], 'Step')
+        self.assertNotIn('children', step)
+        # One more query, for the subtasks of the whole page.
+        self.assertEqual(len(queries), len(flat) + 1)
+        [project] = self.client.get(url, {'parent': 'none', 'nest': 3}).data['results']
+        self.assertEqual(project['children'][0]['children'][0]['title'], 'Detail')
+        self.assertEqual(project['children'][0]['children'][0]['children'], [])
+        # Same encoding as the unnested list.
+        self.assertEqual(
+            {key: value for key, value in project.items() if key != 'children'},
+            TaskSerializer(self.project).data,
+        )
+        self.assertEqual(self.client.get(url, {'nest': 9}).status_code, 400)
+
+    def test_tree(self):
+        url = reverse('task-tree', args=[self.project.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(response.data['task']['children'][0]['children'][0]['id'], self.detail.pk)
+        self.assertEqual(response.data['descendants']['total'], 2)
+        self.assertEqual(response.data['descendants']['by_status']['completed'], 1)
+        response = self.client.get(url, {'depth': 1})
+        self.assertNotIn('children', response.data['task']['children'][0])
+        self.assertEqual(response.data['descendants']['by_status'], {
+            'pending': 1, 'in_progress': 0, 'completed': 1, 'deferred': 0, 'cancelled': 0,
+        })
+        self.assertEqual(self.client.get(url, {'depth': 0}).status_code, 400)
+
+    def test_archive_keeps_parents_until_their_subtasks_go(self):
+        Task.objects.filter(user=self.user).update(status='completed')
+        cutoff = timezone.now() + timedelta(days=1)
+        self.assertEqual(archive_batch(cutoff, 10), [self.detail.pk])
+        self.assertEqual(archive_batch(cutoff, 10), [self.step.pk])
+        self.assertEqual(ArchivedTask.objects.get(pk=self.step.pk).parent, self.project.pk)
+
+
+# Tasks shared through workspaces.
+@shared_cache
+class TaskWorkspaceTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user(username='alice', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', password='pass12345')
+        self.team = Workspace.objects.create(name='Team', created_by=self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            Membership.objects.create(workspace=self.team, user=self.alice, role=Membership.OWNER)
+            Membership.objects.create(workspace=self.team, user=self.bob)
+        self.shared = Task.objects.create(user=self.alice, title='Shared', workspace=self.team)
+        self.private = Task.objects.create(user=self.alice, title='Private')
+        self.client.force_authenticate(user=self.bob)
+
+    def titles(self, **params):
+        return sorted(task['title'] for task in self.client.get(reverse('task-list-create'), params).data['results'])
+
+    def test_members_see_and_edit_shared_tasks(self):
+        self.assertEqual(self.titles(), ['Shared'])
+        self.assertEqual(self.client.get(reverse('task-detail', args=[self.private.pk])).status_code, 404)
+        response = self.client.patch(reverse('task-detail', args=[self.shared.pk]), {'status': 'completed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user'], 'alice')
+        # Counters stay with the task's creator.
+        self.assertEqual(TaskStats.objects.get(user=self.alice).completed, 1)
+
+    def test_workspace_filter(self):
+        Task.objects.create(user=self.bob, title='Mine')
+        self.assertEqual(self.titles(), ['Mine', 'Shared'])
+        self.assertEqual(self.titles(workspace=self.team.pk), ['Shared'])
+        self.assertEqual(self.titles(workspace='none'), ['Mine'])
+
+    def test_share_only_in_own_workspaces(self):
+        other = Workspace.objects.create(name='Other')
+        url = reverse('task-list-create')
+        self.assertEqual(self.client.post(url, {'title': 'x', 'workspace': other.pk}).status_code, 400)
+        response = self.client.post(url, {'title': 'Plan', 'workspace': self.team.pk})
+        self.assertEqual((response.status_code, response.data['workspace']), (201, self.team.pk))
+        self.client.force_authenticate(user=self.alice)
+        self.assertIn('Plan', self.titles())
+
+    def test_leaving_a_workspace_hides_its_tasks(self):
+        self.assertEqual(self.titles(), ['Shared'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Membership.objects.filter(user=self.bob).delete()
+        self.assertEqual(self.titles(), [])
+
+    def test_cached_pages_follow_writes_by_other_members(self):
+        self.assertEqual(self.titles(), ['Shared'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(user=self.alice, title='New', workspace=self.team)
+        self.assertEqual(self.titles(), ['New', 'Shared'])
+
+    def test_members_sync_deletions(self):
+        since = timezone.now() - timedelta(minutes=1)
+        task_id = self.shared.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shared.delete()
+        response = self.client.get(reverse('task-list-create'), {'since': since.isoformat()})
+        self.assertEqual(response.data['deleted'], [task_id])
+
+    def test_subtasks_stay_in_their_parents_workspace(self):
+        url = reverse('task-list-create')
+        response = self.client.post(url, {'title': 'Step', 'parent': self.shared.pk})
+        self.assertEqual(response.data['workspace'], self.team.pk)
+        response = self.client.post(url, {'title': 'Step', 'parent': self.shared.pk, 'workspace': ''}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(reverse('task-detail', args=[self.shared.pk]), {'workspace': None}, format='json')
+        self.assertEqual(response.status_code, 400)
+        # The subtask shows up in the tree whoever created it, for every member.
+        for user in (self.bob, self.alice):
+            self.client.force_authenticate(user=user)
+            tree = self.client.get(reverse('task-tree', args=[self.shared.pk])).data
+            self.assertEqual([child['title'] for child in tree['task']['children']], ['Step'])
+
+    def test_list_is_one_query_for_a_member_of_many_workspaces(self):
+        workspaces = Workspace.objects.bulk_create([Workspace(name=f'Team {i}') for i in range(50)])
+        with self.captureOnCommitCallbacks(execute=True):
+            Membership.objects.bulk_create([Membership(workspace=w, user=self.bob) for w in workspaces])
+            for workspace in workspaces:
+                Task.objects.create(user=self.alice, title=f'In {workspace.name}', workspace=workspace)
+        # `bulk_create` sends no signals.
+        cache.delete(f'users:workspace-ids:{self.bob.pk}')
+        url = reverse('task-list-create')
+        self.client.get(url)  # Reads and caches bob's workspace ids.
+
+        loner = User.objects.create_user(username='carol', password='pass12345')
+        Task.objects.create(user=loner, title='Alone')
+        self.client.force_authenticate(user=loner)
+        with CaptureQueriesContext(connection) as baseline:
+            self.client.get(url, {'page_size': 20})
+        self.client.force_authenticate(user=self.bob)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'page_size': 20})
+        self.assertEqual(response.data['count'], 51)
+        self.assertEqual(len(queries), len(baseline))
+        self.assertFalse([query for query in queries if 'membership' in query['sql']])
+        [page] = [query['sql'] for query in queries if 'LIMIT' in query['sql']]
+        self.assertNotIn('JOIN "users_workspace"', page)
+
+
+# Recurring tasks: rules, occurrences expanded into windowed lists and digests, and
+# single occurrences saved as tasks.
+@shared_cache
+class TaskRecurrenceTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('task-list-create')
+        self.monday = date(2026, 10, 19)
+
+    def series(self, rule, starts_on=None, **fields):
+        fields.setdefault('user', self.user)
+        fields.setdefault('title', 'Standup')
+        return TaskRecurrence.objects.create(rule=rule, starts_on=starts_on or self.monday, **fields)
+
+    def window(self, days=7, **params):
+        params = {
+            'due_after': self.monday.isoformat(), 'due_before': (self.monday + timedelta(days=days - 1)).isoformat(),
+            'ordering': 'due_date', **params,
+        }
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_rules(self):
+        self.assertEqual(str(parse_rule('rrule:byday=fr,mo;freq=weekly;interval=1')), 'FREQ=WEEKLY;BYDAY=MO,FR')
+        fortnightly = Schedule(parse_rule('FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,FR'), self.monday)
+        self.assertEqual(
+            list(fortnightly.between(self.monday, date(2026, 11, 8))),
+            [date(2026, 10, 19), date(2026, 10, 23), date(2026, 11, 2), date(2026, 11, 6)],
+        )
+        month_ends = Schedule(parse_rule('FREQ=MONTHLY;BYMONTHDAY=31,-1'), date(2026, 1, 31))
+        self.assertEqual(
+            list(month_ends.between(date(2026, 1, 1), date(2026, 4, 30))),
+            [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30)],
+        )
+        leap_day = Schedule(parse_rule('FREQ=YEARLY'), date(2024, 2, 29))
+        self.assertEqual(list(leap_day.between(date(2024, 1, 1), date(2029, 1, 1))), [date(2024, 2, 29), date(2028, 2, 29)])
+        self.assertEqual(last_date(parse_rule('FREQ=DAILY;INTERVAL=2;COUNT=3'), self.monday), date(2026, 10, 23))
+        # Counting, far from the first date, agrees with listing.
+        first, last = date(2031, 3, 5), date(2032, 7, 9)
+        for rule in ('FREQ=DAILY;INTERVAL=3', 'FREQ=WEEKLY;BYDAY=TU,SU', 'FREQ=MONTHLY;BYMONTHDAY=30,-30', 'FREQ=YEARLY'):
+            schedule = Schedule(parse_rule(rule), date(2020, 2, 29))
+            self.assertEqual(schedule.count_between(first, last), len(list(schedule.between(first, last))), rule)
+
+    def test_create_validates_the_rule(self):
+        url = reverse('task-recurrence-list-create')
+        response = self.client.post(url, {'title': 'Report', 'rule': 'RRULE:FREQ=MONTHLY;COUNT=12;BYMONTHDAY=-1',
+                                           'starts_on': '2026-10-31'})
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual((response.data['rule'], response.data['ends_on']),
+                         ('FREQ=MONTHLY;BYMONTHDAY=-1;COUNT=12', '2027-09-30'))
+        for rule in ('FREQ=HOURLY', 'FREQ=DAILY;BYSETPOS=1', 'FREQ=DAILY;COUNT=5000', 'FREQ=DAILY;UNTIL=20200101'):
+            response = self.client.post(url, {'title': 'Bad', 'rule': rule, 'starts_on': '2026-10-31'})
+            self.assertEqual((response.status_code, list(response.data)), (400, ['rule']), rule)
+
+    def test_windows_list_occurrences_among_tasks(self):
+        series = self.series('FREQ=WEEKLY;BYDAY=MO,WE,FR')
+        task = Task.objects.create(user=self.user, title='Dentist', due_date=self.monday + timedelta(days=1))
+        data = self.window()
+        self.assertEqual(data['count'], 4)
+        self.assertEqual(
+            [(item['id'], item['due_date']) for item in data['results']],
+            [(None, '2026-10-19'), (task.pk, '2026-10-20'), (None, '2026-10-21'), (None, '2026-10-23')],
+        )
+        occurrence = data['results'][0]
+        self.assertEqual(
+            (occurrence['recurrence'], occurrence['occurrence_date'], occurrence['title'], occurrence['status']),
+            (series.pk, '2026-10-19', 'Standup', 'pending'),
+        )
+        self.assertEqual(self.window(status='completed')['count'], 0)
+        self.assertEqual(self.window(status='pending,completed')['count'], 4)
+        self.assertEqual(self.window(search='dentist')['count'], 1)
+        # Only bounded windows, on page-number lists, are expanded.
+        self.assertEqual(self.client.get(self.url, {'due_after': self.monday.isoformat()}).data['count'], 1)
+        self.assertEqual(len(self.window(pagination='cursor')['results']), 1)
+
+    def test_pages_cover_tasks_and_occurrences_once(self):
+        self.series('FREQ=DAILY')
+        self.series('FREQ=WEEKLY;BYDAY=TU,TH', title='Review')
+        for day in (0, 2, 2, 5, 6, 6):
+            Task.objects.create(user=self.user, title=f'Task {day}', due_date=self.monday + timedelta(days=day))
+        for ordering, field, reverse in (('due_date', 'due_date', False), ('-due_date', 'due_date', True),
+                                         ('title', 'title', False), ('-created_at', 'created_at', True)):
+            walked, page = [], 1
+            while True:
+                data = self.window(ordering=ordering, page=page)
+                walked += data['results']
+                if not data['next']:
+                    break
+                page += 1
+            self.assertEqual(len(walked), data['count'])
+            self.assertEqual(data['count'], 15)
+            keys = {(item['id'], item['recurrence'], item['occurrence_date']) for item in walked}
+            self.assertEqual(len(keys), 15, ordering)
+            values = [item[field] for item in walked]
+            self.assertEqual(values, sorted(values, reverse=reverse), ordering)
+
+    def test_completing_an_occurrence_saves_one_task(self):
+        series = self.series('FREQ=DAILY')
+        url = reverse('task-occurrence', args=[series.pk, '2026-10-20'])
+        self.assertEqual(self.client.get(url).data['id'], None)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(url, {'status': 'completed'})
+        self.assertEqual(response.status_code, 201, response.data)
+        task = Task.objects.get(pk=response.data['id'])
+        self.assertEqual(
+            (task.recurrence_id, task.occurrence_date, task.due_date, task.status, task.title),
+            (series.pk, date(2026, 10, 20), date(2026, 10, 20), 'completed', 'Standup'),
+        )
+        self.assertEqual(self.client.get(url).data['id'], task.pk)
+        response = self.client.patch(url, {'status': 'pending'})
+        self.assertEqual((response.status_code, response.data['id']), (409, task.pk))
+        # The task stands in for the occurrence, also once moved to another date.
+        Task.objects.filter(pk=task.pk).update(due_date=date(2026, 12, 1))
+        data = self.window(days=3)
+        self.assertEqual((data['count'], [item['id'] for item in data['results']]), (2, [None, None]))
+        # ... and once archived.
+        Task.objects.filter(pk=task.pk).update(due_date=date(2026, 10, 20), updated_at=timezone.now() - timedelta(days=1))
+        archive_batch(timezone.now(), 10)
+        cache.clear()
+        self.assertEqual(self.window(days=3)['count'], 2)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.patch(url, {'status': 'pending'})
+        self.assertEqual((response.status_code, response.data['id']), (409, task.pk))
+        self.assertFalse(Task.objects.filter(recurrence=series).exists())
+        for day in ('2026-10-18', 'not-a-date'):
+            self.assertEqual(self.client.get(reverse('task-occurrence', args=[series.pk, day])).status_code, 404)
+
+    def test_shared_series(self):
+        bob = User.objects.create_user(username='bob', password='pass12345')
+        team = Workspace.objects.create(name='Team', created_by=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Membership.objects.create(workspace=team, user=bob)
+        series = self.series('FREQ=DAILY', workspace=team)
+        self.client.force_authenticate(user=bob)
+        self.assertEqual(self.window()['count'], 7)
+        response = self.client.patch(reverse('task-occurrence', args=[series.pk, '2026-10-19']), {'status': 'completed'})
+        self.assertEqual((response.data['user'], response.data['workspace']), ('alice', team.pk))
+        self.assertEqual(TaskStats.objects.get(user=self.user).completed, 1)
+
+    def test_series_changes_reach_cached_lists(self):
+        series = self.series('FREQ=DAILY')
+        self.assertEqual(self.window()['count'], 7)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(reverse('task-recurrence-detail', args=[series.pk]), {'rule': 'FREQ=WEEKLY'})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.window()['count'], 1)
+
+    def test_list_queries_do_not_grow_with_series(self):
+        def window_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                data = self.window(days=365)
+            return len(queries), data['count']
+
+        self.series('FREQ=DAILY')
+        few, count = window_queries()
+        self.assertEqual(count, 365)
+        for i in range(30):
+            self.series('FREQ=WEEKLY', starts_on=self.monday + timedelta(days=i))
+        self.assertEqual(window_queries()[0], few)
+
+    def test_digest_lists_occurrences(self):
+        today = timezone.localdate()
+        series = self.series('FREQ=DAILY', starts_on=today - timedelta(days=30))
+        task = Task.objects.create(user=self.user, title='Due today', due_date=today)
+        call_command('build_task_digests', stdout=StringIO())
+        data = self.client.get(reverse('task-digest')).data
+        overdue_days = settings.TASK_RECURRENCE['DIGEST_OVERDUE_DAYS']
+        self.assertEqual(data['overdue']['count'], overdue_days)
+        self.assertEqual(data['due_soon']['count'], settings.TASK_DIGESTS['DUE_SOON_DAYS'] + 2)
+        self.assertEqual(data['due_soon']['tasks'][:2], [
+            {'id': task.pk, 'title': 'Due today', 'due_date': today.isoformat(), 'status': 'pending'},
+            {'id': None, 'title': 'Standup', 'due_date': today.isoformat(), 'status': 'pending',
+             'recurrence': series.pk},
+        ])
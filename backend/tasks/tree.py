@@ -0,0 +1,47 @@
+# backend/tasks/tree.py
+
+# Subtask trees, read with the materialized path kept in `Task.path` (see the model)
+# instead of one query per level: the descendants of any number of tasks, down to a
+# given depth below each of them, are one prefix query on the path index,
+# and the nesting is put together in Python from each row's `parent`.
+
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+from .models import Task, path_depth
+
+
+# The tasks `user` can see below the `roots` ((id, path) pairs), oldest first: at most
+# `levels` levels below each root, or the whole subtrees if `levels` is None.
+def descendants_of(user, roots, levels=None):
+    subtrees = []
+    for task_id, path in roots:
+        subtree = Q(path__startswith=f'{path}{task_id}/')
+        if levels is not None:
+            subtree &= Q(tree_depth__lte=path.count('/') - 1 + levels)
+        subtrees.append(subtree)
+    queryset = Task.objects.visible_to(user)
+    if levels is not None:
+        queryset = queryset.annotate(tree_depth=path_depth())
+    return queryset.filter(reduce(or_, subtrees)).order_by('created_at', 'id')
+
+
+# Serialized tasks (dicts with `id` and `parent`) grouped by their parent's id.
+def children_by_parent(items):
+    children = defaultdict(list)
+    for item in items:
+        children[item['parent']].append(item)
+    return children
+
+
+# A copy of the serialized task `item` with its subtasks under `children`, nested
+# `levels` deep (the whole subtree if None). Tasks at the last level get no
+# `children` key, so an empty list always means "no subtasks".
+def nest(item, children, levels=None):
+    if levels == 0:
+        return item
+    below = None if levels is None else levels - 1
+    return {**item, 'children': [nest(child, children, below) for child in children.get(item['id'], ())]}
@@ -1,7 +1,10 @@
 # backend/tasks/urls.py
 
 from django.urls import path
-from .views import TaskListCreateView, TaskDetailView
+from .views import (
+    TaskListCreateView, TaskDetailView, TaskTreeView, TaskBulkView, TaskStatsView, TaskDigestView, TaskExportView, TaskImportView,
+    TaskRecurrenceListCreateView, TaskRecurrenceDetailView, TaskOccurrenceView,
+)
 
 urlpatterns = [
     # URL for listing all tasks and creating a new task.
@@ -15,4 +18,43 @@ urlpatterns = [
     # DELETE request to 'api/tasks/<id>/' will delete a task.
     # <int:pk> is a path converter that captures an integer and passes it as 'pk' to the view.
     path('tasks/<int:pk>/', TaskDetailView.as_view(), name='task-detail'),
-]
\ No newline at end of file
+
+    # URL for a task with all of its subtasks nested, and their counts by status.
+    # GET request to 'api/tasks/<id>/tree/?depth=2'.
+    path('tasks/<int:pk>/tree/', TaskTreeView.as_view(), name='task-tree'),
+
+    # URLs for recurring tasks: listing and creating them, and retrieving, updating
+    # or deleting one by its ID.
+    # GET/POST request to 'api/tasks/recurring/'.
+    # GET/PUT/PATCH/DELETE request to 'api/tasks/recurring/<id>/'.
+    path('tasks/recurring/', TaskRecurrenceListCreateView.as_view(), name='task-recurrence-list-create'),
+    path('tasks/recurring/<int:pk>/', TaskRecurrenceDetailView.as_view(), name='task-recurrence-detail'),
+
+    # URL for one occurrence of a recurring task, by date: GET it, or PATCH it to save
+    # it as a task (e.g. to complete it).
+    # GET/PATCH request to 'api/tasks/recurring/<id>/occurrences/2026-10-19/'.
+    path(
+        'tasks/recurring/<int:pk>/occurrences/<str:occurrence_date>/', TaskOccurrenceView.as_view(),
+        name='task-occurrence',
+    ),
+
+    # URL for applying many create/update/delete operations in a single request.
+    # POST request to 'api/tasks/bulk/' with a list of operations.
+    path('tasks/bulk/', TaskBulkView.as_view(), name='task-bulk'),
+
+    # URL for the user's task counts by status, overdue and due this week.
+    # GET request to 'api/tasks/stats/'.
+    path('tasks/stats/', TaskStatsView.as_view(), name='task-stats'),
+
+    # URL for the user's precomputed overdue / due-soon digest.
+    # GET request to 'api/tasks/digest/'.
+    path('tasks/digest/', TaskDigestView.as_view(), name='task-digest'),
+
+    # URL for downloading all of the user's tasks as NDJSON or CSV.
+    # GET request to 'api/tasks/export/?as=csv'.
+    path('tasks/export/', TaskExportView.as_view(), name='task-export'),
+
+    # URL for creating tasks from an uploaded CSV or NDJSON file.
+    # POST request to 'api/tasks/import/' with the file in the 'file' form field.
+    path('tasks/import/', TaskImportView.as_view(), name='task-import'),
+]
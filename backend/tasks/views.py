@@ -1,9 +1,56 @@
 # backend/tasks/views.py
 
-from rest_framework import generics
+import base64
+from datetime import timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import generics, serializers, status
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated # Ensures only logged-in users can access
-from .models import Task # Import the Task model
-from .serializers import TaskSerializer # Import the Task serializer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from backend.metrics import serialization_timer
+from .models import ( # Import the Task models
+    ArchivedTask, Task, TaskDigest, TaskDueDateCount, TaskRecurrence, TaskStats, TaskTombstone, visible_tasks_q,
+)
+from .serializers import ( # Import the Task serializers
+    TaskSerializer, TaskBulkRequestSerializer, TaskRecurrenceSerializer, task_row_encoder,
+)
+from .pagination import TaskCursorPagination, wants_cursor_pagination
+from .filters import TaskFilterBackend, TaskOrderingFilter
+from .cache import TaskListCache, invalidate_task_lists
+from .events import queue_task_event
+from .jobs import enqueue_task_write_jobs
+from .export import EXPORT_FORMATS, export_chunks
+from .importing import IMPORT_FORMATS, import_tasks
+from .renderers import FastJSONRenderer
+from .tree import children_by_parent, descendants_of, nest
+from .occurrences import OccurrenceRows, occurrence_row, saved_occurrences
+from .conditional import (
+    add_validator_headers, if_match_versions, not_modified_response, task_detail_validators, task_list_validators,
+)
+
+# Continuation cursors for delta sync (`TaskListCreateView.delta`): an opaque token
+# holding the `server_time` of the sync and the (updated_at, id) of the last task sent.
+def _encode_delta_cursor(server_time, task):
+    value = f'{server_time.isoformat()}|{task.updated_at.isoformat()}|{task.pk}'
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def _decode_delta_cursor(value):
+    try:
+        server_time, updated_at, task_id = base64.urlsafe_b64decode(value.encode()).decode().split('|')
+        server_time, updated_at, task_id = parse_datetime(server_time), parse_datetime(updated_at), int(task_id)
+    except (ValueError, UnicodeDecodeError):
+        server_time = updated_at = None
+    if server_time is None or updated_at is None:
+        raise serializers.ValidationError({'cursor': ['Invalid cursor.']})
+    return server_time, (updated_at, task_id)
+
 
 # TaskListCreateView
 # This view handles two main functionalities:
@@ -17,13 +64,208 @@ class TaskListCreateView(generics.ListCreateAPIView):
     # (i.e., provide a valid JWT in their request) can access this view.
     permission_classes = [IsAuthenticated]
 
-    # Override `get_queryset` to ensure a user can only see their own tasks.
+    # Server-side filtering (`status`, `due_after`, `due_before`, `overdue`, `search`)
+    # and sorting (`ordering`). See `tasks/filters.py` for the supported parameters.
+    filter_backends = [TaskFilterBackend, TaskOrderingFilter]
+
+    # GET requests may read from a replica when replicas are configured
+    # (see backend/routers.py).
+    read_replica = True
+
+    # JSON is rendered with orjson (same bytes as DRF's renderer, see tasks/renderers.py).
+    renderer_classes = [FastJSONRenderer] + [
+        renderer for renderer in api_settings.DEFAULT_RENDERER_CLASSES if renderer.format != 'json'
+    ]
+
+    # Pick the paginator for this request.
+    # By default the global `PageNumberPagination` is used (with `count`, `next`,
+    # `previous`), which is what the frontend expects. Clients that send
+    # `?pagination=cursor` (or follow a `cursor` link) get keyset pagination instead,
+    # which skips the `COUNT(*)` and the `OFFSET` scan so deep pages stay fast.
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if wants_cursor_pagination(self.request):
+                self._paginator = TaskCursorPagination()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    # Override `get_queryset` to ensure a user can only see their own tasks, and
+    # those of the workspaces they are a member of (see `TaskQuerySet.visible_to`).
     # This is crucial for data privacy and security in a multi-user application.
     def get_queryset(self):
         # Filter tasks to only include those where the 'user' foreign key
-        # matches the currently authenticated user (`self.request.user`).
-        # Tasks are ordered by creation date in descending order (newest first).
-        return Task.objects.filter(user=self.request.user).order_by('-created_at')
+        # matches the currently authenticated user (`self.request.user`), or the
+        # 'workspace' is one of theirs; this is still a single query, with no join.
+        # Tasks are ordered by creation date in descending order (newest first),
+        # with the id as a tie-breaker; this matches the `task_user_created_idx` and
+        # `task_workspace_created_idx` indexes.
+        # `setup_queryset` joins the owner in the same query, so the serializer's
+        # `user.username` field doesn't issue one extra query per task on the page.
+        return TaskSerializer.setup_queryset(
+            Task.objects.visible_to(self.request.user)
+        ).order_by('-created_at', '-id')
+
+    # Override `list` to support conditional GETs, delta sync and the page cache.
+    # - `?since=<timestamp>` returns only what changed after that time, in pages of
+    #   `TASKS_SYNC_MAX_TASKS` tasks (see `delta`).
+    # - Otherwise the response carries `ETag` / `Last-Modified` headers, and a client
+    #   sending them back gets a 304 Not Modified while nothing has changed.
+    # - Serialized pages are cached per user and query (see `tasks/cache.py`); a
+    #   cached page is served together with its validators without touching the
+    #   database. The `X-Cache` header says whether the page came from the cache.
+    def list(self, request, *args, **kwargs):
+        if 'since' in request.query_params:
+            return self.delta(request)
+
+        page_cache = TaskListCache(request)
+        cached = page_cache.get()
+        if cached is not None:
+            data, etag, last_modified = cached
+            response = not_modified_response(request, etag, last_modified) or Response(data)
+            response['X-Cache'] = 'HIT'
+            return add_validator_headers(response, etag, last_modified)
+
+        recurrences = self.recurrences()
+        etag, last_modified = task_list_validators(
+            request, Task.objects.visible_to(request.user), recurrences and recurrences[0],
+        )
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = self.list_page()
+        page_cache.set(response.data, etag, last_modified)
+        response['X-Cache'] = 'MISS'
+        return add_validator_headers(response, etag, last_modified)
+
+    # The requested page, read with `.values()` and encoded by `task_row_encoder`
+    # instead of `TaskSerializer`: the same data at a fraction of the cost.
+    # With `?include_archived=true` the user's archived tasks (see tasks/archive.py)
+    # are listed too, filtered and ordered the same way; without it only the live
+    # table is read.
+    # With `?nest=N` every task on the page carries its subtasks under `children`,
+    # N levels deep (at most `TASK_HIERARCHY['MAX_NEST']`), read with one more query
+    # for the whole page (see tasks/tree.py). Subtasks are listed on their own too
+    # unless the list is filtered, typically with `?parent=none`.
+    # With a due-date window the unsaved occurrences of recurring tasks are listed
+    # among the tasks (see `recurrences`), with `id` null.
+    def list_page(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        levels = self.nest_levels()
+        extra = ('path',) if levels else ()
+        rows = task_row_encoder.values(queryset, extra=extra)
+        if self.request.query_params.get('include_archived') in ('true', '1'):
+            rows = self.with_archived(rows, queryset.query.order_by, extra)
+        recurrences = self.recurrences()
+        if recurrences is not None:
+            rows = OccurrenceRows(rows, *recurrences, queryset.query.order_by, extra)
+        page = self.paginate_queryset(rows)
+        rows = list(rows) if page is None else page
+        with serialization_timer():
+            data = task_row_encoder.encode(rows)
+        roots = [(row['id'], row['path']) for row in rows if row['id'] is not None] if levels else []
+        if roots:
+            subtasks = descendants_of(self.request.user, roots, levels)
+            with serialization_timer():
+                children = children_by_parent(task_row_encoder.encode(task_row_encoder.values(subtasks)))
+                data = [nest(item, children, levels) for item in data]
+        return Response(data) if page is None else self.get_paginated_response(data)
+
+    # The recurring tasks whose occurrences the list shows and the dates to expand
+    # them over, `(series, first, last)`, or None (see
+    # `TaskFilterBackend.filter_recurrences`). Cursor pages follow the keyset of the
+    # stored tasks, which occurrences have no place in, so only page-number lists
+    # (and unpaginated ones) show them.
+    def recurrences(self):
+        if not hasattr(self, '_recurrences'):
+            self._recurrences = None
+            if not isinstance(self.paginator, TaskCursorPagination):
+                series = TaskRecurrence.objects.filter(visible_tasks_q(self.request.user))
+                self._recurrences = TaskFilterBackend().filter_recurrences(self.request, series)
+        return self._recurrences
+
+    # The validated `?nest=` level count, or 0 without it.
+    def nest_levels(self):
+        value = self.request.query_params.get('nest')
+        if not value:
+            return 0
+        max_nest = settings.TASK_HIERARCHY['MAX_NEST']
+        if not value.isdigit() or not 1 <= int(value) <= max_nest:
+            raise serializers.ValidationError({'nest': [f'Enter a number of levels from 1 to {max_nest}.']})
+        return int(value)
+
+    # `rows` followed by the matching archived tasks, as one `UNION ALL` query.
+    # Archived tasks have no position in the keyset ordering of cursor pages, so
+    # only page numbers are supported.
+    def with_archived(self, rows, ordering, extra=()):
+        if isinstance(self.paginator, TaskCursorPagination):
+            raise serializers.ValidationError(
+                {'include_archived': ['Archived tasks can only be listed with page-number pagination.']}
+            )
+        archived = TaskFilterBackend().filter_queryset(
+            self.request, ArchivedTask.objects.filter(visible_tasks_q(self.request.user)), self
+        )
+        return rows.order_by().union(
+            task_row_encoder.values(archived, extra=extra).order_by(), all=True
+        ).order_by(*ordering)
+
+    # Delta sync: the tasks created or updated after `since`, and the ids of the
+    # tasks deleted after it. Clients store `server_time` from the response and
+    # pass it as `since` next time. The window is widened by
+    # `TASKS_SYNC_SKEW_SECONDS` so writes that were still committing while the
+    # previous sync ran are not missed; clients upsert by id, so repeats are harmless.
+    # If `since` is older than the tombstone retention period the deletions can no
+    # longer be reported, and the client is told to refetch everything (410 Gone).
+    #
+    # At most `TASKS_SYNC_MAX_TASKS` tasks are returned, in (updated_at, id) order.
+    # When there are more, `next` is a cursor: the client repeats the request with
+    # `&cursor=<next>` until `next` is null, and stores the `server_time` of the last
+    # page, which every page of one sync repeats. Deletions are all on the first page.
+    def delta(self, request):
+        # A '+' in an unencoded query string arrives as a space.
+        raw_since = request.query_params['since'].replace(' ', '+')
+        try:
+            since = parse_datetime(raw_since)
+        except ValueError:
+            since = None
+        if since is None:
+            raise serializers.ValidationError({'since': ['Enter an ISO 8601 date and time.']})
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since, dt_timezone.utc)
+
+        cursor = request.query_params.get('cursor')
+        now, after = _decode_delta_cursor(cursor) if cursor else (timezone.now(), None)
+        if since < now - timedelta(days=settings.TASKS_TOMBSTONE_RETENTION_DAYS):
+            return Response(
+                {'detail': 'This sync point is too old. Fetch the full task list again.'},
+                status=status.HTTP_410_GONE,
+            )
+
+        window_start = since - timedelta(seconds=settings.TASKS_SYNC_SKEW_SECONDS)
+        changed = self.get_queryset().filter(updated_at__gt=window_start).order_by('updated_at', 'id')
+        if after is not None:
+            updated_at, task_id = after
+            changed = changed.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=task_id))
+        limit = settings.TASKS_SYNC_MAX_TASKS
+        tasks = list(changed[:limit + 1])
+        more = len(tasks) > limit
+        tasks = tasks[:limit]
+        deleted = []
+        if after is None:
+            deleted = (
+                TaskTombstone.objects.filter(visible_tasks_q(request.user), deleted_at__gt=window_start)
+                .order_by('deleted_at')
+                .values_list('task_id', flat=True)
+            )
+        return Response({
+            'server_time': now,
+            'tasks': self.get_serializer(tasks, many=True).data,
+            'deleted': list(deleted),
+            'next': _encode_delta_cursor(now, tasks[-1]) if more else None,
+        })
 
     # Override `perform_create` to automatically assign the task to the current user.
     # When a POST request comes in to create a task, the 'user' field should not
@@ -49,10 +291,478 @@ class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
     # We start with all tasks, but `get_queryset` below will filter it further.
     queryset = Task.objects.all()
 
+    # GET requests may read from a replica when replicas are configured
+    # (see backend/routers.py).
+    read_replica = True
+
     # Override `get_queryset` again to ensure a user can only retrieve, update,
-    # or delete tasks that they own. This provides object-level security.
+    # or delete tasks that they own or share through a workspace. This provides
+    # object-level security in the query itself rather than per object in Python.
+    def get_queryset(self):
+        # Filters the queryset to ensure the requested task is visible to the current user.
+        # If a user tries to access a task ID that belongs to someone else, outside
+        # their workspaces, this filter will result in an empty queryset, leading to
+        # a 404 Not Found response.
+        # The owner is joined up front so serializing the task needs no second query.
+        return TaskSerializer.setup_queryset(Task.objects.visible_to(self.request.user))
+
+    # Override `retrieve` to add `ETag` / `Last-Modified` headers and answer
+    # conditional GETs for an unchanged task with 304 Not Modified.
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = task_detail_validators(instance)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(instance)
+        return add_validator_headers(Response(serializer.data), etag, last_modified)
+
+    # Override `update` (PUT and PATCH) to write only the fields whose value actually
+    # changes (see `update_task`).
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        return update_task(request, self.get_object, request.data, partial, self.get_serializer_context())
+
+    # Override `destroy` to honour `If-Match` as `update` does. The row is locked
+    # while its version is compared, so it can't change between check and delete.
+    def destroy(self, request, *args, **kwargs):
+        versions = if_match_versions(request)
+        instance = self.get_object()
+        with transaction.atomic():
+            if versions is not None:
+                current = Task._base_manager.select_for_update().filter(pk=instance.pk).values_list('version', flat=True)
+                if current.first() not in versions:
+                    return precondition_failed_response()
+            instance.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+# TaskTreeView
+# A task with all of its subtasks nested under `children` (see tasks/tree.py), and
+# how many descendants it has per status:
+#   {"task": {"id": 12, ..., "children": [{"id": 40, ..., "children": []}, ...]},
+#    "descendants": {"total": 3, "by_status": {"pending": 2, "in_progress": 1, ...}}}
+# `?depth=N` stops the nesting N levels below the task; the counts still cover the
+# whole subtree. Besides reading the task itself, the subtree is one prefix query on
+# the path index, and with `?depth=` the counts are one more.
+class TaskTreeView(generics.GenericAPIView):
+    serializer_class = TaskSerializer
+    permission_classes = [IsAuthenticated]
+    read_replica = True
+    renderer_classes = TaskListCreateView.renderer_classes
+
+    def get_queryset(self):
+        return TaskSerializer.setup_queryset(Task.objects.visible_to(self.request.user))
+
+    def get(self, request, *args, **kwargs):
+        levels = None
+        if request.query_params.get('depth'):
+            value = request.query_params['depth']
+            max_depth = settings.TASK_HIERARCHY['MAX_DEPTH']
+            if not value.isdigit() or not 1 <= int(value) <= max_depth:
+                raise serializers.ValidationError({'depth': [f'Enter a number of levels from 1 to {max_depth}.']})
+            levels = int(value)
+        task = self.get_object()
+        rows = list(task_row_encoder.values(descendants_of(request.user, [(task.pk, task.path)], levels)))
+        by_status = {value: 0 for value, _ in Task.STATUS_CHOICES}
+        if levels is None:
+            for row in rows:
+                by_status[row['status']] += 1
+        else:
+            by_status.update(task.descendants().aggregate(
+                **{value: Count('id', filter=Q(status=value)) for value in by_status}
+            ))
+        with serialization_timer():
+            children = children_by_parent(task_row_encoder.encode(rows))
+            data = nest(self.get_serializer(task).data, children, levels)
+        return Response({'task': data, 'descendants': {'total': sum(by_status.values()), 'by_status': by_status}})
+
+
+# TaskRecurrenceListCreateView
+# The recurring tasks the user can see (their own and their workspaces'), newest
+# first, and creating one:
+#   POST {"title": "Standup", "rule": "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR", "starts_on": "2026-10-19"}
+# Only the series is stored; its occurrences show up in task lists with a due-date
+# window (`/api/tasks/?due_after=...&due_before=...`).
+class TaskRecurrenceListCreateView(generics.ListCreateAPIView):
+    serializer_class = TaskRecurrenceSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return (
+            TaskRecurrence.objects.filter(visible_tasks_q(self.request.user))
+            .select_related('user').order_by('-created_at', '-id')
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+# TaskRecurrenceDetailView
+# One recurring task. Changes apply to the occurrences not saved as tasks yet; saved
+# ones keep their own fields. Deleting the series keeps those tasks, as ordinary
+# tasks.
+class TaskRecurrenceDetailView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = TaskRecurrenceSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return TaskRecurrence.objects.filter(visible_tasks_q(self.request.user)).select_related('user')
+
+    def perform_update(self, serializer):
+        if 'workspace' in serializer.validated_data:
+            # `post_save` only covers the workspace the series ends up in.
+            invalidate_task_lists(serializer.instance.user_id, [serializer.instance.workspace_id])
+        serializer.save()
+
+
+# TaskOccurrenceView
+# One occurrence of a recurring task, by the date it is scheduled for:
+# `/api/tasks/recurring/<id>/occurrences/<YYYY-MM-DD>/`.
+# - GET returns the task saved for the occurrence, or else the occurrence as the
+#   task list shows it (`id` null).
+# - PATCH saves it as a task with the changes sent, typically
+#   `{"status": "completed"}`. The task starts from the series' title, description
+#   and workspace, with the date as its due date, is validated as a new task and
+#   belongs to the series' creator. From then on it is changed like any other task
+#   (`/api/tasks/<id>/`); PATCHing the occurrence again gives 409 Conflict with the
+#   task's id.
+# Dates that aren't occurrences of the series are not found.
+class TaskOccurrenceView(generics.GenericAPIView):
+    serializer_class = TaskSerializer
+    permission_classes = [IsAuthenticated]
+
     def get_queryset(self):
-        # Filters the queryset to ensure the requested task belongs to the current user.
-        # If a user tries to access a task ID that belongs to another user, this
-        # filter will result in an empty queryset, leading to a 404 Not Found response.
-        return Task.objects.filter(user=self.request.user)
+        return TaskRecurrence.objects.filter(visible_tasks_q(self.request.user)).select_related('user')
+
+    # The series and the occurrence's date, or 404.
+    def get_occurrence(self):
+        series = self.get_object()
+        try:
+            day = parse_date(self.kwargs['occurrence_date'])
+        except ValueError:
+            day = None
+        if day is None or not series.schedule.includes(day):
+            raise Http404('No occurrence of this recurring task on that date.')
+        return series, day
+
+    def get(self, request, *args, **kwargs):
+        series, day = self.get_occurrence()
+        saved = Task.objects.filter(recurrence=series, occurrence_date=day)
+        task = TaskSerializer.setup_queryset(saved.visible_to(request.user)).first()
+        if task is not None:
+            return Response(self.get_serializer(task).data)
+        if is_saved_occurrence(series, day):
+            # Saved as a task the user can't see (moved to another workspace), or archived.
+            raise Http404('No occurrence of this recurring task on that date.')
+        return Response(task_row_encoder.encode([occurrence_row(series, day)])[0])
+
+    def patch(self, request, *args, **kwargs):
+        series, day = self.get_occurrence()
+        if is_saved_occurrence(series, day):
+            return occurrence_saved_response(series, day)
+        data = {
+            'title': series.title, 'description': series.description, 'due_date': day,
+            'workspace': series.workspace_id, **dict(request.data.items()),
+        }
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                task = serializer.save(user=series.user, recurrence=series, occurrence_date=day)
+        except IntegrityError:
+            # Saved by a concurrent request in the meantime.
+            return occurrence_saved_response(series, day)
+        return Response(self.get_serializer(task).data, status=status.HTTP_201_CREATED)
+
+
+# Whether the occurrence of `series` on `day` is saved as a task, live or archived,
+# by the same rule that keeps it out of task lists.
+def is_saved_occurrence(series, day):
+    saved = saved_occurrences(TaskRecurrence.objects.filter(pk=series.pk), day, day)
+    return day in saved.get(series.pk, ())
+
+
+def occurrence_saved_response(series, day):
+    task_id = Task._base_manager.filter(recurrence=series, occurrence_date=day).values_list('pk', flat=True).first()
+    if task_id is None:
+        archived = ArchivedTask.objects.filter(recurrence=series.pk, occurrence_date=day)
+        return Response(
+            {
+                'detail': 'This occurrence is already saved as a task, which has been archived.',
+                'id': archived.values_list('pk', flat=True).first(),
+            },
+            status=status.HTTP_409_CONFLICT,
+        )
+    return Response(
+        {
+            'detail': 'This occurrence is already saved as a task. Change it through /api/tasks/<id>/.',
+            'id': task_id,
+        },
+        status=status.HTTP_409_CONFLICT,
+    )
+
+
+# Applies a PUT or PATCH of `data` to the task `get_instance()` returns and gives the
+# response, for `TaskDetailView` and the async detail view (tasks/async_views.py).
+# Only the fields whose value actually changes are written, with one conditional
+# `UPDATE ... WHERE version = <version read>` (see `Task.apply_changes`). A request
+# that changes nothing writes nothing, and `updated_at` stays as it was.
+# - With `If-Match: "<version>"` (the task's ETag) the update only happens if the
+#   task is still at that version, else 412 Precondition Failed: the client
+#   should fetch the task again rather than overwrite someone else's edit.
+# - Without it, fields another client changed in between are kept unless this
+#   request changes them too: the update is re-applied on top of the newer
+#   version, up to `MAX_WRITE_ATTEMPTS` times.
+MAX_WRITE_ATTEMPTS = 3
+
+
+def update_task(request, get_instance, data, partial, context):
+    versions = if_match_versions(request)
+    for _ in range(MAX_WRITE_ATTEMPTS):
+        instance = get_instance()
+        if versions is not None and instance.version not in versions:
+            return precondition_failed_response()
+        serializer = TaskSerializer(instance, data=data, partial=partial, context=context)
+        serializer.is_valid(raise_exception=True)
+        changes = {
+            name: value for name, value in serializer.validated_data.items() if getattr(instance, name) != value
+        }
+        if 'workspace' in changes:
+            # `post_save` only covers the workspace the task ends up in.
+            invalidate_task_lists(instance.user_id, [instance.workspace_id])
+        if not changes or instance.apply_changes(changes):
+            etag, last_modified = task_detail_validators(instance)
+            return add_validator_headers(Response(TaskSerializer(instance, context=context).data), etag, last_modified)
+        if versions is not None:
+            # Written by someone else after the version check above.
+            return precondition_failed_response()
+    return Response(
+        {'detail': 'The task kept changing while it was being updated. Try again.'},
+        status=status.HTTP_409_CONFLICT,
+    )
+
+
+def precondition_failed_response():
+    return Response(
+        {'detail': 'The task has changed since you last read it. Fetch it again before changing it.'},
+        status=status.HTTP_412_PRECONDITION_FAILED,
+    )
+
+
+# TaskBulkView
+# Applies a batch of create/update/delete operations in one request, instead of one
+# round trip (and one transaction) per task. POST a list of operations, either as
+# the body itself or as `{"operations": [...]}`:
+#   [{"action": "create", "data": {"title": "Write report"}},
+#    {"action": "update", "id": 12, "data": {"status": "completed"}},
+#    {"action": "delete", "id": 13}]
+#
+# All operations are validated first. If any of them is invalid (bad fields, or a
+# task id the user doesn't own), nothing is written and a 400 response lists the
+# errors per operation, with `{}` for the valid ones. Otherwise all operations are
+# applied in a single transaction with `bulk_create`, `bulk_update` and one
+# `DELETE`, and the response lists the result of each operation in order.
+class TaskBulkView(generics.GenericAPIView):
+    serializer_class = TaskSerializer
+    permission_classes = [IsAuthenticated]
+
+    # Same access rule as `TaskDetailView.get_queryset`: tasks the user can't see
+    # are reported as not found.
+    def get_queryset(self):
+        return TaskSerializer.setup_queryset(Task.objects.visible_to(self.request.user))
+
+    def post(self, request, *args, **kwargs):
+        payload = request.data
+        if isinstance(payload, list):
+            payload = {'operations': payload}
+        envelope = TaskBulkRequestSerializer(data=payload)
+        envelope.is_valid(raise_exception=True)
+        operations = envelope.validated_data['operations']
+
+        errors = [{} for _ in operations]
+        creates, updates, deletes = [], [], []
+        for index, operation in enumerate(operations):
+            if operation['action'] == 'create':
+                creates.append(index)
+            elif operation['action'] == 'update':
+                updates.append(index)
+            else:
+                deletes.append(index)
+
+        # Each existing task may only be touched once per batch.
+        seen = set()
+        for index in updates + deletes:
+            task_id = operations[index]['id']
+            if task_id in seen:
+                errors[index] = {'id': ['This task appears in more than one operation.']}
+            seen.add(task_id)
+
+        # Resolve every referenced task in one query, restricted to the user's visible tasks.
+        owned = self.get_queryset().in_bulk([operations[index]['id'] for index in updates + deletes])
+        for index in updates + deletes:
+            if not errors[index] and operations[index]['id'] not in owned:
+                errors[index] = {'detail': 'Not found.'}
+        updates = [index for index in updates if not errors[index]]
+        deletes = [index for index in deletes if not errors[index]]
+
+        create_serializer = self.get_serializer(data=[operations[index]['data'] for index in creates], many=True)
+        if creates and not create_serializer.is_valid():
+            for index, item_errors in zip(creates, create_serializer.errors):
+                errors[index] = item_errors
+
+        update_serializer = self.get_serializer(
+            [owned[operations[index]['id']] for index in updates],
+            data=[{**operations[index]['data'], 'id': operations[index]['id']} for index in updates],
+            many=True,
+            partial=True,
+        )
+        if updates and not update_serializer.is_valid():
+            for index, item_errors in zip(updates, update_serializer.errors):
+                errors[index] = item_errors
+
+        if any(errors):
+            return Response({'operations': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Workspaces whose lists change: those of the updated tasks before and after.
+        touched_workspaces = {owned[operations[index]['id']].workspace_id for index in updates}
+        with transaction.atomic():
+            if creates:
+                created = create_serializer.save(user=request.user)
+                for task in created:
+                    touched_workspaces.add(task.workspace_id)
+                    queue_task_event('task.created', task)
+                enqueue_task_write_jobs('task.created', [(task.pk, task.user_id) for task in created])
+            if updates:
+                updated = update_serializer.save()
+                for task in updated:
+                    touched_workspaces.add(task.workspace_id)
+                    queue_task_event('task.updated', task)
+                enqueue_task_write_jobs('task.updated', [(task.pk, task.user_id) for task in updated])
+            if deletes:
+                Task.objects.filter(pk__in=[operations[index]['id'] for index in deletes]).delete()
+            # `bulk_create` and `bulk_update` don't send `post_save`, so invalidate,
+            # publish events and queue jobs here; the delete sends `post_delete` per task.
+            invalidate_task_lists(request.user.pk, touched_workspaces)
+
+        results = [None] * len(operations)
+        for index, task_data in zip(creates, create_serializer.data if creates else []):
+            results[index] = {'action': 'create', 'id': task_data['id'], 'task': task_data}
+        for index, task_data in zip(updates, update_serializer.data if updates else []):
+            results[index] = {'action': 'update', 'id': task_data['id'], 'task': task_data}
+        for index in deletes:
+            results[index] = {'action': 'delete', 'id': operations[index]['id']}
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+
+# TaskStatsView
+# Dashboard numbers for the authenticated user, read from the counters kept in
+# `TaskStats` and `TaskDueDateCount` instead of counting the tasks:
+#   {"total": 12,
+#    "by_status": {"pending": 4, "in_progress": 3, "completed": 5, "deferred": 0, "cancelled": 0},
+#    "overdue": 2,          open tasks due before today
+#    "due_this_week": 3}    open tasks due today or in the next 6 days
+# "Open" means not completed or cancelled, as for the `overdue` list filter.
+class TaskStatsView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        user_id = request.user.pk
+        stats = TaskStats.objects.filter(user_id=user_id).first()
+        if stats is None:
+            # No counters yet (the user has never written a task): build them once.
+            TaskStats.rebuild(user_id)
+            stats = TaskStats.objects.get(user_id=user_id)
+
+        today = timezone.localdate()
+        due = TaskDueDateCount.objects.filter(user_id=user_id, due_date__lt=today + timedelta(days=7)).aggregate(
+            overdue=Sum('open_count', filter=Q(due_date__lt=today), default=0),
+            due_this_week=Sum('open_count', filter=Q(due_date__gte=today), default=0),
+        )
+        by_status = {value: getattr(stats, value) for value, _ in Task.STATUS_CHOICES}
+        return Response({'total': sum(by_status.values()), 'by_status': by_status, **due})
+
+
+# TaskDigestView
+# The authenticated user's digest as last built by `build_task_digests`
+# (see tasks/digests.py), read with a single primary-key lookup:
+#   {"date": "2026-10-18",                          the day the digest was built for
+#    "generated_at": "2026-10-18T00:05:12Z",
+#    "overdue":  {"count": 3, "tasks": [{"id", "title", "due_date", "status"}, ...]},
+#    "due_soon": {"count": 1, "tasks": [...]}}
+# Each list holds at most `TASK_DIGESTS['MAX_ITEMS']` tasks, earliest due first;
+# `count` covers all of them. Users with nothing due get empty sections (and no
+# date, since no digest row is stored for them).
+class TaskDigestView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    read_replica = True
+
+    def get(self, request, *args, **kwargs):
+        digest = TaskDigest.objects.filter(user_id=request.user.pk).first()
+        if digest is None:
+            return Response({
+                'date': None, 'generated_at': None,
+                'overdue': {'count': 0, 'tasks': []}, 'due_soon': {'count': 0, 'tasks': []},
+            })
+        return Response({
+            'date': digest.digest_date,
+            'generated_at': digest.generated_at,
+            'overdue': {'count': digest.overdue_count, 'tasks': digest.overdue},
+            'due_soon': {'count': digest.due_soon_count, 'tasks': digest.due_soon},
+        })
+
+
+# TaskExportView
+# Downloads all of the user's tasks in one response, as NDJSON (one JSON object per
+# line, the default) or CSV: `GET /api/tasks/export/?as=ndjson|csv`. The list filters
+# (`status`, `due_after`, `due_before`, `overdue`, `search`) apply as usual.
+# (`?as=` rather than `?format=`, which DRF reserves for picking a renderer.)
+#
+# Rows are read with `.iterator(chunk_size=...)`, which uses a server-side cursor on
+# PostgreSQL, and encoded `chunk_size` rows at a time (see tasks/export.py), so
+# memory use stays flat however many tasks the user has.
+class TaskExportView(generics.GenericAPIView):
+    serializer_class = TaskSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [TaskFilterBackend]
+    # Rows fetched from the database and encoded per chunk.
+    chunk_size = 2000
+
+    def get_queryset(self):
+        return TaskSerializer.setup_queryset(Task.objects.visible_to(self.request.user)).order_by('id')
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get('as', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            raise serializers.ValidationError({'as': [f'Choose one of: {", ".join(EXPORT_FORMATS)}.']})
+        tasks = self.filter_queryset(self.get_queryset()).iterator(chunk_size=self.chunk_size)
+        content_type, extension = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            export_chunks(export_format, tasks, self.get_serializer(), self.chunk_size), content_type=content_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename="tasks.{extension}"'
+        return response
+
+
+# TaskImportView
+# Creates tasks from an uploaded CSV or NDJSON file (see tasks/importing.py):
+# `POST /api/tasks/import/` as multipart form data with the file in `file`. The
+# format comes from `?as=csv|ndjson`, or else from the file name's extension.
+# Invalid rows are skipped and listed in the response; the rest are imported:
+#   {"imported": 9998, "failed": 2, "errors": [{"line": 17, "errors": {...}}, ...],
+#    "seconds": 0.412, "rows_per_second": 24266.0}
+# For very large files, prefer `manage.py import_tasks`, which isn't bound by
+# request timeouts.
+class TaskImportView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        upload = request.data.get('file')
+        if upload is None or isinstance(upload, str):
+            raise serializers.ValidationError({'file': ['No file was submitted.']})
+        import_format = request.query_params.get('as') or upload.name.rsplit('.', 1)[-1].lower()
+        if import_format not in IMPORT_FORMATS:
+            raise serializers.ValidationError({'as': [f'Choose one of: {", ".join(IMPORT_FORMATS)}.']})
+        report = import_tasks(request.user, upload.file, import_format)
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
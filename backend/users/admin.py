@@ -1,3 +1,23 @@
+# backend/users/admin.py
+
 from django.contrib import admin
 
-# Register your models here.
+from .models import Membership, Workspace
+
+
+# WorkspaceAdmin
+# Workspaces with their members edited inline.
+class MembershipInline(admin.TabularInline):
+    model = Membership
+    extra = 0
+    # Use a plain ID input for the user instead of rendering every user in a <select>.
+    raw_id_fields = ['user']
+
+
+@admin.register(Workspace)
+class WorkspaceAdmin(admin.ModelAdmin):
+    list_display = ['name', 'created_by', 'created_at']
+    search_fields = ['name']
+    list_select_related = ['created_by']
+    raw_id_fields = ['created_by']
+    inlines = [MembershipInline]
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        # Register the user signal handlers (token revocation, workspace access cache).
+        from . import signals  # noqa: F401
+
+        # Build the password validators now rather than on first use, so that
+        # `CommonPasswordValidator` reads its word list once at startup (and is
+        # shared between workers forked by `gunicorn --preload`).
+        from django.contrib.auth.password_validation import get_default_password_validators
+        get_default_password_validators()
@@ -0,0 +1,160 @@
+# backend/users/authentication.py
+
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import TokenClaimsUser
+
+# Revoked users
+# When a user is deactivated or deleted, their id is written to the shared cache
+# `JWT_REVOCATION_CACHE_ALIAS` for as long as an access token can live. Tokens issued
+# before that can't be recalled, so the stateless authentication below checks this
+# list instead of loading the user row. Each process keeps the answer for a user for
+# `JWT_REVOCATION_CACHE_TTL` seconds, so checking it usually costs no I/O at all.
+# A per-process cache would only tell the process that recorded a revocation, so
+# without a shared one (the alias is None) nothing is recorded and users are always
+# loaded from the database.
+
+
+def _revoked_key(user_id):
+    return f'auth:revoked-user:{user_id}'
+
+
+def _revocation_cache():
+    alias = settings.JWT_REVOCATION_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+def revoke_user(user_id):
+    cache = _revocation_cache()
+    if cache is None:
+        return
+    lifetime = jwt_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    cache.set(_revoked_key(user_id), True, timeout=int(lifetime) + 60)
+    revoked_users.forget(user_id)
+
+
+def unrevoke_user(user_id):
+    cache = _revocation_cache()
+    if cache is None:
+        return
+    cache.delete(_revoked_key(user_id))
+    revoked_users.forget(user_id)
+
+
+# RevokedUserCache
+# Short-TTL, in-process memo of "is this user revoked?" answers.
+class RevokedUserCache:
+    # Upper bound on remembered users; the memo is simply emptied when it fills up.
+    max_entries = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def is_revoked(self, user_id):
+        now = time.monotonic()
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        revoked = bool(_revocation_cache().get(_revoked_key(user_id)))
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[user_id] = (revoked, now + settings.JWT_REVOCATION_CACHE_TTL)
+        return revoked
+
+    def forget(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+revoked_users = RevokedUserCache()
+
+
+# Whether the user of `validated_token` can be built from its claims.
+def uses_claims(validated_token):
+    return (
+        'username' in validated_token and 'email' in validated_token and _revocation_cache() is not None
+    )
+
+
+# StatelessJWTAuthentication
+# Opt-in replacement for simplejwt's `JWTAuthentication` (enable it with the
+# JWT_STATELESS_AUTH environment variable, see settings.py).
+# The stock class loads the CustomUser row on every request just to check
+# `is_active`. This one builds a `TokenClaimsUser` from the token's `user_id`,
+# `username` and `email` claims (added by `MyTokenObtainPairSerializer`) and checks
+# the revoked-user list instead, so most requests need no user query at all.
+#
+# It falls back to loading the real user from the database when:
+# - the view sets `requires_full_user = True` (e.g. it needs `is_staff`, groups,
+#   permissions or other profile fields),
+# - the token doesn't carry the username/email claims (tokens issued elsewhere), or
+# - there is no shared revocation cache (see "Revoked users" above).
+class StatelessJWTAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        # Authenticator instances are created per request, so it's safe to keep
+        # the view around for `get_user`.
+        self.view = request.parser_context.get('view') if getattr(request, 'parser_context', None) else None
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(jwt_settings.USER_ID_CLAIM)
+        if user_id is None:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        needs_full_user = getattr(getattr(self, 'view', None), 'requires_full_user', False)
+        if needs_full_user or not uses_claims(validated_token):
+            return super().get_user(validated_token)
+
+        if revoked_users.is_revoked(user_id):
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return TokenClaimsUser.from_claims(user_id, validated_token['username'], validated_token['email'])
+
+
+# Async authentication for plain Django async views (see `tasks/async_views.py`),
+# which don't go through DRF's authentication machinery.
+# Returns the authenticated user, or None when the request carries no bearer token.
+# Raises `AuthenticationFailed` / `InvalidToken` for bad tokens or inactive users.
+# Token validation is pure CPU work; the only I/O is the user lookup, which uses the
+# async ORM, and is skipped entirely when stateless authentication is enabled.
+async def aauthenticate(request):
+    authenticator = StatelessJWTAuthentication() if settings.JWT_STATELESS_AUTH else JWTAuthentication()
+    header = authenticator.get_header(request)
+    if header is None:
+        return None
+    raw_token = authenticator.get_raw_token(header)
+    if raw_token is None:
+        return None
+    validated_token = authenticator.get_validated_token(raw_token)
+
+    if settings.JWT_STATELESS_AUTH and uses_claims(validated_token):
+        authenticator.view = None
+        return authenticator.get_user(validated_token)
+
+    user_id = validated_token.get(jwt_settings.USER_ID_CLAIM)
+    if user_id is None:
+        raise InvalidToken(_('Token contained no recognizable user identification'))
+    User = get_user_model()
+    try:
+        user = await User.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+    except User.DoesNotExist:
+        raise AuthenticationFailed(_('User not found'), code='user_not_found')
+    if not user.is_active:
+        raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+    return user
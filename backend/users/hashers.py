@@ -0,0 +1,25 @@
+# backend/users/hashers.py
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+# TunedArgon2PasswordHasher
+# Django's Argon2 hasher with its cost parameters taken from the `PASSWORD_ARGON2`
+# setting instead of being fixed in code. The stock defaults use 100 MiB of memory
+# per hash; the settings default to OWASP's recommended minimum (19 MiB, 2
+# iterations, 1 lane), which keeps a login in the low milliseconds.
+# The algorithm name stays "argon2", so existing Argon2 hashes keep working. When
+# the parameters change, `must_update` reports stored hashes as outdated and they
+# are rehashed with the new parameters on the user's next successful login.
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2['TIME_COST']
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2['MEMORY_COST']
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2['PARALLELISM']
@@ -0,0 +1,57 @@
+# backend/users/management/commands/benchmark_auth.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from tasks.benchmarking import get_bench_user
+from users.authentication import StatelessJWTAuthentication
+from users.serializers import MyTokenObtainPairSerializer
+
+# benchmark_auth
+# Measures the per-request cost of JWT authentication: the stock `JWTAuthentication`
+# (decode + user query) against `StatelessJWTAuthentication` (decode + claims user).
+# Both authenticate the same access token, as issued by the login endpoint.
+# The stateless class only skips the user query with a shared revocation cache
+# (REDIS_URL); without one, both rows measure the database-backed lookup.
+#
+# Usage:
+#   python manage.py benchmark_auth --requests 5000
+class Command(BaseCommand):
+    help = 'Benchmark per-request JWT authentication overhead, database-backed vs stateless.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000, help='Authentications timed per class.')
+        parser.add_argument('--username', default='bench_auth', help='Benchmark user to create (or reuse).')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark user afterwards.')
+
+    def handle(self, *args, **options):
+        user = get_bench_user(options['username'])
+        token = str(MyTokenObtainPairSerializer.get_token(user).access_token)
+        factory = APIRequestFactory()
+        count = options['requests']
+
+        self.stdout.write(f"{'authentication':<30} {'us/request':>12} {'queries/request':>16}")
+        for authentication_class in (JWTAuthentication, StatelessJWTAuthentication):
+            # Build the requests up front so only authentication is timed.
+            requests = [
+                Request(factory.get('/api/tasks/', HTTP_AUTHORIZATION=f'Bearer {token}'))
+                for _ in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                for request in requests:
+                    authenticated_user, _ = authentication_class().authenticate(request)
+                elapsed = time.perf_counter() - started
+            assert authenticated_user.pk == user.pk
+            self.stdout.write(
+                f'{authentication_class.__name__:<30} {elapsed / count * 1e6:>12.1f} {len(queries) / count:>16.2f}'
+            )
+
+        if not options['keep']:
+            user.delete()
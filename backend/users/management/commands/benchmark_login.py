@@ -0,0 +1,64 @@
+# backend/users/management/commands/benchmark_login.py
+
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from tasks.benchmarking import get_bench_user
+from users.serializers import MyTokenObtainPairSerializer
+
+# benchmark_login
+# Measures what one login costs on a single core, for each configured password
+# hasher: the full `/api/token/` serializer path (user lookup, password check,
+# token creation). Runs in one thread, so "logins/s" is per core; multiply by the
+# number of worker processes for a machine's capacity.
+#
+# Each hasher is measured with it set as the preferred one, so logins don't
+# rehash the benchmark user's password to another algorithm mid-run. Hashers whose
+# library isn't installed (argon2-cffi, bcrypt) are skipped.
+#
+# Usage:
+#   python manage.py benchmark_login --logins 50
+class Command(BaseCommand):
+    help = 'Benchmark logins per second per core for each password hasher.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=50, help='Logins timed per hasher.')
+        parser.add_argument('--username', default='bench_login', help='Benchmark user to create (or reuse).')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark user afterwards.')
+
+    def handle(self, *args, **options):
+        user = get_bench_user(options['username'])
+        password = 'bench-password-123'
+        credentials = {'username': user.username, 'password': password}
+
+        self.stdout.write(f"{'hasher':<40} {'ms/login':>10} {'logins/s/core':>14}")
+        for hasher_path in settings.PASSWORD_HASHERS:
+            with override_settings(PASSWORD_HASHERS=[hasher_path]):
+                hasher = get_hasher('default')
+                name = type(hasher).__name__
+                try:
+                    if hasher.library is not None:
+                        hasher._load_library()
+                except ValueError:
+                    self.stdout.write(f'{name:<40} (library not installed)')
+                    continue
+                user.password = make_password(password, hasher=hasher)
+                user.save(update_fields=['password'])
+
+                samples = []
+                for _ in range(options['logins']):
+                    started = time.perf_counter()
+                    serializer = MyTokenObtainPairSerializer(data=credentials)
+                    valid = serializer.is_valid()
+                    samples.append(time.perf_counter() - started)
+                    assert valid, serializer.errors
+            median = statistics.median(samples)
+            self.stdout.write(f'{name:<40} {median * 1000:>10.2f} {1 / median:>14.1f}')
+
+        if not options['keep']:
+            user.delete()
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:22
+
+import django.contrib.auth.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenClaimsUser',
+            fields=[
+            ],
+            options={
+                'verbose_name': 'Token claims user',
+                'verbose_name_plural': 'Token claims users',
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('users.customuser',),
+            managers=[
+                ('objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+    ]
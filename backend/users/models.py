@@ -24,4 +24,89 @@ class CustomUser(AbstractUser):
         verbose_name_plural = 'Users'
 
     def __str__(self):
-        return self.username
\ No newline at end of file
+        return self.username
+
+# TokenClaimsUser Model (proxy)
+# A lightweight, in-memory stand-in for a CustomUser, built from the claims of a
+# validated JWT instead of being loaded from the database (see
+# `users.authentication.StatelessJWTAuthentication`).
+# Because it is a proxy of CustomUser it can be used anywhere a user instance is
+# expected, e.g. `Task.objects.filter(user=request.user)` or
+# `serializer.save(user=request.user)`. It only carries the fields present in the
+# token (id, username, email), so it must never be written back: saving or
+# deleting it raises an error. Call `get_full_user()` when the real row is needed.
+class TokenClaimsUser(CustomUser):
+    class Meta:
+        proxy = True
+        verbose_name = 'Token claims user'
+        verbose_name_plural = 'Token claims users'
+
+    @classmethod
+    def from_claims(cls, user_id, username, email):
+        user = cls(id=user_id, username=username, email=email, is_active=True)
+        # Mark the instance as an existing row, like one loaded from the database.
+        user._state.adding = False
+        user._state.db = 'default'
+        return user
+
+    def get_full_user(self):
+        return CustomUser.objects.get(pk=self.pk)
+
+    def save(self, *args, **kwargs):
+        raise TypeError('TokenClaimsUser is built from token claims and cannot be saved; use get_full_user().')
+
+    def delete(self, *args, **kwargs):
+        raise TypeError('TokenClaimsUser is built from token claims and cannot be deleted; use get_full_user().')
+
+
+# Workspace Model
+# A shared task list: every member sees, and can edit, the tasks filed under the
+# workspace (`Task.workspace`), on top of their own tasks. Whoever creates a
+# workspace becomes its owner and decides who else is a member.
+class Workspace(models.Model):
+    name = models.CharField(max_length=100)
+    created_by = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, null=True, related_name='created_workspaces'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    members = models.ManyToManyField(CustomUser, through='Membership', related_name='workspaces')
+
+    class Meta:
+        verbose_name = 'Workspace'
+        verbose_name_plural = 'Workspaces'
+
+    def __str__(self):
+        return self.name
+
+
+# Membership Model
+# One user's membership of one workspace. Access checks never join this table per
+# task: the ids of a user's workspaces are read once (by the user index below) and
+# cached, see users/workspaces.py.
+class Membership(models.Model):
+    OWNER = 'owner'
+    MEMBER = 'member'
+    ROLE_CHOICES = [
+        (OWNER, 'Owner'),   # Can add and remove members, and delete the workspace.
+        (MEMBER, 'Member'),
+    ]
+
+    workspace = models.ForeignKey(Workspace, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='memberships')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default=MEMBER)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Membership'
+        verbose_name_plural = 'Memberships'
+        constraints = [
+            # Also serves "the workspaces of user X" lookups, as an index on (user, workspace).
+            models.UniqueConstraint(fields=['user', 'workspace'], name='membership_user_workspace_uniq'),
+        ]
+        indexes = [
+            # The members of a workspace.
+            models.Index(fields=['workspace', 'role'], name='membership_workspace_role_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} in {self.workspace} ({self.role})'
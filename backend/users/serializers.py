@@ -4,6 +4,8 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model # Recommended way to get the active user model
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from .models import Membership, Workspace
+
 # Get the custom user model defined in settings.py (users.CustomUser)
 User = get_user_model()
 
@@ -54,4 +56,33 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['email'] = user.email
         # You can add more user-specific data here if needed
 
-        return token
\ No newline at end of file
+        return token
+
+# WorkspaceSerializer
+# A workspace as seen by one of its members. `role` is the requesting user's role,
+# annotated on the queryset by `WorkspaceListCreateView` (or set on create).
+class WorkspaceSerializer(serializers.ModelSerializer):
+    role = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Workspace
+        fields = ['id', 'name', 'role', 'created_at']
+        read_only_fields = ['created_at']
+
+
+# MembershipSerializer
+# One member of a workspace. Members are added by username; `user` is their id,
+# which removing them takes.
+class MembershipSerializer(serializers.ModelSerializer):
+    user = serializers.ReadOnlyField(source='user_id')
+    username = serializers.SlugRelatedField(slug_field='username', queryset=User.objects.all(), source='user')
+
+    class Meta:
+        model = Membership
+        fields = ['user', 'username', 'role', 'created_at']
+        read_only_fields = ['created_at']
+
+    def validate_username(self, user):
+        if Membership.objects.filter(workspace=self.context['workspace'], user=user).exists():
+            raise serializers.ValidationError('This user is already a member.')
+        return user
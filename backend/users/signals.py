@@ -0,0 +1,42 @@
+# backend/users/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import revoke_user, unrevoke_user
+from .models import CustomUser, Membership
+from .workspaces import cache_no_workspace_ids, forget_workspace_ids
+
+# Keep the revoked-user list used by `StatelessJWTAuthentication` in sync with
+# the database: deactivated and deleted users can no longer use tokens that were
+# issued to them before.
+
+
+@receiver(post_save, sender=CustomUser)
+def update_revocation_on_save(sender, instance, created, **kwargs):
+    if created:
+        return
+    if instance.is_active:
+        unrevoke_user(instance.pk)
+    else:
+        revoke_user(instance.pk)
+
+
+@receiver(post_delete, sender=CustomUser)
+def revoke_deleted_user(sender, instance, **kwargs):
+    revoke_user(instance.pk)
+
+
+# New users start with no workspaces, see `cache_no_workspace_ids`.
+@receiver(post_save, sender=CustomUser)
+def cache_new_user_workspace_ids(sender, instance, created, **kwargs):
+    if created:
+        cache_no_workspace_ids(instance.pk)
+
+
+# A user's cached workspace ids (see users/workspaces.py) are dropped whenever one of
+# their memberships is added, changed or removed, including by a workspace delete.
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def forget_member_workspace_ids(sender, instance, **kwargs):
+    forget_workspace_ids(instance.user_id)
@@ -1,3 +1,271 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import get_default_password_validators
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from tasks.models import Task
+from tasks.views import TaskListCreateView
+from .authentication import StatelessJWTAuthentication, revoked_users
+from .models import Membership, TokenClaimsUser
+from .workspaces import workspace_ids
+from .serializers import MyTokenObtainPairSerializer
+
+User = get_user_model()
+
+
+# StatelessJWTAuthentication: users built from token claims, with revocation, as in
+# a deployment with REDIS_URL (the test cache standing in for the shared one).
+@override_settings(JWT_REVOCATION_CACHE_ALIAS='default')
+class StatelessJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        revoked_users.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pass12345')
+        self.token = str(MyTokenObtainPairSerializer.get_token(self.user).access_token)
+
+    def authenticate(self, token=None, view=None):
+        request = Request(
+            APIRequestFactory().get('/api/tasks/', HTTP_AUTHORIZATION=f'Bearer {token or self.token}'),
+            parser_context={'view': view},
+        )
+        return StatelessJWTAuthentication().authenticate(request)
+
+    def test_builds_user_from_claims_without_queries(self):
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate()
+        self.assertIsInstance(user, TokenClaimsUser)
+        self.assertEqual((user.pk, user.username, user.email), (self.user.pk, 'alice', 'alice@example.com'))
+        self.assertTrue(user.is_authenticated)
+
+    def test_claims_user_cannot_be_saved(self):
+        user, _ = self.authenticate()
+        with self.assertRaises(TypeError):
+            user.save()
+        self.assertEqual(user.get_full_user(), self.user)
+
+    def test_view_requiring_full_user_loads_it(self):
+        view = mock.Mock(requires_full_user=True)
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate(view=view)
+        self.assertNotIsInstance(user, TokenClaimsUser)
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(self.authenticate()[0].pk, self.user.pk)
+
+    def test_deleted_user_is_rejected(self):
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_task_endpoints_work_with_claims_user(self):
+        with mock.patch.object(TaskListCreateView, 'authentication_classes', [StatelessJWTAuthentication]):
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+            response = self.client.post(reverse('task-list-create'), {'title': 'Claims task'})
+            self.assertEqual(response.status_code, 201, response.data)
+            self.assertEqual(response.data['user'], 'alice')
+            response = self.client.get(reverse('task-list-create'))
+            self.assertEqual(response.data['results'][0]['title'], 'Claims task')
+        self.assertEqual(Task.objects.get().user, self.user)
+
+    @override_settings(JWT_REVOCATION_CACHE_ALIAS=None)
+    def test_users_are_loaded_without_a_shared_cache(self):
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate()
+        self.assertNotIsInstance(user, TokenClaimsUser)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+# Password hashing: the preferred hasher and rehash-on-login.
+# Cheap Argon2 parameters keep the tests fast.
+@override_settings(
+    PASSWORD_HASHERS=['users.hashers.TunedArgon2PasswordHasher', 'django.contrib.auth.hashers.PBKDF2PasswordHasher'],
+    PASSWORD_ARGON2={'TIME_COST': 1, 'MEMORY_COST': 1024, 'PARALLELISM': 1},
+)
+class PasswordHashingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+
+    def login(self):
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'alice', 'password': 'pass12345'})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.user.refresh_from_db()
+
+    def test_new_passwords_use_argon2(self):
+        self.assertTrue(self.user.password.startswith('argon2$argon2id$v=19$m=1024,t=1,p=1$'))
+
+    def test_other_hashes_are_upgraded_on_login(self):
+        self.user.password = make_password('pass12345', hasher='pbkdf2_sha256')
+        self.user.save()
+        self.login()
+        self.assertTrue(self.user.password.startswith('argon2$'))
+
+    def test_changed_parameters_rehash_on_login(self):
+        with override_settings(PASSWORD_ARGON2={'TIME_COST': 2, 'MEMORY_COST': 2048, 'PARALLELISM': 1}):
+            self.login()
+        self.assertIn('$m=2048,t=2,p=1$', self.user.password)
+
+    def test_validators_are_loaded_at_startup(self):
+        self.assertGreater(get_default_password_validators.cache_info().currsize, 0)
+
+
+# Login throttling on /api/token/.
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'login_ip': '4/min', 'login_username': '2/min'},
+})
+class LoginThrottleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('token_obtain_pair')
+
+    def login(self, username):
+        return self.client.post(self.url, {'username': username, 'password': 'wrong-password'})
+
+    def test_username_limit_rejects_before_hashing(self):
+        self.assertEqual(self.login('alice').status_code, 401)
+        self.assertEqual(self.login('ALICE').status_code, 401)
+        with mock.patch.object(ModelBackend, 'authenticate') as authenticate:
+            response = self.login('alice')
+        self.assertEqual(response.status_code, 429)
+        authenticate.assert_not_called()
+        self.assertEqual(self.login('bob').status_code, 401)
+
+    def test_ip_limit(self):
+        for username in ['a', 'b', 'c', 'd']:
+            self.assertEqual(self.login(username).status_code, 401)
+        self.assertEqual(self.login('e').status_code, 429)
+
+
+# Workspaces and their members (/api/workspaces/), with the caches of a deployment
+# with REDIS_URL (the test cache standing in for the shared one).
+@override_settings(
+    WORKSPACES={**settings.WORKSPACES, 'CACHE_ALIAS': 'default'},
+    TASKS_LIST_CACHE={**settings.TASKS_LIST_CACHE, 'ENABLED': True},
+)
+class WorkspaceAPITests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', password='pass12345')
+        self.client.force_authenticate(user=self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('workspace-list-create'), {'name': 'Team'})
+        self.workspace_id = response.data['id']
+        self.members_url = reverse('workspace-members', args=[self.workspace_id])
+
+    def test_creator_is_owner(self):
+        response = self.client.get(reverse('workspace-list-create'))
+        self.assertEqual(response.data, [
+            {'id': self.workspace_id, 'name': 'Team', 'role': 'owner', 'created_at': response.data[0]['created_at']},
+        ])
+        self.assertEqual(workspace_ids(self.alice), [self.workspace_id])
+
+    def test_owner_adds_and_removes_members(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.members_url, {'username': 'bob'})
+        self.assertEqual((response.status_code, response.data['user']), (201, self.bob.pk))
+        self.assertEqual(workspace_ids(self.bob), [self.workspace_id])
+        self.assertEqual(self.client.post(self.members_url, {'username': 'bob'}).status_code, 400)
+        self.assertEqual(self.client.post(self.members_url, {'username': 'nobody'}).status_code, 400)
+        self.assertEqual([member['username'] for member in self.client.get(self.members_url).data], ['alice', 'bob'])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('workspace-member-detail', args=[self.workspace_id, self.bob.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(workspace_ids(self.bob), [])
+
+    def test_members_cannot_manage(self):
+        Membership.objects.create(workspace_id=self.workspace_id, user=self.bob)
+        carol = User.objects.create_user(username='carol', password='pass12345')
+        self.client.force_authenticate(user=self.bob)
+        self.assertEqual(self.client.get(self.members_url).status_code, 200)
+        self.assertEqual(self.client.post(self.members_url, {'username': 'carol'}).status_code, 403)
+        detail = reverse('workspace-detail', args=[self.workspace_id])
+        self.assertEqual(self.client.patch(detail, {'name': 'Mine'}).status_code, 403)
+        self.assertEqual(self.client.delete(detail).status_code, 403)
+        remove_alice = reverse('workspace-member-detail', args=[self.workspace_id, self.alice.pk])
+        self.assertEqual(self.client.delete(remove_alice).status_code, 403)
+        # Leaving is allowed.
+        leave = reverse('workspace-member-detail', args=[self.workspace_id, self.bob.pk])
+        self.assertEqual(self.client.delete(leave).status_code, 204)
+        # Non-members don't see the workspace at all.
+        self.client.force_authenticate(user=carol)
+        self.assertEqual(self.client.get(self.members_url).status_code, 404)
+        self.assertEqual(self.client.get(detail).status_code, 404)
+
+    def test_last_owner_cannot_leave(self):
+        response = self.client.delete(reverse('workspace-member-detail', args=[self.workspace_id, self.alice.pk]))
+        self.assertEqual(response.status_code, 400)
+
+    # Without a shared cache, ids cached by some process (here, a stale entry) are
+    # never used: a removed member loses access on their next request.
+    @override_settings(WORKSPACES={**settings.WORKSPACES, 'CACHE_ALIAS': None})
+    def test_workspace_ids_are_not_cached_without_a_shared_cache(self):
+        Membership.objects.create(workspace_id=self.workspace_id, user=self.bob)
+        task = Task.objects.create(user=self.alice, title='Shared', workspace_id=self.workspace_id)
+        cache.set(f'users:workspace-ids:{self.bob.pk}', [self.workspace_id])
+        Membership.objects.filter(user=self.bob).delete()
+        self.client.force_authenticate(user=self.bob)
+        self.assertEqual(self.client.get(reverse('task-detail', args=[task.pk])).status_code, 404)
+        self.assertEqual(workspace_ids(self.bob), [])
+
+    def test_deleting_a_workspace_makes_its_tasks_private(self):
+        task = Task.objects.create(user=self.alice, title='Shared', workspace_id=self.workspace_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('workspace-detail', args=[self.workspace_id]))
+        self.assertEqual(response.status_code, 204)
+        task.refresh_from_db()
+        self.assertIsNone(task.workspace_id)
+        self.assertEqual(workspace_ids(self.alice), [])
+
+    # Losing access leaves a trace for clients that sync: a new version for the
+    # creator, a tombstone for the members who no longer see the task.
+    def test_losing_access_reaches_synced_clients(self):
+        carol = User.objects.create_user(username='carol', password='pass12345')
+        for user in (self.bob, carol):
+            Membership.objects.create(workspace_id=self.workspace_id, user=user)
+        task = Task.objects.create(user=self.alice, title='Shared', workspace_id=self.workspace_id)
+        bobs = Task.objects.create(user=self.bob, title="Bob's", workspace_id=self.workspace_id)
+        since = (timezone.now() - timedelta(minutes=1)).isoformat()
+        list_url, detail_url = reverse('task-list-create'), reverse('task-detail', args=[task.pk])
+        list_etag, detail_etag = self.client.get(list_url)['ETag'], self.client.get(detail_url)['ETag']
+
+        # Carol leaves: the task is gone for her, not for bob.
+        self.client.force_authenticate(user=carol)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('workspace-member-detail', args=[self.workspace_id, carol.pk]))
+        self.assertCountEqual(self.client.get(list_url, {'since': since}).data['deleted'], [task.pk, bobs.pk])
+        self.client.force_authenticate(user=self.bob)
+        self.assertEqual(self.client.get(list_url, {'since': since}).data['deleted'], [])
+
+        # The workspace goes: alice's task is private again, bob loses it but keeps his.
+        self.client.force_authenticate(user=self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('workspace-detail', args=[self.workspace_id]))
+        self.assertEqual(self.client.get(list_url, HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual((response.status_code, response.data['workspace']), (200, None))
+        self.assertEqual([item['id'] for item in self.client.get(list_url, {'since': since}).data['tasks']], [task.pk])
+        self.client.force_authenticate(user=self.bob)
+        delta = self.client.get(list_url, {'since': since}).data
+        self.assertEqual((delta['deleted'], [item['id'] for item in delta['tasks']]), ([task.pk], [bobs.pk]))
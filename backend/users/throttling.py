@@ -0,0 +1,46 @@
+# backend/users/throttling.py
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+# Login throttles for `/api/token/` (see `MyTokenObtainPairView`).
+# DRF checks throttles before the view runs, so a rejected request costs a cache
+# lookup instead of a password hash. Rates are `login_ip` and `login_username` in
+# `REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`. The history is kept in the default
+# cache, so limits are per process unless REDIS_URL is set.
+
+
+# LoginRateThrottle
+# Reads its rate from the current settings on each request. DRF's throttles copy
+# `DEFAULT_THROTTLE_RATES` once, at import, so `override_settings` (used by the
+# tests and by `benchmark_api`) would not reach them.
+class LoginRateThrottle(SimpleRateThrottle):
+    def get_rate(self):
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No default throttle rate set for '{self.scope}' scope")
+
+
+# LoginIPRateThrottle
+# Limits login attempts per client IP address (honouring `NUM_PROXIES` for
+# X-Forwarded-For, as DRF's own throttles do).
+class LoginIPRateThrottle(LoginRateThrottle):
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+# LoginUsernameRateThrottle
+# Limits login attempts per username, whatever IP they come from, so one account
+# can't be hammered from many addresses. Usernames are compared case-insensitively.
+class LoginUsernameRateThrottle(LoginRateThrottle):
+    scope = 'login_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not isinstance(username, str) or not username.strip():
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': username.strip().lower()}
@@ -2,7 +2,10 @@
 
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView # Import for refreshing tokens
-from .views import UserRegistrationView, MyTokenObtainPairView
+from .views import (
+    UserRegistrationView, MyTokenObtainPairView, WorkspaceDetailView, WorkspaceListCreateView,
+    WorkspaceMemberDetailView, WorkspaceMemberListView,
+)
 
 urlpatterns = [
     # URL for user registration.
@@ -16,4 +19,17 @@ urlpatterns = [
     # URL for refreshing an access token using a refresh token.
     # When a POST request is made to 'api/token/refresh/', it will be handled by TokenRefreshView.
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-]
\ No newline at end of file
+
+    # URLs for workspaces (shared task lists) and their members.
+    # GET/POST 'api/workspaces/' lists the user's workspaces / creates one.
+    # GET/PATCH/DELETE 'api/workspaces/<id>/' reads, renames or deletes one.
+    # GET/POST 'api/workspaces/<id>/members/' lists / adds members.
+    # DELETE 'api/workspaces/<id>/members/<user id>/' removes a member.
+    path('workspaces/', WorkspaceListCreateView.as_view(), name='workspace-list-create'),
+    path('workspaces/<int:pk>/', WorkspaceDetailView.as_view(), name='workspace-detail'),
+    path('workspaces/<int:pk>/members/', WorkspaceMemberListView.as_view(), name='workspace-members'),
+    path(
+        'workspaces/<int:pk>/members/<int:user_id>/', WorkspaceMemberDetailView.as_view(),
+        name='workspace-member-detail',
+    ),
+]
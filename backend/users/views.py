@@ -1,11 +1,18 @@
 # backend/users/views.py
 
-from rest_framework import generics, status
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404
+from rest_framework import generics, serializers, status
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny # Allows unauthenticated access
+from rest_framework.permissions import AllowAny, IsAuthenticated # Allows unauthenticated / logged-in access
 from rest_framework_simplejwt.views import TokenObtainPairView # Base view for JWT token generation
 
-from .serializers import UserRegistrationSerializer, MyTokenObtainPairSerializer
+from tasks.sharing import revoke_workspace_tasks, unshare_workspace_tasks
+from .models import Membership, Workspace
+from .serializers import MembershipSerializer, UserRegistrationSerializer, MyTokenObtainPairSerializer, WorkspaceSerializer
+from .throttling import LoginIPRateThrottle, LoginUsernameRateThrottle
 
 # UserRegistrationView
 # This view handles the creation of new user accounts.
@@ -55,4 +62,122 @@ class UserRegistrationView(generics.CreateAPIView):
 class MyTokenObtainPairView(TokenObtainPairView):
     # The serializer class to use for handling token generation.
     # Our `MyTokenObtainPairSerializer` adds username and email to the token payload.
-    serializer_class = MyTokenObtainPairSerializer
\ No newline at end of file
+    serializer_class = MyTokenObtainPairSerializer
+
+    # Reject bursts of login attempts per IP and per username before any password
+    # is hashed (see users/throttling.py). Throttled requests get a 429 response.
+    throttle_classes = [LoginIPRateThrottle, LoginUsernameRateThrottle]
+
+
+# WorkspaceListCreateView
+# GET lists the workspaces the user is a member of, with their role in each.
+# POST {"name": "Team"} creates a workspace with the user as its owner.
+# Tasks are shared by setting their `workspace` (see `TaskSerializer`).
+class WorkspaceListCreateView(generics.ListCreateAPIView):
+    serializer_class = WorkspaceSerializer
+    permission_classes = [IsAuthenticated]
+    # A user belongs to a handful of workspaces: no pages.
+    pagination_class = None
+
+    # The user's workspaces, with their role read from the same membership join.
+    def get_queryset(self):
+        return (
+            Workspace.objects.filter(memberships__user=self.request.user)
+            .annotate(role=F('memberships__role'))
+            .order_by('name', 'id')
+        )
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            workspace = serializer.save(created_by=self.request.user)
+            Membership.objects.create(workspace=workspace, user=self.request.user, role=Membership.OWNER)
+        workspace.role = Membership.OWNER
+
+
+# WorkspaceDetailView
+# GET a workspace, PATCH its name or DELETE it. Members can read it; only owners
+# can change or delete it. Deleting a workspace makes its tasks private to their
+# creators again (see tasks/sharing.py). Workspaces the user isn't a member of are
+# reported as not found.
+class WorkspaceDetailView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = WorkspaceSerializer
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['get', 'patch', 'delete', 'head', 'options']
+
+    def get_queryset(self):
+        return WorkspaceListCreateView.get_queryset(self)
+
+    def get_object(self):
+        workspace = super().get_object()
+        if self.request.method not in ('GET', 'HEAD', 'OPTIONS') and workspace.role != Membership.OWNER:
+            raise PermissionDenied('Only the owners of a workspace can change it.')
+        return workspace
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            member_ids = list(Membership.objects.filter(workspace=instance).values_list('user_id', flat=True))
+            unshare_workspace_tasks(instance.pk, member_ids)
+            instance.delete()
+
+
+# WorkspaceMemberListView
+# GET lists the members of a workspace (for its members). POST
+# {"username": "bob", "role": "member"} adds a member (owners only).
+class WorkspaceMemberListView(generics.ListCreateAPIView):
+    serializer_class = MembershipSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        return (
+            Membership.objects.filter(workspace=self.workspace)
+            .select_related('user')
+            .only('user_id', 'user__username', 'role', 'created_at')
+            .order_by('created_at', 'id')
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.workspace, self.role = member_workspace(request, kwargs['pk'])
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'workspace': getattr(self, 'workspace', None)}
+
+    def perform_create(self, serializer):
+        if self.role != Membership.OWNER:
+            raise PermissionDenied('Only the owners of a workspace can add members.')
+        serializer.save(workspace=self.workspace)
+
+
+# WorkspaceMemberDetailView
+# DELETE removes a member: owners can remove anyone, members only themselves
+# (leaving the workspace). The last owner can't leave; delete the workspace instead.
+# The member loses the workspace's tasks (see tasks/sharing.py).
+class WorkspaceMemberDetailView(generics.DestroyAPIView):
+    permission_classes = [IsAuthenticated]
+
+    def destroy(self, request, *args, **kwargs):
+        workspace, role = member_workspace(request, kwargs['pk'])
+        if role != Membership.OWNER and kwargs['user_id'] != request.user.pk:
+            raise PermissionDenied('Only the owners of a workspace can remove other members.')
+        membership = Membership.objects.filter(workspace=workspace, user_id=kwargs['user_id']).first()
+        if membership is None:
+            raise Http404
+        if membership.role == Membership.OWNER and not (
+            Membership.objects.filter(workspace=workspace, role=Membership.OWNER).exclude(pk=membership.pk).exists()
+        ):
+            raise serializers.ValidationError({'detail': 'A workspace needs an owner. Delete it instead.'})
+        with transaction.atomic():
+            membership.delete()
+            revoke_workspace_tasks(workspace.pk, membership.user_id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+# The workspace `pk` and the requesting user's role in it; 404 if they aren't a member.
+def member_workspace(request, pk):
+    membership = (
+        Membership.objects.filter(workspace_id=pk, user=request.user).select_related('workspace').first()
+    )
+    if membership is None:
+        raise Http404
+    return membership.workspace, membership.role
@@ -0,0 +1,98 @@
+# backend/users/workspaces.py
+
+# Which workspaces a user belongs to, for access checks.
+#
+# Every task query that respects sharing needs the ids of the requesting user's
+# workspaces (`Task.objects.visible_to(user)`). Rather than joining the membership
+# table into each of those queries, or checking tasks one by one in Python, the ids
+# are read once with an indexed lookup and kept in the cache until a membership of
+# the user changes. Task queries then filter on `workspace_id IN (...)` directly.
+# New users start with an empty cached set, so only a cache eviction ever costs a
+# request the lookup.
+#
+# The ids decide what a user may read and edit, so they are only cached in a cache
+# every process shares (Redis). A membership change clears the entry in that cache
+# once; a per-process cache (local memory) would keep the old ids in every other
+# web worker, letting a removed member in until the entry expires. Without a shared
+# cache the ids are looked up once per request instead. Either way, a request
+# remembers the ids it read (see `WorkspaceIdsMiddleware`).
+#
+# Settings (see `WORKSPACES` in settings.py):
+#   CACHE_ALIAS     which entry of `CACHES` to use, which must be shared by every
+#                   process; None (the default without REDIS_URL) for no caching
+#   CACHE_TIMEOUT   seconds the ids stay cached at most; a membership change of the
+#                   user drops them at once
+
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Membership
+
+
+# The ids read during the current request, by user id; None outside requests.
+_request_ids = ContextVar('workspace_ids', default=None)
+
+
+# The cache holding workspace ids, or None if they aren't cached.
+def _cache():
+    alias = settings.WORKSPACES['CACHE_ALIAS']
+    return caches[alias] if alias else None
+
+
+def _key(user_id):
+    return f'users:workspace-ids:{user_id}'
+
+
+# The sorted ids of the workspaces `user` is a member of.
+def workspace_ids(user):
+    if user is None or user.pk is None:
+        return []
+    remembered = _request_ids.get()
+    if remembered is not None and user.pk in remembered:
+        return remembered[user.pk]
+    cache = _cache()
+    ids = cache.get(_key(user.pk)) if cache is not None else None
+    if ids is None:
+        ids = sorted(Membership.objects.filter(user_id=user.pk).values_list('workspace_id', flat=True))
+        if cache is not None:
+            cache.set(_key(user.pk), ids, timeout=settings.WORKSPACES['CACHE_TIMEOUT'])
+    if remembered is not None:
+        remembered[user.pk] = ids
+    return ids
+
+
+# A new user has no workspaces yet: caching that right away spares their first
+# requests the lookup.
+def cache_no_workspace_ids(user_id):
+    cache = _cache()
+    if cache is not None:
+        cache.set(_key(user_id), [], timeout=settings.WORKSPACES['CACHE_TIMEOUT'])
+
+
+# Forget a user's cached workspace ids once the current transaction commits.
+# Forgetting them before commit would let a concurrent request cache the old set.
+# The current request, which sees its own writes, forgets them at once.
+def forget_workspace_ids(user_id):
+    remembered = _request_ids.get()
+    if remembered is not None:
+        remembered.pop(user_id, None)
+    cache = _cache()
+    if cache is not None:
+        transaction.on_commit(lambda: cache.delete(_key(user_id)))
+
+
+# WorkspaceIdsMiddleware
+# Scopes the ids remembered by `workspace_ids` to one request.
+class WorkspaceIdsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _request_ids.set({})
+        try:
+            return self.get_response(request)
+        finally:
+            _request_ids.reset(token)
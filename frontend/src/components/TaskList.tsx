@@ -70,6 +70,82 @@ const TaskList: React.FC<TaskListProps> = ({ onEditTask }) => {
     fetchTasks();
   }, [fetchTasks]); // Dependency: fetchTasks function
 
+  // Effect hook to follow task changes pushed by the server (Server-Sent Events),
+  // so other tabs and devices stay in sync without refetching the list.
+  // EventSource can't send headers, and the access token must not go in a URL, so
+  // each connection is opened with a short-lived stream ticket fetched just before.
+  // A ticket has expired by the time EventSource would reconnect on its own, so a
+  // dropped stream is reopened here with a new ticket, resuming from the last event.
+  useEffect(() => {
+    if (!accessToken || typeof EventSource === 'undefined') {
+      return;
+    }
+    let source: EventSource | null = null;
+    let lastEventId = '';
+    let retryTimer: ReturnType<typeof setTimeout> | undefined;
+    let closed = false;
+
+    const upsertTask = (event: MessageEvent) => {
+      lastEventId = event.lastEventId;
+      const task: Task = JSON.parse(event.data);
+      setTasks(prevTasks => prevTasks.some(t => t.id === task.id)
+        ? prevTasks.map(t => (t.id === task.id ? task : t))
+        : [task, ...prevTasks]);
+    };
+    const removeTask = (event: MessageEvent) => {
+      lastEventId = event.lastEventId;
+      const { id } = JSON.parse(event.data);
+      setTasks(prevTasks => prevTasks.filter(task => task.id !== id));
+    };
+    // Too many changes were missed while disconnected: reload the whole list.
+    const resetTasks = (event: MessageEvent) => {
+      lastEventId = event.lastEventId;
+      fetchTasks();
+    };
+
+    const connect = async () => {
+      try {
+        const response = await fetch(`${API_BASE_URL}/async/tasks/events/ticket/`, {
+          method: 'POST',
+          headers: { 'Authorization': `Bearer ${accessToken}` },
+        });
+        if (!response.ok) {
+          throw new Error(`Ticket request failed with ${response.status}`);
+        }
+        const { ticket } = await response.json();
+        if (closed) {
+          return;
+        }
+        const params = new URLSearchParams({ ticket });
+        if (lastEventId) {
+          params.set('last_event_id', lastEventId);
+        }
+        source = new EventSource(`${API_BASE_URL}/async/tasks/events/?${params}`);
+        source.addEventListener('task.created', upsertTask as EventListener);
+        source.addEventListener('task.updated', upsertTask as EventListener);
+        source.addEventListener('task.deleted', removeTask as EventListener);
+        source.addEventListener('reset', resetTasks as EventListener);
+        source.onerror = () => {
+          source?.close();
+          retryTimer = setTimeout(connect, 3000);
+        };
+      } catch (err) {
+        console.error('Task events error:', err);
+        if (!closed) {
+          retryTimer = setTimeout(connect, 3000);
+        }
+      }
+    };
+    connect();
+
+    // Close the stream when the component unmounts or the token changes
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      source?.close();
+    };
+  }, [accessToken, fetchTasks]); // Dependencies: accessToken, fetchTasks
+
   // Function to handle task deletion
   const handleDeleteTask = useCallback(async (taskId: number) => {
     if (!accessToken) {